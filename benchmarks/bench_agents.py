@@ -0,0 +1,97 @@
+"""Per-agent throughput (clients/sec) over the first BENCH_AGENT_CLIENTS clients of the book; DataAgent
+benches load the whole book (books/sec)."""
+import pytest
+
+
+def bench_data_agent_load(bench, book_path):
+    from app.multi_agent_wealth_manager import DataAgent
+    df = bench(lambda: DataAgent(book_path).run(), items=1)
+    assert df["profile__user_id"].notna().any()
+
+
+def bench_data_agent_chunked_groups(bench, book_path):
+    from app.multi_agent_wealth_manager import DataAgent
+    clients = bench(lambda: sum(1 for _ in DataAgent(book_path, chunksize=10_000).groups()))
+    assert clients > 0
+
+
+def bench_normalize_agent(bench, client_frames):
+    from app.multi_agent_wealth_manager import NormalizeAgent
+    bench(lambda: [NormalizeAgent(df=rows).run() for _, rows in client_frames], items=len(client_frames))
+
+
+def bench_holdings_agent(bench, client_tables):
+    from app.multi_agent_wealth_manager import HoldingsAgent
+    results = bench(lambda: [HoldingsAgent(tables=t).run() for t in client_tables], items=len(client_tables))
+    assert all(r["total"] > 0 for r in results)
+
+
+def bench_transactions_agent(bench, client_tables):
+    from app.multi_agent_wealth_manager import TransactionsAgent
+    bench(lambda: [TransactionsAgent(tables=t).run() for t in client_tables], items=len(client_tables))
+
+
+
+def bench_cashflow_book(bench, client_tables):
+    """The cashflow engine over every client's transactions in one grouped pass (clients/sec)."""
+    import pandas as pd
+    from app.agents.tools import cashflow
+    from app.multi_agent_wealth_manager import _earners
+    def stack(frames):
+        return pd.concat([f.assign(client_id=t.profile.get("profile__user_id")) for f, t in zip(frames, client_tables)],
+                         ignore_index=True)
+    tx = stack([t.transactions for t in client_tables])
+    recurring = stack([t.recurring_cashflows for t in client_tables])
+    earners = stack([_earners(t.profile) for t in client_tables])
+    result = bench(lambda: cashflow.compute_cashflow(tx, recurring, earners, client_col="client_id"),
+                   items=len(client_tables))
+    assert len(result["summary"]) == len(client_tables)
+
+def bench_tax_agent(bench, client_tables):
+    from app.multi_agent_wealth_manager import TaxAgent
+    incomes = [float(t.profile.get("employment__salary_gross_annual") or 0) for t in client_tables]
+    agents = [TaxAgent(income=i, filing_status=t.profile.get("tax_profile__filing_status") or "single",
+                       state=t.profile.get("tax_profile__state")) for i, t in zip(incomes, client_tables)]
+    bench(lambda: [a.run() for a in agents], items=len(agents))
+
+
+def bench_report_agent(bench, client_tables):
+    from app.multi_agent_wealth_manager import (AccountsAgent, ComplianceAgent, HoldingsAgent, ReportAgent,
+                                                RiskAgent, TransactionsAgent)
+    reports = []
+    for t in client_tables[:10]:
+        holdings = HoldingsAgent(tables=t).run()
+        reports.append(ReportAgent(output_dir=None, profile=t.profile, accounts_res=AccountsAgent(tables=t).run(),
+                                   holdings_res=holdings, trans_res=TransactionsAgent(tables=t).run(),
+                                   tax_res={}, risk_res=RiskAgent(holdings_info=holdings).run(),
+                                   comp_res=ComplianceAgent(tables=t).run(), write_files=False))
+    files = bench(lambda: [r.run() for r in reports], items=len(reports))
+    assert all(f["report_md"] for f in files)
+
+
+def bench_run_client(bench, client_frames):
+    from app.multi_agent_wealth_manager import run_client
+    frames = client_frames[:10]
+    bench(lambda: [run_client(rows, None, write_files=False) for _, rows in frames], items=len(frames))
+
+
+@pytest.mark.parametrize("block", ["book", "client"])
+def bench_run_engines(bench, client_frames, block):
+    # cashflow, tax, risk and compliance for every client: one engine call per book vs per client
+    from app.multi_agent_wealth_manager import _analyze_clients, _run_engines
+    runs = _analyze_clients([rows for _, rows in client_frames], kyc_records=[{}] * len(client_frames))
+    blocks = [runs] if block == "book" else [[r] for r in runs]
+    bench(lambda: [_run_engines(b) for b in blocks], items=len(runs))
+    assert all(r.comp_res["status"] for r in runs)
+
+
+def bench_report_render(bench, client_tables):
+    from app.multi_agent_wealth_manager import AccountsAgent, HoldingsAgent, RiskAgent, TransactionsAgent
+    from app.reports.rendering import render_report, report_view
+    views = []
+    for t in client_tables:
+        holdings = HoldingsAgent(tables=t).run()
+        views.append(report_view(t.profile, AccountsAgent(tables=t).run(), holdings, TransactionsAgent(tables=t).run(),
+                                 {}, RiskAgent(holdings_info=holdings).run(), {}))
+    out = bench(lambda: [render_report(v, ("md",)) for v in views], items=len(views))
+    assert all(o["md"] for o in out)
@@ -0,0 +1,34 @@
+"""Merchant categorization over a BENCH_FEED_ROWS-row transaction feed (transactions/sec).
+
+The feed mixes the sample merchants with store numbers and processor noise ("UBER *TRIP 4411"),
+so it has tens of thousands of distinct merchant strings like a real card feed."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import SCALE
+
+MERCHANTS = ["Trader Joe's", "Netflix", "Shell", "Amazon", "Whole Foods", "Uber", "UBER *TRIP", "Costco", "Delta",
+             "PG&E", "Target", "Joe's Pizza", "City Parking", "CVS Pharmacy", "Acme Hardware", "Payroll"]
+
+
+@pytest.fixture(scope="module")
+def feed():
+    rng = np.random.default_rng(7)
+    n = SCALE["feed_rows"]
+    merchant = pd.Series(np.array(MERCHANTS)[rng.integers(0, len(MERCHANTS), n)]).str.cat(
+        rng.integers(0, 2_000, n).astype(str), sep=" #")
+    return pd.DataFrame({"client_id": rng.integers(0, max(n // 100, 1), n), "merchant": merchant,
+                         "amount": np.round(rng.normal(-60, 120, n), 2)})
+
+
+def bench_categorize_feed(bench, feed):
+    from app.agents.tools.categorize import categorize
+    categories = bench(lambda: categorize(feed["merchant"]), items=len(feed))
+    assert (categories != "Uncategorized").mean() > 0.9
+
+
+def bench_category_spend_by_client(bench, feed):
+    from app.agents.tools.categorize import category_spend
+    table = bench(lambda: category_spend(feed, client_col="client_id"), items=len(feed))
+    assert table["client_id"].nunique() == feed["client_id"].nunique()
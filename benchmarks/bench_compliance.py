@@ -0,0 +1,68 @@
+"""Policy evaluation over BENCH_POLICY_CLIENTS synthetic clients (clients/sec).
+
+The policy set is mocks/compliance_policies.yaml plus generated threshold rules (every numeric
+feature against a ladder of upper-tail limits), so a batch evaluates 100+ rules like a full firm rulebook."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import SCALE
+
+# upper-tail limits: like a real rulebook most clients trip only a few rules
+LADDER = (0.9, 0.95, 0.975, 0.99, 0.995, 0.998, 0.999, 0.9995, 0.9999)
+
+
+@pytest.fixture(scope="module")
+def features():
+    rng = np.random.default_rng(11)
+    n = SCALE["policy_clients"]
+    cash = rng.lognormal(10, 1.2, n)
+    portfolio = rng.lognormal(11.5, 1.5, n) * (rng.random(n) > 0.1)
+    monthly_expense = rng.lognormal(8.3, 0.4, n)
+    return pd.DataFrame({
+        "filing_status": rng.choice(["married_filing_jointly", "single", "head_of_household"], n),
+        "residency_country": rng.choice(["US", "US", "US", "US", "CA", ""], n),
+        "age": rng.integers(22, 90, n).astype(float),
+        "non_usd_currency": rng.random(n) < 0.08,
+        "foreign_balance": np.where(rng.random(n) < 0.08, rng.lognormal(10, 1.5, n), 0.0),
+        "has_cost_basis": rng.random(n) < 0.6,
+        "cash": cash,
+        "portfolio": portfolio,
+        "net_worth": cash + portfolio - rng.lognormal(10, 1.5, n) * (rng.random(n) < 0.2),
+        "max_position_weight": np.where(portfolio > 0, rng.beta(2, 6, n), np.nan),
+        "max_class_weight": np.where(portfolio > 0, rng.beta(6, 3, n), np.nan),
+        "holdings_count": np.where(portfolio > 0, rng.integers(1, 40, n), 0).astype(float),
+        "monthly_expense": monthly_expense,
+        "liquidity_runway_months": cash / monthly_expense,
+        "savings_rate": rng.normal(0.1, 0.15, n),
+        "tax_income": rng.lognormal(11.3, 0.6, n),
+    })
+
+
+@pytest.fixture(scope="module")
+def policies(features):
+    import yaml
+    from app.agents.tools.compliance_rules import POLICIES_PATH, PolicySet
+    with open(POLICIES_PATH) as f:
+        spec = yaml.safe_load(f)
+    numeric = [c for c in features.columns if features[c].dtype.kind == "f"]
+    for name in numeric:
+        for i, q in enumerate(LADDER):
+            limit = float(np.nanquantile(features[name], q))
+            spec["rules"].append({"id": f"{name}_limit_{i}", "severity": "condition",
+                                  "when": f"{name} > {limit!r} and holdings_count >= 0",
+                                  "message": f"{name} {{{name}:,.2f}} above {limit:,.2f}"})
+    return PolicySet(spec)
+
+
+def bench_policy_evaluate_book(bench, features, policies):
+    assert len(policies.rules) >= 100
+    decisions = bench(lambda: policies.evaluate(features), items=len(features), rounds=3)
+    assert len(decisions) == len(features)
+    assert {d["status"] for d in decisions} == {"ApprovalGranted", "ReworkNeeded"}
+
+
+def bench_policy_matrix_book(bench, features, policies):
+    # the vectorized part alone: rules x clients hit matrix, no messages
+    _, hits = bench(lambda: policies.matrix(features), items=len(features) * len(policies.rules))
+    assert hits.shape == (len(policies.rules), len(features))
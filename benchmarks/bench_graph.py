@@ -0,0 +1,27 @@
+"""run_graph end to end against the stub LLM: cold runs (every agent computed) and warm re-runs."""
+import json
+import os
+
+import pytest
+
+MOCK_INPUT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "src", "app", "agents", "mocks", "client_input_alex.json")
+
+
+@pytest.fixture(scope="module")
+def client_input():
+    with open(MOCK_INPUT) as f:
+        return json.load(f)
+
+
+def bench_run_graph_cold(bench, client_input):
+    from app.agents.graph import run_graph
+    result = bench(lambda: [run_graph(f"bench_{i}", client_input, force=True) for i in range(10)], items=10)
+    assert len(result[-1]["__run__"]["recomputed"]) == len(result[-1]["__run__"]["timings"]["agents"])
+
+
+def bench_run_graph_incremental(bench, client_input):
+    from app.agents.graph import run_graph
+    run_graph("bench_warm", client_input, force=True)
+    result = bench(lambda: [run_graph("bench_warm", client_input) for _ in range(10)], items=10)
+    assert result[-1]["__run__"]["recomputed"] == []
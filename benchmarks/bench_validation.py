@@ -0,0 +1,44 @@
+"""Artifact validation throughput (artifacts/sec) over the six artifacts of one run_graph case:
+per-step model construction + model_dump (the previous graph steps), the precompiled fast and strict
+validators, and the pass-through of an artifact that was already validated."""
+import json
+import os
+
+import pytest
+
+MOCK_INPUT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "src", "app", "agents", "mocks", "client_input_alex.json")
+REPEAT = 500
+
+
+@pytest.fixture(scope="module")
+def artifacts():
+    from app.agents.graph import run_graph
+    from app.schemas import models
+    with open(MOCK_INPUT) as f:
+        result = run_graph("bench_validation", json.load(f), force=True)
+    return [(getattr(models, name), dict(result[name])) for name in
+            ("ClientProfile", "PlanSet", "TaxActionPlan", "RiskReport", "ComplianceDecision", "CommsPackage")]
+
+
+def _each(artifacts, fn):
+    return [fn(model, data) for _ in range(REPEAT) for model, data in artifacts]
+
+
+def bench_validate_model_dump(bench, artifacts):
+    out = bench(lambda: _each(artifacts, lambda model, data: model(**data).model_dump()), items=REPEAT * len(artifacts))
+    assert out[-1] == artifacts[-1][1]
+
+
+@pytest.mark.parametrize("mode", ["fast", "strict"])
+def bench_validate_compiled(bench, artifacts, mode):
+    from app.schemas.validation import validate
+    out = bench(lambda: _each(artifacts, lambda model, data: validate(model, data, mode)), items=REPEAT * len(artifacts))
+    assert out[-1] == artifacts[-1][1]
+
+
+def bench_validate_pass_through(bench, artifacts):
+    from app.schemas.validation import validate
+    validated = [(model, validate(model, data)) for model, data in artifacts]
+    out = bench(lambda: _each(validated, validate), items=REPEAT * len(artifacts))
+    assert out[-1] is validated[-1][1]
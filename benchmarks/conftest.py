@@ -0,0 +1,199 @@
+"""
+Benchmark harness for the bench_*.py suites.
+
+The `bench` fixture times a callable over a few rounds (after one warm-up call) and measures its
+peak traced memory in one extra tracemalloc run. At the end of the session every result is written
+to benchmarks/results/<timestamp>-<commit>.json and compared with benchmarks/baselines/baseline.json
+(same scale only); throughput drops or peak-memory growth beyond BENCH_TOLERANCE are reported.
+
+  PYTHONPATH=src python -m pytest benchmarks                        # run and compare
+  PYTHONPATH=src python -m pytest benchmarks --bench-save-baseline  # record a new baseline
+  PYTHONPATH=src python -m pytest benchmarks --bench-fail-on-regression
+
+Scale: BENCH_CLIENTS (book size, default 200), BENCH_AGENT_CLIENTS (clients per agent round,
+default 50), BENCH_ROUNDS (default 5), BENCH_HOLDINGS / BENCH_TRANSACTIONS as "min,max",
+BENCH_FEED_ROWS (transaction feed size for the categorization bench, default 1,000,000),
+BENCH_POLICY_CLIENTS (clients per compliance policy batch, default 100,000).
+"""
+
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import pytest
+
+# offline, in-memory and deterministic: stub LLM, no response cache, in-memory artifact and KYC stores
+os.environ.setdefault("LLM_PROVIDER", "stub")
+os.environ.setdefault("LLM_CACHE_ENABLED", "0")
+os.environ.setdefault("LLM_CACHE_PATH", ":memory:")
+os.environ.setdefault("ARTIFACT_DB_PATH", ":memory:")
+os.environ.setdefault("KYC_DB_PATH", ":memory:")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+BASELINE = os.path.join(HERE, "baselines", "baseline.json")
+RESULTS_DIR = os.path.join(HERE, "results")
+
+
+def _bounds(name, default):
+    lo, hi = os.getenv(name, default).split(",")
+    return int(lo), int(hi)
+
+
+SCALE = {
+    "clients": int(os.getenv("BENCH_CLIENTS", "200")),
+    "agent_clients": int(os.getenv("BENCH_AGENT_CLIENTS", "50")),
+    "holdings": _bounds("BENCH_HOLDINGS", "3,12"),
+    "transactions": _bounds("BENCH_TRANSACTIONS", "10,60"),
+    "rounds": int(os.getenv("BENCH_ROUNDS", "5")),
+    "feed_rows": int(os.getenv("BENCH_FEED_ROWS", "1000000")),
+    "policy_clients": int(os.getenv("BENCH_POLICY_CLIENTS", "100000")),
+}
+TOLERANCE = float(os.getenv("BENCH_TOLERANCE", "0.2"))
+_results = {}
+
+
+def pytest_addoption(parser):
+    parser.addoption("--bench-save-baseline", action="store_true", help="Write this run as benchmarks/baselines/baseline.json")
+    parser.addoption("--bench-fail-on-regression", action="store_true", help="Fail the session on a regression vs. the baseline")
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+@pytest.fixture
+def bench(request):
+    """bench(fn, items=1) -> fn's last result; records seconds, items/sec and peak KiB under the test's name."""
+
+    def run(fn, items=1, rounds=None):
+        result = fn()  # warm-up: imports, schema and template caches
+        times = []
+        for _ in range(rounds or SCALE["rounds"]):
+            started = time.perf_counter()
+            result = fn()
+            times.append(time.perf_counter() - started)
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] - base
+        if not tracing:
+            tracemalloc.stop()
+        median = statistics.median(times)
+        _results[request.node.name] = {
+            "rounds": len(times),
+            "items": items,
+            "min_seconds": min(times),
+            "median_seconds": median,
+            "items_per_second": items / median if median > 0 else None,
+            "peak_kib": round(peak / 1024, 1),
+        }
+        return result
+
+    return run
+
+
+def _regressions(current, baseline):
+    found = []
+    for name, now in current.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if before.get("items_per_second") and now["items_per_second"] < before["items_per_second"] * (1 - TOLERANCE):
+            found.append(f"{name}: throughput {now['items_per_second']:.1f}/s vs {before['items_per_second']:.1f}/s")
+        if before.get("peak_kib") and now["peak_kib"] > before["peak_kib"] * (1 + TOLERANCE):
+            found.append(f"{name}: peak memory {now['peak_kib']:.0f} KiB vs {before['peak_kib']:.0f} KiB")
+    return found
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _results:
+        return
+    commit = _commit()
+    report = {
+        "commit": commit,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "scale": SCALE,
+        "benchmarks": dict(sorted(_results.items())),
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    with open(os.path.join(RESULTS_DIR, f"{stamp}-{commit}.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    baseline = None
+    if os.path.exists(BASELINE):
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+    session.config._bench_regressions = []
+    if baseline is not None and baseline.get("scale") == json.loads(json.dumps(SCALE)):
+        session.config._bench_regressions = _regressions(_results, baseline["benchmarks"])
+        session.config._bench_baseline = baseline.get("commit")
+    if session.config.getoption("--bench-save-baseline"):
+        os.makedirs(os.path.dirname(BASELINE), exist_ok=True)
+        with open(BASELINE, "w") as f:
+            json.dump(report, f, indent=2)
+    elif session.config._bench_regressions and session.config.getoption("--bench-fail-on-regression"):
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if not _results:
+        return
+    tr = terminalreporter
+    tr.section("benchmarks")
+    tr.write_line(f"{'benchmark':<40} {'median s':>10} {'items/s':>12} {'peak KiB':>12}")
+    for name, r in sorted(_results.items()):
+        rate = f"{r['items_per_second']:.1f}" if r["items_per_second"] else "-"
+        tr.write_line(f"{name:<40} {r['median_seconds']:>10.4f} {rate:>12} {r['peak_kib']:>12.0f}")
+    regressions = getattr(config, "_bench_regressions", [])
+    if regressions:
+        tr.write_line(f"regressions vs baseline {getattr(config, '_bench_baseline', '?')} (tolerance {TOLERANCE:.0%}):")
+        for line in regressions:
+            tr.write_line(f"  {line}")
+
+
+@pytest.fixture(scope="session")
+def book_path():
+    """Synthetic book at BENCH_CLIENTS scale, generated once per scale under .cache/bench."""
+    from synthetic_book import write_book
+    name = "book_{clients}_h{h[0]}-{h[1]}_t{t[0]}-{t[1]}.csv".format(
+        clients=SCALE["clients"], h=SCALE["holdings"], t=SCALE["transactions"])
+    path = os.path.join(ROOT, ".cache", "bench", name)
+    if not os.path.exists(path):
+        write_book(path, SCALE["clients"], holdings=SCALE["holdings"], transactions=SCALE["transactions"])
+    return path
+
+
+@pytest.fixture(scope="session")
+def client_frames(book_path):
+    """(user_id, rows) for the first BENCH_AGENT_CLIENTS clients of the book."""
+    from app.multi_agent_wealth_manager import DataAgent
+    frames = []
+    for uid, rows in DataAgent(book_path).groups():
+        frames.append((uid, rows))
+        if len(frames) == SCALE["agent_clients"]:
+            break
+    return frames
+
+
+@pytest.fixture(scope="session")
+def client_tables(client_frames):
+    from app.multi_agent_wealth_manager import normalize_block
+    return normalize_block([rows for _, rows in client_frames])
@@ -0,0 +1,139 @@
+"""
+Load test for the job-based /cases/{case_id}/run API against a local stub LLM.
+
+Starts a stub Gemini-compatible server (fixed latency per call) and the FastAPI app under uvicorn,
+fires concurrent case submissions, polls each job to completion and reports p50/p99 latency for
+the submission itself and for end-to-end job completion.
+
+Usage:
+  PYTHONPATH=src python benchmarks/loadtest_jobs.py --jobs 200 --concurrency 50 --llm-latency 0.5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_SUMMARY = "1. Executive Summary\n- Stub summary for load testing.\n2. Financial DNA Dashboard\n3. Action Plan"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_stub_llm(port, latency):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency)
+            # answers in both Gemini and OpenAI shapes so any configured provider can parse it
+            body = json.dumps({
+                "candidates": [{"content": {"parts": [{"text": STUB_SUMMARY}]}}],
+                "choices": [{"message": {"content": STUB_SUMMARY}}],
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_api(port):
+    import uvicorn
+    from app.api.server import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+async def run_load(base_url, jobs, concurrency, client_input):
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    sem = asyncio.Semaphore(concurrency)
+    submit_lat, done_lat, failures = [], [], 0
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        async def one(i):
+            nonlocal failures
+            async with sem:
+                t0 = time.perf_counter()
+                r = await client.post(f"/cases/load_{i}/run", json=client_input)
+                submit_lat.append(time.perf_counter() - t0)
+                if r.status_code != 202:
+                    failures += 1
+                    return
+                job_id = r.json()["job_id"]
+            while True:
+                status = (await client.get(f"/jobs/{job_id}")).json()["status"]
+                if status in ("succeeded", "failed"):
+                    break
+                await asyncio.sleep(0.02)
+            done_lat.append(time.perf_counter() - t0)
+            failures += status == "failed"
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(jobs)))
+        elapsed = time.perf_counter() - started
+    return submit_lat, done_lat, failures, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=25)
+    parser.add_argument("--llm-latency", type=float, default=0.25, help="Seconds the stub LLM sleeps per call")
+    parser.add_argument("--input", default="src/app/agents/mocks/client_input_alex.json")
+    args = parser.parse_args()
+
+    llm_port, api_port = free_port(), free_port()
+    start_stub_llm(llm_port, args.llm_latency)
+    os.environ["LLM_BASE_URL"] = f"http://127.0.0.1:{llm_port}"
+    if os.environ.get("LLM_PROVIDER") == "stub":
+        os.environ["LLM_PROVIDER"] = "openai"
+    start_api(api_port)
+
+    with open(args.input) as f:
+        client_input = json.load(f)
+    submit_lat, done_lat, failures, elapsed = asyncio.run(
+        run_load(f"http://127.0.0.1:{api_port}", args.jobs, args.concurrency, client_input)
+    )
+    print(json.dumps({
+        "jobs": args.jobs,
+        "concurrency": args.concurrency,
+        "job_workers": int(os.getenv("JOB_WORKERS", "4")),
+        "llm_latency_s": args.llm_latency,
+        "failures": failures,
+        "elapsed_s": round(elapsed, 3),
+        "jobs_per_s": round(args.jobs / elapsed, 2),
+        "submit_p50_ms": round(statistics.median(submit_lat) * 1000, 2),
+        "submit_p99_ms": round(pct(submit_lat, 0.99) * 1000, 2),
+        "complete_p50_ms": round(statistics.median(done_lat) * 1000, 2) if done_lat else None,
+        "complete_p99_ms": round(pct(done_lat, 0.99) * 1000, 2) if done_lat else None,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
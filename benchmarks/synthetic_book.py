@@ -0,0 +1,196 @@
+"""
+Synthetic client books in the flattened export layout.
+
+Each client spans max(goals, accounts, holdings, transactions, recurring cashflows) rows: profile,
+employment and tax fields sit on the client's first row only and every entity fills its own
+columns from the top, exactly like synthetic_training_data.csv (whose header is reused, with the
+accounts__holdings__* columns of the Agent1 export added). Generation is vectorized per batch of
+clients and written incrementally, so 1M-client books stream to disk in bounded memory.
+
+Usage:
+  python benchmarks/synthetic_book.py --clients 10000 --out .cache/book_10k.csv
+  python benchmarks/synthetic_book.py --clients 1000000 --holdings 5 40 --transactions 20 400 --out book_1m.csv
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_CSV = os.path.join(ROOT, "synthetic_training_data.csv")
+HOLDINGS_COLUMNS = [
+    "accounts__holdings__symbol", "accounts__holdings__name", "accounts__holdings__asset_class",
+    "accounts__holdings__quantity", "accounts__holdings__price", "accounts__holdings__as_of",
+]
+AS_OF = pd.Timestamp("2025-08-12")
+
+# symbol -> (name, asset class, reference price); the first ten are in the mock market-data feed
+SECURITIES = {
+    "VTI": ("Vanguard Total US", "Equity/US", 234.56),
+    "AAPL": ("Apple Inc.", "Equity/US", 189.12),
+    "VXUS": ("Vanguard Total Intl", "Equity/Intl", 64.18),
+    "BND": ("Vanguard Total Bond", "Fixed Income/US", 72.41),
+    "MSFT": ("Microsoft Corp.", "Equity/US", 421.53),
+    "NVDA": ("NVIDIA Corp.", "Equity/US", 182.02),
+    "QQQ": ("Invesco QQQ", "Equity/US", 574.55),
+    "SCHD": ("Schwab US Dividend", "Equity/US", 27.14),
+    "VNQ": ("Vanguard Real Estate", "Real Estate", 89.77),
+    "GLD": ("SPDR Gold", "Commodities", 309.86),
+    "VT": ("Vanguard Total World", "Equity/Global", 107.0),
+    "AGG": ("iShares Core US Aggregate", "Fixed Income/US", 98.4),
+    "CASH": ("Settlement", "Cash", 1.0),
+}
+FIRST_NAMES = ["Jordan", "Alex", "Sam", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn"]
+LAST_NAMES = ["Lee", "Parker", "Nguyen", "Garcia", "Smith", "Patel", "Kim", "Brown", "Rossi", "Cohen"]
+STATES = ["CA", "NY", "TX", "WA", "FL", "IL"]
+FILING_STATUSES = ["single", "married_filing_jointly", "head_of_household"]
+ACCOUNT_TYPES = ["checking", "high_yield_savings", "brokerage", "401k", "roth_ira"]
+MERCHANTS = ["Trader Joe's", "Netflix", "Shell", "Amazon", "Whole Foods", "Uber", "Costco", "Delta", "PG&E", "Target"]
+GOALS = [("Emergency Fund", 40000), ("Retirement", 2000000), ("College", 250000), ("Home", 150000)]
+
+
+def layout():
+    """Column order of the generated book: the sample export's header plus holdings columns."""
+    columns = list(pd.read_csv(SAMPLE_CSV, nrows=0, encoding="utf-8-sig").columns)
+    at = columns.index("accounts__balance") + 1
+    return columns[:at] + HOLDINGS_COLUMNS + columns[at:]
+
+
+def _counts(rng, n, bounds):
+    lo, hi = bounds
+    return rng.integers(lo, hi + 1, size=n)
+
+
+def generate_book(n_clients, holdings=(3, 12), transactions=(10, 60), accounts=(1, 4), goals=(1, 3),
+                  seed=0, start=0, columns=None):
+    """One batch of clients (ids u_<start>..) as a DataFrame in the export layout.
+
+    Entity counts per client are drawn uniformly from the (min, max) bounds."""
+    rng = np.random.default_rng([seed, start])
+    n = n_clients
+    counts = {
+        "goals": _counts(rng, n, goals),
+        "accounts": _counts(rng, n, accounts),
+        "holdings": _counts(rng, n, holdings),
+        "transactions": _counts(rng, n, transactions),
+        "recurring_cashflows": np.ones(n, dtype=int),
+    }
+    rows = np.maximum.reduce(list(counts.values()))
+    rows = np.maximum(rows, 1)
+    client = np.repeat(np.arange(n), rows)
+    pos = np.arange(len(client)) - np.repeat(np.cumsum(rows) - rows, rows)
+    total = len(client)
+    uid = np.char.add("u_", np.char.zfill((client + start).astype(str), 7))
+    first = pos == 0
+    out = {}
+
+    def put(column, values, mask):
+        out[column] = np.where(mask, values, None)
+
+    # profile, employment and tax fields: first row of each client
+    salary = np.round(rng.lognormal(11.6, 0.5, n), -2)
+    state = rng.choice(STATES, n)
+    filing = rng.choice(FILING_STATUSES, n)
+    names = np.char.add(np.char.add(rng.choice(FIRST_NAMES, n), " "), rng.choice(LAST_NAMES, n))
+    per_client = {
+        "schema_version": np.full(n, "1.0"),
+        "as_of": np.full(n, AS_OF.strftime("%Y-%m-%d")),
+        "currency": np.full(n, "USD"),
+        "profile__name": names,
+        "profile__age": rng.integers(25, 76, n),
+        "profile__marital_status": filing,
+        "profile__residency__country": np.full(n, "US"),
+        "profile__residency__state": state,
+        "employment__status": np.full(n, "full_time"),
+        "employment__salary_gross_annual": salary,
+        "employment__pay_frequency": np.full(n, "biweekly"),
+        "tax_profile__filing_status": filing,
+        "tax_profile__state": state,
+        "preferences__risk_tolerance": rng.choice(["conservative", "moderate", "aggressive"], n),
+    }
+    out["profile__user_id"] = np.where(first, uid, None)
+    for column, values in per_client.items():
+        put(column, values[client], first)
+
+    # goals
+    mask = pos < counts["goals"][client]
+    goal = pos % len(GOALS)
+    put("goals__goal_id", np.char.add("g_", goal.astype(str)), mask)
+    put("goals__name", np.array([g[0] for g in GOALS])[goal], mask)
+    put("goals__target_amount", np.array([g[1] for g in GOALS])[goal], mask)
+    put("goals__target_year", 2026 + rng.integers(0, 30, total), mask)
+    put("goals__priority", goal + 1, mask)
+
+    # accounts; holdings and transactions reference one of the client's accounts
+    account_ids = np.char.add(np.char.add(uid, "_acct_"), pos.astype(str))
+    mask = pos < counts["accounts"][client]
+    put("accounts__account_id", account_ids, mask)
+    put("accounts__type", np.array(ACCOUNT_TYPES)[pos % len(ACCOUNT_TYPES)], mask)
+    put("accounts__institution", np.full(total, "Synthetic Bank"), mask)
+    put("accounts__balance", np.round(rng.lognormal(9.5, 1.0, total), 2), mask)
+    owner = np.char.add(np.char.add(uid, "_acct_"), (rng.integers(0, 1 << 30, total) % counts["accounts"][client]).astype(str))
+
+    mask = pos < counts["holdings"][client]
+    symbols = np.array(list(SECURITIES))
+    sym = rng.integers(0, len(symbols), total)
+    price = np.array([s[2] for s in SECURITIES.values()])[sym] * rng.uniform(0.9, 1.1, total)
+    put("accounts__holdings__symbol", symbols[sym], mask)
+    put("accounts__holdings__name", np.array([s[0] for s in SECURITIES.values()])[sym], mask)
+    put("accounts__holdings__asset_class", np.array([s[1] for s in SECURITIES.values()])[sym], mask)
+    put("accounts__holdings__quantity", np.round(rng.lognormal(4.0, 1.0, total), 3), mask)
+    put("accounts__holdings__price", np.round(price, 2), mask)
+    put("accounts__holdings__as_of", np.full(total, AS_OF.strftime("%Y-%m-%d")), mask)
+
+    # recurring paycheck
+    mask = pos < counts["recurring_cashflows"][client]
+    put("recurring_cashflows__id", np.char.add("pay_", uid), mask)
+    put("recurring_cashflows__name", np.full(total, "Paycheck"), mask)
+    put("recurring_cashflows__to_account_id", np.char.add(uid, "_acct_0"), mask)
+    put("recurring_cashflows__amount", np.round(salary[client] / 26 * 0.7, 2), mask)
+    put("recurring_cashflows__frequency", np.full(total, "biweekly"), mask)
+
+    # transactions over the last 90 days: biweekly paychecks in, spending out
+    mask = pos < counts["transactions"][client]
+    paycheck = pos % 8 == 0
+    days = np.where(paycheck, (pos // 8) * 14 % 90, rng.integers(0, 90, total))
+    amount = np.where(paycheck, np.round(salary[client] / 26 * 0.7, 2), -np.round(rng.lognormal(3.5, 1.0, total), 2))
+    put("transactions__tx_id", np.char.add(np.char.add("t_", uid), np.char.add("_", pos.astype(str))), mask)
+    put("transactions__date", (AS_OF - pd.to_timedelta(days, unit="D")).strftime("%Y-%m-%d").to_numpy(), mask)
+    put("transactions__account_id", np.where(paycheck, np.char.add(uid, "_acct_0"), owner), mask)
+    put("transactions__amount", amount, mask)
+    put("transactions__merchant", np.where(paycheck, "Payroll", rng.choice(MERCHANTS, total)), mask)
+
+    frame = pd.DataFrame(out)
+    return frame.reindex(columns=columns or layout())
+
+
+def write_book(path, n_clients, batch_clients=50_000, **kwargs):
+    """Streams `n_clients` to a CSV in batches; returns the number of rows written."""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    columns = layout()
+    written = 0
+    for start in range(0, n_clients, batch_clients):
+        batch = generate_book(min(batch_clients, n_clients - start), start=start, columns=columns, **kwargs)
+        batch.to_csv(path, mode="w" if start == 0 else "a", header=start == 0, index=False)
+        written += len(batch)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--holdings", type=int, nargs=2, default=(3, 12), metavar=("MIN", "MAX"))
+    parser.add_argument("--transactions", type=int, nargs=2, default=(10, 60), metavar=("MIN", "MAX"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+    rows = write_book(args.out, args.clients, holdings=tuple(args.holdings),
+                      transactions=tuple(args.transactions), seed=args.seed)
+    print(f"wrote {args.clients} clients, {rows} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
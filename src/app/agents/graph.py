@@ -1,89 +1,211 @@
+import asyncio
+import inspect
+import threading
+
+from app.agents.scheduler import RunCancelled, build_dag, run_dag
 from app.core.specs_loader import load_agent_specs, build_system_prompt
-from app.core.policies import validate_artifact, ensure_comms_defaults
+from app.core.policies import validate_artifact, ensure_comms_defaults, content_hash
 from app.core.artifacts_store import ArtifactStore
+from app.core.instrumentation import count, run_metrics, span
 from app.schemas.models import *
-from app.agents.tools import market_data, tax_rules, cashflow, scenarios, compliance_rules, comms_builder
+from app.schemas.validation import artifact
+from app.agents.tools import market_data, tax_rules, cashflow, scenarios, compliance_rules, comms_builder, risk, kyc
 import json
 
-def run_graph(case_id: str, client_input: dict) -> dict:
-    store = ArtifactStore
-    specs = load_agent_specs()
+# Bump when a step's logic changes so cached artifacts from older code are not reused
+GRAPH_VERSION = 5
+MANIFEST = "__manifest__"
 
-    # Step 1: Discovery (mocked processing)
-    client_profile = ClientProfile(
-        **client_input,
+
+def _discovery(case_id, client_input, upstream):
+    record = _kyc_record(client_input)
+    return artifact(ClientProfile,
+        **{**client_input, "kyc": record or {"status": kyc.UNKNOWN}},
         rationale="Discovery synthesized baseline profile",
-        data_lineage={"source":"client_input"},
-        missing_fields=[]
-    ).model_dump()
-    store.set(case_id, "ClientProfile", client_profile)
+        data_lineage={"source":"client_input+kyc"},
+        missing_fields=[] if record else ["identity.user_id"]
+    )
+
 
-    # Step 2: Planning & Tax (parallel-ish in sequence for simplicity)
-    plan_set = PlanSet(
+def _kyc_record(client_input):
+    # KYC status from the lookup service (TTL-cached); it is also an external input of the steps that read it
+    return kyc.get_kyc_service().get(kyc.client_user_id(client_input))
+
+
+def _planning(case_id, client_input, upstream):
+    baseline = cashflow.cashflow_from_input(client_input)
+    annual_savings = baseline["net_cashflow"]
+    monthly_expense = baseline["expenses"]["monthly"]
+    has_cashflow = bool(baseline["income"]["total_income"] or baseline["expenses"]["total_expenses"])
+    goal_scenarios = scenarios.get_scenarios(client_input, annual_savings=annual_savings, seed=case_id)
+    return artifact(PlanSet,
         assumptions={"income_growth_rate":0.03,"expense_inflation_rate":0.025,"investment_return_rate":0.04},
-        baseline_cashflow={"income":{"total_income": 234000},"expenses":{"total_expenses": 180000},"net_cashflow":54000},
-        scenarios=[{"scenario_name":"base","success_probability":0.82}],
-        probabilities={"base":0.82},
-        funding_gaps={"retirement":400000,"college":55000},
-        savings_withdrawals={"annual_savings":54000},
-        liquidity_runway_months=6.1,
+        baseline_cashflow=baseline,
+        scenarios=goal_scenarios,
+        probabilities={s["scenario_name"]: s["success_probability"] for s in goal_scenarios},
+        funding_gaps={s["scenario_name"]: s["median_shortfall"] for s in goal_scenarios},
+        savings_withdrawals={"annual_savings":annual_savings},
+        liquidity_runway_months=scenarios.starting_balance(client_input) / monthly_expense if monthly_expense else 0.0,
         allocation_guidance={"cash":5,"bonds":35,"stocks":60},
         glidepath=None,
-        rationale="Planning produced allocations and cashflow",
+        rationale="Planning produced allocations and cashflow; goal probabilities from Monte Carlo",
         data_lineage={"source":"client_profile"},
-        missing_fields=[]
-    ).model_dump()
-    store.set(case_id, "PlanSet", plan_set)
+        missing_fields=([] if goal_scenarios else ["goals"]) + ([] if has_cashflow else ["cashflow"])
+    )
 
-    tax_plan = TaxActionPlan(
+
+def _tax(case_id, client_input, upstream):
+    # sized on the gross income the cashflow engine settled on in planning
+    income = upstream["PlanSet"]["baseline_cashflow"].get("tax_income") or 0.0
+    profile = client_input.get("tax_profile") or {}
+    year = (profile.get("marginal_brackets_hint") or {}).get("federal")
+    calc = tax_rules.compute_tax(income, filing_status=profile.get("filing_status"), state=profile.get("state"),
+                                 year=int(year) if year else None)
+    return artifact(TaxActionPlan,
         actions=[
             {"action":"Tax-Loss Harvesting","symbol":"VTI","timeline":"<30 days","expected_impact":"Loss harvest offsets gains"},
             {"action":"Roth Conversion","timeline":"Q4","expected_impact":"Tax-free growth later"},
             {"action":"Charitable (DAF)","timeline":"Year-end","expected_impact":"Deduction + gains avoidance"}
         ],
         residency_notes="MFJ in CA",
-        expected_tax_impact={"note":"Per action"},
-        dependencies=[],
+        expected_tax_impact={"note":"Per action", "gross_income": income,
+                             **{k: float(calc[k][0]) for k in ("federal_tax", "state_tax", "marginal_rate", "effective_rate")}},
+        dependencies=["PlanSet"],
         rationale="Tax actions sized to bracket and liquidity",
         data_lineage={"source":"client_profile+plan_set"},
-        missing_fields=[]
-    ).model_dump()
-    store.set(case_id, "TaxActionPlan", tax_plan)
-
-    # Step 3: Risk
-    risk_report = RiskReport(
-        exposures={"equity":0.6,"fixed_income":0.35,"cash":0.05},
-        concentrations={"AAPL":0.124},
-        stress_results=[{"scenario":"equity_-20%","pnl_pct":-0.125}],
-        liquidity_tiers={"0-3mo":0.05,"3-12mo":0.175,"12mo+":0.6},
-        mitigations=[{"action":"Trim","symbol":"AAPL","reduce_weight_by":0.024}],
-        rationale="Risk exposures and mitigations",
-        data_lineage={"source":"client_profile+plan_set+tax_plan"},
-        missing_fields=[]
-    ).model_dump()
-    store.set(case_id, "RiskReport", risk_report)
-
-    # Step 4: Compliance
-    comp_decision = ComplianceDecision(
-        status="ApprovalGranted",
-        conditions=[],
-        disclosures=["Standard client disclosure"],
-        redlines=[],
-        rationale="No violations",
-        data_lineage={"source":"risk_plan_tax"},
-        missing_fields=[]
-    ).model_dump()
-    store.set(case_id, "ComplianceDecision", comp_decision)
-
-    # Step 5: Comms (standardized output)
-    artifacts = {
-        "ClientProfile": client_profile,
-        "PlanSet": plan_set,
-        "TaxActionPlan": tax_plan,
-        "RiskReport": risk_report,
-        "ComplianceDecision": comp_decision
-    }
-    comms_pkg = comms_builder.build_comms_package(artifacts)
-    store.set(case_id, "CommsPackage", comms_pkg)
-
-    return {**artifacts, "CommsPackage": comms_pkg}
+        missing_fields=[] if income else ["income"]
+    )
+
+
+def _risk(case_id, client_input, upstream):
+    holdings = risk.holdings_from_input(client_input)
+    holdings = market_data.revalue(holdings, market_data.get_price_service().snapshot(holdings["symbol"]))
+    return artifact(RiskReport,
+        **risk.risk_report_fields(holdings),
+        rationale="Stress scenarios and concentration limits applied to current holdings",
+        data_lineage={"source":"client_input.accounts+market_prices+stress_scenarios"},
+        missing_fields=[] if not holdings.empty else ["holdings"]
+    )
+
+
+def _risk_prices(client_input):
+    # Risk values holdings at live prices, so the price snapshot is one of its inputs
+    holdings = risk.holdings_from_input(client_input)
+    return market_data.get_price_service().snapshot(holdings["symbol"]).to_dict("records")
+
+
+def _compliance(case_id, client_input, upstream):
+    features = compliance_rules.features_from_input(client_input, upstream["PlanSet"], upstream["RiskReport"],
+                                                    _kyc_record(client_input))
+    decision = compliance_rules.check_compliance(features)
+    return artifact(ComplianceDecision,
+        **{**decision, "data_lineage": {**decision["data_lineage"], "inputs": "client_input+plan_set+risk_report+kyc"}}
+    )
+
+
+async def _comms(case_id, client_input, upstream):
+    # awaits the LLM on the event loop; retries back off there instead of holding a worker thread
+    return artifact(CommsPackage, **await comms_builder.abuild_comms_package(upstream))
+
+
+# agent (agent_specs.yaml) -> function(case_id, client_input, upstream artifacts) -> artifact;
+# coroutine functions run on the event loop, the rest on worker threads
+AGENTS = {
+    "discovery": _discovery,
+    "planning": _planning,
+    "tax": _tax,
+    "risk": _risk,
+    "compliance": _compliance,
+    "comms": _comms,
+}
+# inputs an agent reads from outside client_input
+EXTERNAL_INPUTS = {"discovery": _kyc_record, "risk": _risk_prices, "compliance": _kyc_record}
+
+
+def agent_input_hash(node, case_id, client_input, upstream_hashes):
+    direct = client_input if node.client_input is None else {k: client_input.get(k) for k in node.client_input}
+    external = EXTERNAL_INPUTS[node.name](client_input) if node.name in EXTERNAL_INPUTS else None
+    return content_hash({
+        "graph_version": GRAPH_VERSION,
+        "step": node.name,
+        "case_id": case_id,
+        "upstream": upstream_hashes,
+        "client_input": direct,
+        "external": external,
+    })
+
+
+async def arun_graph(case_id: str, client_input: dict, force: bool = False) -> dict:
+    """Runs the agents of agent_specs.yaml as a DAG: each starts once its `inputs` exist, so
+    independent agents (Planning, Tax, Risk) run concurrently on worker threads; Comms awaits the
+    LLM on the event loop.
+
+    An agent whose input hash (upstream output hashes + the client_input fields it declares +
+    external inputs) matches the previous run's reuses its stored artifact. The result carries
+    "__run__" = {"recomputed", "reused", "version", "timings", "metrics"}; metrics has each
+    agent's wall/CPU seconds (app.core.instrumentation).
+    """
+    store = ArtifactStore
+    nodes = build_dag(load_agent_specs())
+    previous = {} if force else (store.get(case_id, MANIFEST) or {})
+    output_hashes, manifest, recomputed = {}, {}, set()
+    # set when the run fails: an agent abandoned on timeout still finishes on its worker thread
+    # and must not start work or record its output into this run afterwards
+    cancelled = threading.Event()
+
+    def lookup(node):
+        if cancelled.is_set():
+            raise RunCancelled(node.name)
+        # (input hash, stored artifact if it is still valid for these inputs)
+        input_hash = agent_input_hash(node, case_id, client_input, {i: output_hashes[i] for i in node.inputs})
+        cached = previous.get(node.name, {})
+        value = store.get(case_id, node.output) if cached.get("input_hash") == input_hash else None
+        if value is not None and content_hash(value) == cached.get("output_hash"):
+            count("agents_reused")
+            return input_hash, value
+        return input_hash, None
+
+    def record(node, input_hash, value, computed):
+        if cancelled.is_set():
+            raise RunCancelled(node.name)
+        if computed:
+            recomputed.add(node.name)
+        output_hashes[node.output] = content_hash(value)
+        manifest[node.name] = {"artifact": node.output, "input_hash": input_hash, "output_hash": output_hashes[node.output]}
+        return value
+
+    def execute(node, upstream):
+        input_hash, value = lookup(node)
+        computed = value is None
+        if computed:
+            with span(node.name):
+                value = AGENTS[node.name](case_id, client_input, upstream)
+        return record(node, input_hash, value, computed)
+
+    async def run_agent(node, upstream):
+        if not inspect.iscoroutinefunction(AGENTS[node.name]):
+            return await asyncio.to_thread(execute, node, upstream)
+        input_hash, value = await asyncio.to_thread(lookup, node)
+        computed = value is None
+        if computed:
+            with span(node.name):
+                value = await AGENTS[node.name](case_id, client_input, upstream)
+        return record(node, input_hash, value, computed)
+
+    with run_metrics(case_id) as metrics:
+        artifacts, timings = await run_dag(nodes, run_agent, cancelled)
+
+    # one versioned write per run that changed anything, so each version is a complete run
+    version = store.set_many(case_id, {**artifacts, MANIFEST: manifest}) if recomputed else None
+    return {**artifacts, "__run__": {
+        "recomputed": [n for n in nodes if n in recomputed],
+        "reused": [n for n in nodes if n not in recomputed],
+        "version": version,
+        "timings": timings,
+        "metrics": metrics.summary(),
+    }}
+
+
+def run_graph(case_id: str, client_input: dict, force: bool = False) -> dict:
+    """Synchronous entry point for worker threads and the CLI; see arun_graph."""
+    return asyncio.run(arun_graph(case_id, client_input, force=force))
@@ -1,4 +1,4 @@
-from app.agents.graph import run_graph
-
 def run_flow(case_id: str, client_input: dict) -> dict:
+    # imported on first run so the API process starts without pandas/numpy and the agent tools
+    from app.agents.graph import run_graph
     return run_graph(case_id, client_input)
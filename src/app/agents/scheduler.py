@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from app.config import settings
+
+
+class DagError(ValueError):
+    pass
+
+
+class RunCancelled(Exception):
+    """Raised by an agent that finds its run already failed or cancelled."""
+
+
+class AgentFailed(Exception):
+    def __init__(self, agent, cause):
+        super().__init__(f"{agent}: {type(cause).__name__}: {cause}")
+        self.agent = agent
+        self.cause = cause
+
+
+@dataclass(frozen=True)
+class AgentNode:
+    name: str
+    output: str
+    inputs: Tuple[str, ...]
+    client_input: Optional[Tuple[str, ...]]  # None = the whole client input
+    timeout: float
+
+
+def build_dag(specs) -> Dict[str, AgentNode]:
+    """Agent nodes from agent_specs.yaml, in a topological order.
+
+    An agent depends on the agents whose output_contract appears in its `inputs`.
+    """
+    nodes = {}
+    for name, spec in specs.items():
+        fields = spec.get("client_input", "*")
+        nodes[name] = AgentNode(
+            name=name,
+            output=spec["output_contract"],
+            inputs=tuple(spec.get("inputs") or ()),
+            client_input=None if fields == "*" else tuple(fields or ()),
+            timeout=float(spec.get("timeout_seconds") or settings.AGENT_TIMEOUT_SECONDS),
+        )
+    producers = {n.output: n.name for n in nodes.values()}
+    for node in nodes.values():
+        unknown = [i for i in node.inputs if i not in producers]
+        if unknown:
+            raise DagError(f"{node.name}: no agent produces {unknown}")
+    ordered, state = [], {}
+
+    def visit(name, path):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "active":
+            raise DagError(f"cycle: {' -> '.join(path + [name])}")
+        state[name] = "active"
+        for i in nodes[name].inputs:
+            visit(producers[i], path + [name])
+        state[name] = "done"
+        ordered.append(name)
+
+    for name in nodes:
+        visit(name, [])
+    return {name: nodes[name] for name in ordered}
+
+
+def critical_path(nodes, timings):
+    """Longest dependency chain by finish time: from the last agent to finish, repeatedly step to
+    the input that finished last (the one it was actually waiting on)."""
+    producers = {n.output: n.name for n in nodes.values()}
+    name = max(timings, key=lambda n: timings[n]["end"])
+    path = [name]
+    while nodes[name].inputs:
+        name = max((producers[i] for i in nodes[name].inputs), key=lambda n: timings[n]["end"])
+        path.append(name)
+    return path[::-1]
+
+
+async def run_dag(nodes, run_agent, cancelled=None):
+    """Runs every agent as soon as its inputs are ready.
+
+    `run_agent(node, upstream)` is a coroutine function returning the node's output; each call is
+    bounded by the node's timeout. The first failure or timeout cancels every agent still running
+    or waiting and is raised as AgentFailed. Returns (outputs by artifact name, timing report).
+
+    Cancelling only abandons an agent: one running on a worker thread (asyncio.to_thread) cannot be
+    interrupted and runs to completion in the background. `cancelled` (a threading.Event) is set
+    as soon as the run fails or is cancelled, so such agents must check it before persisting
+    anything.
+    """
+    cancelled = cancelled if cancelled is not None else threading.Event()
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    outputs = {n.output: loop.create_future() for n in nodes.values()}
+    timings = {}
+
+    async def run(node):
+        upstream = {i: await outputs[i] for i in node.inputs}
+        ready = time.perf_counter() - started
+        try:
+            value = await asyncio.wait_for(run_agent(node, upstream), timeout=node.timeout)
+        except asyncio.TimeoutError as e:
+            raise AgentFailed(node.name, TimeoutError(f"exceeded {node.timeout:g}s")) from e
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            raise AgentFailed(node.name, e) from e
+        end = time.perf_counter() - started
+        timings[node.name] = {"ready": ready, "end": end, "seconds": end - ready}
+        outputs[node.output].set_result(value)
+
+    tasks = [asyncio.create_task(run(node), name=node.name) for node in nodes.values()]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    except asyncio.CancelledError:
+        cancelled.set()
+        for task in tasks:
+            task.cancel()
+        raise
+    failed = next((t for t in done if t.exception() is not None), None)
+    if failed is not None:
+        cancelled.set()
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for fut in outputs.values():
+            fut.cancel()
+        raise failed.exception()
+
+    wall = time.perf_counter() - started
+    path = critical_path(nodes, timings)
+    report = {
+        "wall_seconds": wall,
+        "sum_seconds": sum(t["seconds"] for t in timings.values()),
+        "critical_path": path,
+        "critical_path_seconds": sum(timings[n]["seconds"] for n in path),
+        "agents": timings,
+    }
+    return {name: fut.result() for name, fut in outputs.items()}, report
@@ -1,2 +1,298 @@
-def compute_cashflow():
-    return {"total_income": 234000, "total_expenses": 180000, "net_cashflow": 54000}
+"""
+Cashflow engine: cadence detection, monthly series and annualized totals.
+
+Transactions are split into streams (client, account, merchant, direction). A stream seen at
+least twice gets its cadence from the median gap between dates (nearest of CADENCE_DAYS, within
+CADENCE_TOLERANCE) and is annualized as its median amount times the periods per year. A single
+inflow takes the client's declared pay frequency (employment__pay_frequency), since a lone
+deposit in a short export is almost always a paycheck. Anything else is scaled from the client's
+observed window (at least MIN_WINDOW_DAYS, at most a year) to twelve months.
+
+Declared recurring cashflows (recurring_cashflows__amount/frequency) are annualized from their
+frequency and take precedence over a transaction stream on the same account and direction whose
+typical amount is within MATCH_TOLERANCE, so a paycheck is not counted twice. Transfers between
+two of the client's accounts are not cashflow.
+
+Clients, streams and months are factorized to integer codes and aggregated with bincount and
+one integer-keyed groupby, so a whole book (pass a client column) is one pass and a single client
+costs a few milliseconds.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+# declared frequency -> periods per year ("bi-weekly", "Semi_Monthly" etc. normalize to these)
+FREQUENCIES = {
+    "daily": 365, "weekly": 52, "biweekly": 26, "fortnightly": 26, "semimonthly": 24, "monthly": 12,
+    "bimonthly": 6, "quarterly": 4, "semiannual": 2, "semiannually": 2, "annual": 1, "annually": 1, "yearly": 1,
+}
+# typical gap in days between two occurrences of each cadence we infer from dates
+CADENCE_DAYS = {"weekly": 7.0, "biweekly": 14.0, "semimonthly": 365 / 24, "monthly": 365 / 12,
+                "quarterly": 365 / 4, "annual": 365.0}
+CADENCE_TOLERANCE = 0.2
+MATCH_TOLERANCE = 0.1
+MIN_WINDOW_DAYS = 7
+CLIENT = "client_id"
+SUMMARY_COLUMNS = ["period_start", "period_end", "window_days", "income_observed", "expense_observed",
+                   "income_recurring", "expense_recurring", "annual_income", "annual_expense", "net_cashflow",
+                   "monthly_income", "monthly_expense", "savings_rate", "employment_income", "tax_income",
+                   "pay_frequency"]
+STREAM_COLUMNS = [CLIENT, "account_id", "merchant", "name", "direction", "n", "total", "typical", "gap_days",
+                  "cadence", "annual"]
+
+
+def _frequency_key(value):
+    return re.sub(r"[\s_\-]", "", str(value).lower())
+
+
+def periods_per_year(frequency):
+    """Periods per year for an array of declared frequencies (NaN where unknown)."""
+    codes, uniques = pd.factorize(np.asarray(frequency, dtype=object))
+    rates = np.array([FREQUENCIES.get(_frequency_key(u), np.nan) for u in uniques] + [np.nan], dtype=np.float64)
+    return rates[codes]
+
+
+def detect_cadence(gap_days):
+    """Cadence label for each median gap in days ("irregular" when none is within tolerance)."""
+    gaps = np.asarray(gap_days, dtype=np.float64)
+    typical = np.array(list(CADENCE_DAYS.values()))
+    error = np.nan_to_num(np.abs(gaps[:, None] / typical - 1.0), nan=np.inf)
+    nearest = error.argmin(axis=1)
+    ok = error[np.arange(len(gaps)), nearest] <= CADENCE_TOLERANCE
+    return np.where(ok, np.array(list(CADENCE_DAYS), dtype=object)[nearest], "irregular")
+
+
+def _column(df, name, dtype=None):
+    if name not in df.columns:
+        return np.full(len(df), np.nan, dtype=dtype or object)
+    values = df[name]
+    if dtype == np.float64:
+        return pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    return values.to_numpy(dtype=object)
+
+
+def _labels(df, name):
+    # group keys: a missing account / merchant is its own group ("") rather than dropped
+    values = _column(df, name)
+    return np.where(pd.isna(values), "", values).astype(object)
+
+
+def _days(df):
+    # dates as float days since the epoch (NaN for missing), so gaps and windows are plain arithmetic
+    if "date" not in df.columns:
+        return np.full(len(df), np.nan)
+    dates = pd.to_datetime(df["date"], errors="coerce").to_numpy("datetime64[D]")
+    return np.where(np.isnat(dates), np.nan, dates.astype(np.int64).astype(np.float64))
+
+
+def _clients(df, client_col):
+    if client_col and client_col in df.columns:
+        return df[client_col].astype(str).to_numpy(dtype=object)
+    return np.full(len(df), "all", dtype=object)
+
+
+def _group_ids(*keys):
+    """Dense 0..k-1 id per distinct combination of the key arrays, plus each group's first row."""
+    ids = np.zeros(len(keys[0]), dtype=np.int64)
+    for key in keys:
+        codes, uniques = pd.factorize(key, use_na_sentinel=False)
+        ids = ids * max(len(uniques), 1) + codes
+    ids, _ = pd.factorize(ids)
+    _, first = np.unique(ids, return_index=True)
+    return ids, first
+
+
+def _date(day):
+    return None if np.isnan(day) else str(np.datetime64(int(day), "D"))
+
+
+def transaction_streams(transactions, client_col=None, pay_frequency=None):
+    """One row per transaction stream with its cadence and annualized amount.
+
+    `pay_frequency` maps client -> declared pay frequency (used for single inflows)."""
+    df = pd.DataFrame() if transactions is None else transactions
+    amount = _column(df, "amount", np.float64)
+    keep = np.isfinite(amount) & (amount != 0)
+    client, account, merchant = _clients(df, client_col)[keep], _labels(df, "account_id")[keep], _labels(df, "merchant")[keep]
+    amount, days = amount[keep], _days(df)[keep]
+    if not len(amount):
+        return pd.DataFrame(columns=STREAM_COLUMNS)
+    direction = np.where(amount > 0, "income", "expense")
+    value = np.abs(amount)
+    ids, first = _group_ids(client, account, merchant, direction)
+    order = np.lexsort((days, ids))
+    sorted_ids, sorted_days = ids[order], days[order]
+    gaps = np.concatenate(([np.nan], np.where(sorted_ids[1:] == sorted_ids[:-1], np.diff(sorted_days), np.nan)))
+    medians = pd.DataFrame({"typical": value[order], "gap_days": gaps}).groupby(sorted_ids, sort=True).median()
+    n = np.bincount(ids)
+    cadence = np.where(n > 1, detect_cadence(medians["gap_days"].to_numpy()), "irregular")
+    stream_client = client[first]
+    if pay_frequency is not None:
+        declared = pd.Series(stream_client).map(pay_frequency).to_numpy(dtype=object)
+        single_inflow = (n == 1) & (direction[first] == "income") & pd.notna(declared)
+        cadence = np.where(single_inflow, declared, cadence)
+    # scale for streams without a cadence: the client's observed window, clamped to [MIN_WINDOW_DAYS, 365]
+    window = pd.Series(days).groupby(client).agg(["min", "max"])
+    span = (window["max"] - window["min"] + 1).reindex(stream_client).to_numpy(dtype=np.float64, na_value=np.nan)
+    scale = 365.0 / np.clip(np.nan_to_num(span, nan=365.0), MIN_WINDOW_DAYS, 365)
+    per_year = periods_per_year(cadence)
+    total = np.bincount(ids, weights=value)
+    typical = medians["typical"].to_numpy()
+    return pd.DataFrame({
+        CLIENT: stream_client, "account_id": account[first], "merchant": merchant[first], "name": "",
+        "direction": direction[first], "n": n, "total": total, "typical": typical,
+        "gap_days": medians["gap_days"].to_numpy(), "cadence": cadence,
+        "annual": np.where(np.isnan(per_year), total * scale, typical * per_year),
+    })
+
+
+def recurring_streams(recurring, client_col=None):
+    """Declared recurring cashflows with direction, account and annualized amount (transfers dropped)."""
+    df = pd.DataFrame() if recurring is None else recurring
+    amount = _column(df, "amount", np.float64)
+    to_account, from_account = _labels(df, "to_account_id"), _labels(df, "from_account_id")
+    inbound, outbound = to_account != "", from_account != ""
+    direction = np.select([inbound & outbound, inbound, outbound, amount > 0],
+                          ["transfer", "income", "expense", "income"], "expense")
+    keep = np.isfinite(amount) & (direction != "transfer")
+    frequency = _column(df, "frequency")[keep]
+    value = np.abs(amount[keep])
+    return pd.DataFrame({
+        CLIENT: _clients(df, client_col)[keep], "account_id": np.where(inbound, to_account, from_account)[keep],
+        "merchant": "", "name": _labels(df, "name")[keep], "direction": direction[keep], "n": 0, "total": 0.0,
+        "typical": value, "gap_days": np.nan, "cadence": frequency, "annual": value * periods_per_year(frequency),
+    }, columns=STREAM_COLUMNS)
+
+
+def _drop_declared(streams, declared):
+    # a transaction stream on the same client/account/direction as a declared flow of about the
+    # same size is that flow's occurrences
+    if streams.empty or declared.empty:
+        return streams
+    both = pd.concat([streams, declared], ignore_index=True)
+    ids, _ = _group_ids(*(both[k].to_numpy(dtype=object) for k in (CLIENT, "account_id", "direction")))
+    stream_ids, declared_ids = ids[:len(streams)], ids[len(streams):]
+    pairs = pd.DataFrame({"key": stream_ids, "row": np.arange(len(streams)), "typical": streams["typical"].to_numpy()})
+    pairs = pairs.merge(pd.DataFrame({"key": declared_ids, "value": declared["typical"].to_numpy()}), on="key")
+    close = np.abs(pairs["typical"] - pairs["value"]) <= MATCH_TOLERANCE * pairs["value"]
+    return streams.drop(index=streams.index[np.unique(pairs.loc[close, "row"])])
+
+
+def monthly_series(transactions, client_col=None):
+    """Observed income, expense and net per client and calendar month."""
+    df = pd.DataFrame() if transactions is None else transactions
+    amount, days = _column(df, "amount", np.float64), _days(df)
+    keep = np.isfinite(amount) & np.isfinite(days)
+    amount = amount[keep]
+    month = days[keep].astype(np.int64).astype("datetime64[D]").astype("datetime64[M]")
+    monthly = pd.DataFrame({"income": np.clip(amount, 0, None), "expense": -np.clip(amount, None, 0)}).groupby(
+        [_clients(df, client_col)[keep], month], sort=True).sum()
+    monthly["net"] = monthly["income"] - monthly["expense"]
+    return monthly.rename_axis([CLIENT, "month"]).reset_index()
+
+
+def compute_cashflow(transactions=None, recurring=None, employment=None, client_col=None):
+    """Cashflow for every client in the frames: {"summary", "streams", "monthly"}.
+
+    `summary` is indexed by client (CLIENT is "all" without a client column) with the
+    SUMMARY_COLUMNS; `tax_income` is gross employment income (salary + expected bonus over all
+    earners) when declared, else annual_income. Frames use the normalized column names (date,
+    account_id, merchant, amount; name, amount, frequency, from/to_account_id; salary_gross_annual,
+    expected_bonus_annual, pay_frequency)."""
+    employment = pd.DataFrame() if employment is None else employment
+    earner_client = _clients(employment, client_col)
+    gross = np.nan_to_num(_column(employment, "salary_gross_annual", np.float64)) + \
+        np.nan_to_num(_column(employment, "expected_bonus_annual", np.float64))
+    pay = pd.Series(_column(employment, "pay_frequency")).groupby(earner_client).first()
+    streams = transaction_streams(transactions, client_col, pay.dropna())
+    declared = recurring_streams(recurring, client_col)
+    counted = pd.concat([_drop_declared(streams, declared), declared], ignore_index=True)
+
+    tx = pd.DataFrame() if transactions is None else transactions
+    tx_client, days = _clients(tx, client_col), _days(tx)
+    clients = pd.Index(pd.unique(np.concatenate([tx_client, counted[CLIENT].to_numpy(dtype=object), earner_client])),
+                       name=CLIENT)
+    k = len(clients)
+
+    def total(frame, column, direction):
+        rows = frame["direction"].to_numpy() == direction
+        codes = clients.get_indexer(frame[CLIENT].to_numpy(dtype=object)[rows])
+        return np.bincount(codes, weights=frame[column].to_numpy(dtype=np.float64)[rows], minlength=k)
+
+    dated = np.isfinite(days)
+    window = pd.Series(days[dated]).groupby(tx_client[dated]).agg(["min", "max"]).reindex(clients)
+    annual_income, annual_expense = total(counted, "annual", "income"), total(counted, "annual", "expense")
+    net = annual_income - annual_expense
+    employment_income = np.bincount(clients.get_indexer(earner_client), weights=gross, minlength=k)
+    summary = pd.DataFrame({
+        "period_start": [_date(d) for d in window["min"]],
+        "period_end": [_date(d) for d in window["max"]],
+        "window_days": (window["max"] - window["min"] + 1).to_numpy(),
+        "income_observed": total(streams, "total", "income"),
+        "expense_observed": total(streams, "total", "expense"),
+        "income_recurring": total(declared, "annual", "income"),
+        "expense_recurring": total(declared, "annual", "expense"),
+        "annual_income": annual_income,
+        "annual_expense": annual_expense,
+        "net_cashflow": net,
+        "monthly_income": annual_income / 12,
+        "monthly_expense": annual_expense / 12,
+        "savings_rate": np.divide(net, annual_income, out=np.zeros(k), where=annual_income > 0),
+        "employment_income": employment_income,
+        "tax_income": np.where(employment_income > 0, employment_income, annual_income),
+        "pay_frequency": pay.reindex(clients).to_numpy(dtype=object),
+    }, index=clients)
+    return {"summary": summary, "streams": counted, "monthly": monthly_series(transactions, client_col)}
+
+
+def _plain(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return str(pd.Timestamp(value).date())
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def baseline_cashflow(result, client="all"):
+    """PlanSet.baseline_cashflow for one client of a compute_cashflow result (JSON-safe)."""
+    summary = result["summary"]
+    row = {k: _plain(v) for k, v in summary.loc[client].items()} if client in summary.index else {}
+    get = lambda k: row.get(k) or 0.0  # noqa: E731
+    streams = result["streams"]
+    streams = streams[streams[CLIENT].to_numpy() == client]
+    monthly = result["monthly"]
+    monthly = monthly[monthly[CLIENT].to_numpy() == client]
+    return {
+        "income": {"total_income": get("annual_income"), "recurring": get("income_recurring"),
+                   "employment_gross": get("employment_income"), "monthly": get("monthly_income")},
+        "expenses": {"total_expenses": get("annual_expense"), "recurring": get("expense_recurring"),
+                     "monthly": get("monthly_expense")},
+        "net_cashflow": get("net_cashflow"),
+        "savings_rate": get("savings_rate"),
+        "tax_income": get("tax_income"),
+        "observed_period": [row.get("period_start"), row.get("period_end")],
+        "streams": [{"direction": d, "account_id": a or None, "label": m or n or None, "cadence": _plain(c),
+                     "annual": float(v)}
+                    for d, a, m, n, c, v in zip(streams["direction"], streams["account_id"], streams["merchant"],
+                                                streams["name"], streams["cadence"], streams["annual"])],
+        "monthly_series": [{"month": _plain(m), "income": float(i), "expense": float(e)}
+                           for m, i, e in zip(monthly["month"], monthly["income"], monthly["expense"])],
+    }
+
+
+def _records(client_input, key):
+    rows = list(client_input.get(key) or [])
+    for account in client_input.get("accounts") or []:
+        for row in account.get(key) or []:
+            rows.append({"account_id": account.get("account_id"), **row})
+    return pd.DataFrame(rows)
+
+
+def cashflow_from_input(client_input):
+    """baseline_cashflow for a nested client input dict (transactions at top level or under
+    accounts, recurring_cashflows, employment and partner_employment)."""
+    earners = [client_input[k] for k in ("employment", "partner_employment") if isinstance(client_input.get(k), dict)]
+    result = compute_cashflow(_records(client_input, "transactions"), _records(client_input, "recurring_cashflows"),
+                              pd.DataFrame(earners))
+    return baseline_cashflow(result)
@@ -0,0 +1,112 @@
+"""
+Merchant categorization over transaction feeds.
+
+Rules (mocks/merchant_categories.json) are compiled once into a MerchantIndex: exact names in a
+dict, prefixes in a dict keyed by their leading words (longest prefix wins), and every regex in
+one alternation of lookaheads whose named group identifies the rule. Names are normalized first (lowercase,
+punctuation to spaces), so "TRADER JOE'S #552" and "Trader Joe's" both hit the "Trader Joe"
+prefix. Precedence is exact, then prefix, then regex (in file order), then the default.
+
+A feed is categorized per distinct merchant, not per row: `categorize()` factorizes the merchant
+column (a categorical column is already factorized), looks up each unique name once and
+broadcasts the category codes back, so cost scales with the number of merchants.
+"""
+import json
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+CATEGORY_RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "mocks", "merchant_categories.json")
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_merchant(name):
+    return _NON_WORD.sub(" ", str(name).lower()).strip()
+
+
+class MerchantIndex:
+    """Compiled merchant rules: exact dict, word-prefix dict and one combined regex."""
+
+    def __init__(self, rules):
+        self.default = rules.get("default", "Uncategorized")
+        self.exact = {normalize_merchant(k): v for k, v in rules.get("exact", {}).items()}
+        self.prefix = {normalize_merchant(k): v for k, v in rules.get("prefix", {}).items()}
+        self.prefix_words = sorted({len(p.split()) for p in self.prefix}, reverse=True)
+        patterns = rules.get("regex", [])
+        # each alternative is a lookahead over the whole name, so the first rule in file order that
+        # matches anywhere wins (not the leftmost match)
+        self.regex = re.compile("|".join(f"(?=.*?(?P<r{i}>{p}))" for i, (p, _) in enumerate(patterns))) \
+            if patterns else None
+        self.regex_categories = {f"r{i}": c for i, (_, c) in enumerate(patterns)}
+        self.categories = sorted({self.default, *self.exact.values(), *self.prefix.values(),
+                                  *self.regex_categories.values()})
+
+    def lookup(self, merchant):
+        """Category for one raw merchant name."""
+        name = normalize_merchant(merchant)
+        hit = self.exact.get(name)
+        if hit is not None:
+            return hit
+        words = name.split()
+        for n in self.prefix_words:
+            if n <= len(words):
+                hit = self.prefix.get(" ".join(words[:n]))
+                if hit is not None:
+                    return hit
+        if self.regex is not None:
+            match = self.regex.match(name)
+            if match is not None:
+                return self.regex_categories[match.lastgroup]
+        return self.default
+
+    def categorize(self, merchants):
+        """Categorical of categories aligned with `merchants` (missing merchants get the default)."""
+        if isinstance(getattr(merchants, "dtype", None), pd.CategoricalDtype):
+            codes, uniques = merchants.cat.codes.to_numpy(), merchants.cat.categories
+        elif isinstance(merchants, pd.Series):
+            codes, uniques = pd.factorize(merchants)
+        else:
+            codes, uniques = pd.factorize(np.asarray(merchants, dtype=object))
+        position = {c: i for i, c in enumerate(self.categories)}
+        # one lookup per distinct merchant; the extra last slot maps missing (-1) to the default
+        mapped = np.array([position[self.lookup(u)] for u in uniques] + [position[self.default]], dtype=np.int32)
+        return pd.Categorical.from_codes(mapped[codes], categories=self.categories)
+
+
+@lru_cache(maxsize=4)
+def get_merchant_index(path=CATEGORY_RULES_PATH):
+    with open(path) as f:
+        return MerchantIndex(json.load(f))
+
+
+def categorize(merchants, index=None):
+    return (index or get_merchant_index()).categorize(merchants)
+
+
+def category_spend(transactions, client_col=None, index=None):
+    """Per client and category: spend (outflows), income (inflows), transaction count and the
+    category's share of the client's spend. Without `client_col` the frame is one client."""
+    columns = [c for c in (client_col, "category", "spend", "income", "transactions", "share") if c]
+    if transactions is None or "amount" not in transactions.columns or transactions.empty:
+        return pd.DataFrame(columns=columns)
+    merchants = transactions["merchant"] if "merchant" in transactions.columns else \
+        pd.Series(np.nan, index=transactions.index, dtype=object)
+    category = categorize(merchants, index)
+    amount = pd.to_numeric(transactions["amount"], errors="coerce").fillna(0.0).to_numpy()
+    frame = pd.DataFrame({"category": category, "spend": np.clip(-amount, 0, None),
+                          "income": np.clip(amount, 0, None), "transactions": 1})
+    keys = ["category"]
+    if client_col:
+        frame.insert(0, client_col, transactions[client_col].to_numpy())
+        keys = [client_col, "category"]
+    table = frame.groupby(keys, observed=True, sort=False).sum().reset_index()
+    # one grouped sum either way, so a client's shares do not depend on the other clients in the frame
+    owner = table[client_col] if client_col else np.zeros(len(table), dtype=np.intp)
+    totals = table["spend"].groupby(owner, sort=False).transform("sum")
+    table["share"] = (table["spend"] / totals).where(table["spend"] > 0, 0.0)
+    # stable, so tied categories keep the same order whether or not the frame holds other clients
+    return table.sort_values(keys[:-1] + ["spend"], ascending=[True] * (len(keys) - 1) + [False],
+                             kind="stable", ignore_index=True)[columns]
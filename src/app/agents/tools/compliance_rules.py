@@ -1,2 +1,315 @@
-def check_compliance():
-    return {"status": "ApprovalGranted", "disclosures": ["Standard client disclosure"]}
+"""
+Policy-as-code compliance engine over the rules in mocks/compliance_policies.yaml.
+
+The file holds named `params` (FBAR/FATCA thresholds, concentration caps, ...) and an ordered list
+of rules: a `when` expression over per-client features, a severity (redline, condition or
+disclosure) and a message template. `PolicySet` compiles every expression once, at load time, into
+a vectorized predicate over feature columns (params are folded in as constants), so a batch of
+clients is evaluated as one rules x clients boolean matrix and messages are formatted for the hits
+only. Any redline makes the decision ReworkNeeded.
+
+Expressions are Python syntax restricted to comparisons (chained, and `in` / `not in` a literal
+list), and/or/not, arithmetic and names; a name is a param or a feature of FEATURES. Anything else,
+an unknown name or a message placeholder that is neither raises PolicyError when the file is
+loaded, not when a client is evaluated. A missing feature (NaN, or "" for text) compares false,
+`!=` and `not in` included, so an unknown value never trips a threshold; the decision lists it
+under missing_fields instead. `not` is plain negation: `not filing_status == "single"` is true for
+a client without a filing status.
+"""
+import ast
+import operator
+import os
+import string
+from dataclasses import dataclass
+from functools import lru_cache, reduce
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+import yaml
+
+POLICIES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "mocks", "compliance_policies.yaml")
+SEVERITIES = ("redline", "condition", "disclosure")
+
+NAN = float("nan")
+# feature -> value for a client that does not supply it; the type of the default is the column type
+FEATURES = {
+    "filing_status": "",
+    "residency_country": "",
+    "kyc_status": "",
+    "citizenship": "",
+    "age": NAN,
+    "non_usd_currency": False,
+    "foreign_balance": NAN,
+    "has_cost_basis": False,
+    "cash": NAN,
+    "portfolio": NAN,
+    "net_worth": NAN,
+    "cash_share": NAN,
+    "max_position_weight": NAN,
+    "max_class_weight": NAN,
+    "holdings_count": 0.0,
+    "transactions_count": 0.0,
+    "monthly_expense": NAN,
+    "liquidity_runway_months": NAN,
+    "savings_rate": NAN,
+    "tax_income": NAN,
+}
+
+_COMPARE = {ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt, ast.LtE: operator.le,
+            ast.Gt: operator.gt, ast.GtE: operator.ge}
+_ARITHMETIC = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+
+
+class PolicyError(ValueError):
+    pass
+
+
+def _compile(node, params, used):
+    """Closure columns -> array (or scalar) for one expression node; features read go into `used`."""
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile(v, params, used) for v in node.values]
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        return lambda cols: reduce(combine, (p(cols) for p in parts))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.USub)):
+        operand = _compile(node.operand, params, used)
+        if isinstance(node.op, ast.Not):
+            return lambda cols: np.logical_not(operand(cols))
+        return lambda cols: -operand(cols)
+    if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+        op, left, right = _ARITHMETIC[type(node.op)], _compile(node.left, params, used), \
+            _compile(node.right, params, used)
+        return lambda cols: op(left(cols), right(cols))
+    if isinstance(node, ast.Compare):
+        terms = [node.left, *node.comparators]
+        tests = []
+        for op, left, right in zip(node.ops, terms, terms[1:]):
+            operands = set()
+            lhs = _compile(left, params, operands)
+            if isinstance(op, (ast.In, ast.NotIn)):
+                if not isinstance(right, (ast.List, ast.Tuple)) or \
+                        not all(isinstance(e, ast.Constant) for e in right.elts):
+                    raise PolicyError("`in` needs a literal list of constants")
+                values, negate = [e.value for e in right.elts], isinstance(op, ast.NotIn)
+
+                def member(cols, lhs=lhs, values=values, negate=negate):
+                    column = lhs(cols)
+                    hit = reduce(np.logical_or, (column == v for v in values), np.zeros(np.shape(column), bool))
+                    return ~hit if negate else hit
+                tests.append(member)
+            elif type(op) in _COMPARE:
+                rhs, compare = _compile(right, params, operands), _COMPARE[type(op)]
+                tests.append(lambda cols, lhs=lhs, rhs=rhs, compare=compare: compare(lhs(cols), rhs(cols)))
+            else:
+                raise PolicyError(f"unsupported comparison {type(op).__name__}")
+            used |= operands
+            if isinstance(op, (ast.NotEq, ast.NotIn)) and operands:
+                # the only comparisons a missing value (NaN, "") would pass: require every operand
+                def present(cols, test=tests.pop(), names=tuple(sorted(operands))):
+                    return reduce(np.logical_and, (~_missing(cols[f]) for f in names), test(cols))
+                tests.append(present)
+        return tests[0] if len(tests) == 1 else lambda cols: reduce(np.logical_and, (t(cols) for t in tests))
+    if isinstance(node, ast.Constant) and isinstance(node.value, (bool, int, float, str)):
+        value = node.value
+        return lambda cols: value
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name in params or name in ("true", "false"):
+            # YAML spells booleans in lowercase
+            value = params[name] if name in params else name == "true"
+            return lambda cols: value
+        if name in FEATURES:
+            used.add(name)
+            return lambda cols: cols[name]
+        raise PolicyError(f"unknown name {name!r} (not a param or a feature)")
+    raise PolicyError(f"unsupported expression {type(node).__name__}")
+
+
+@dataclass(frozen=True)
+class Rule:
+    id: str
+    severity: str
+    when: str
+    message: str
+    predicate: Callable[[Dict[str, np.ndarray]], Any]
+    features: Tuple[str, ...]
+    fields: Tuple[str, ...]
+
+    def messages(self, cols, params, clients):
+        """Message for each client index in `clients`, formatted from plain Python values."""
+        names = [f for f in self.fields if f in cols]
+        if not names:
+            return [self.message.format_map(params) if self.fields else self.message] * len(clients)
+        context, out = dict(params), []
+        for values in zip(*(cols[f][clients].tolist() for f in names)):
+            context.update(zip(names, values))
+            out.append(self.message.format_map(context))
+        return out
+
+
+def compile_rule(spec, params):
+    """Rule from one YAML entry; raises PolicyError for anything that would fail at evaluation."""
+    rule_id = spec.get("id") or "<unnamed>"
+    severity = spec.get("severity")
+    if severity not in SEVERITIES:
+        raise PolicyError(f"rule {rule_id}: severity {severity!r} is not one of {SEVERITIES}")
+    when, message = str(spec.get("when", True)), str(spec.get("message", rule_id))
+    used = set()
+    try:
+        predicate = _compile(ast.parse(when, mode="eval").body, params, used)
+    except SyntaxError as e:
+        raise PolicyError(f"rule {rule_id}: cannot parse {when!r}: {e.msg}") from None
+    except PolicyError as e:
+        raise PolicyError(f"rule {rule_id}: {e}") from None
+    fields = tuple(dict.fromkeys(f.split(".")[0].split("[")[0]
+                                 for _, f, _, _ in string.Formatter().parse(message) if f))
+    unknown = [f for f in fields if f not in params and f not in FEATURES]
+    if unknown:
+        raise PolicyError(f"rule {rule_id}: message refers to unknown {unknown}")
+    return Rule(id=rule_id, severity=severity, when=when, message=message, predicate=predicate,
+                features=tuple(sorted(used)), fields=fields)
+
+
+def _column(frame, name, n):
+    default = FEATURES[name]
+    if name not in frame.columns:
+        return np.full(n, default, dtype=object if isinstance(default, str) else None)
+    values = frame[name]
+    if isinstance(default, str):
+        return values.where(values.notna(), default).astype(str).to_numpy(dtype=object)
+    if isinstance(default, bool):
+        return values.where(values.notna(), default).astype(bool).to_numpy()
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _missing(column):
+    return column == "" if column.dtype == object else np.isnan(column) if column.dtype.kind == "f" \
+        else np.zeros(len(column), bool)
+
+
+class PolicySet:
+    """Compiled rules plus their params; `evaluate` decides a whole batch of clients at once."""
+
+    def __init__(self, policies):
+        self.version = policies.get("version")
+        self.params = dict(policies.get("params") or {})
+        clash = sorted(set(self.params) & set(FEATURES))
+        if clash:
+            raise PolicyError(f"params shadow features: {clash}")
+        self.rules = [compile_rule(spec, self.params) for spec in policies.get("rules") or []]
+        ids = [r.id for r in self.rules]
+        if len(set(ids)) != len(ids):
+            raise PolicyError(f"duplicate rule ids: {sorted({i for i in ids if ids.count(i) > 1})}")
+        self.features = sorted({f for r in self.rules for f in (*r.features, *r.fields) if f in FEATURES})
+
+    def matrix(self, features):
+        """(feature columns, rules x clients boolean matrix) for a DataFrame or list of feature dicts."""
+        frame = features if isinstance(features, pd.DataFrame) else pd.DataFrame(list(features))
+        n = len(frame)
+        cols = {name: _column(frame, name, n) for name in self.features}
+        hits = np.zeros((len(self.rules), n), dtype=bool)
+        for i, rule in enumerate(self.rules):
+            hits[i] = rule.predicate(cols)
+        return cols, hits
+
+    def evaluate(self, features):
+        """One ComplianceDecision dict per client (row of `features`), in order."""
+        cols, hits = self.matrix(features)
+        n = hits.shape[1]
+        # rule by rule (file order), so each client's lists come out in rule order
+        found = {severity: [[] for _ in range(n)] for severity in SEVERITIES}
+        for rule, row in zip(self.rules, hits):
+            clients = np.flatnonzero(row)
+            messages = rule.messages(cols, self.params, clients) if len(clients) else []
+            if rule.severity != "disclosure":
+                messages = [{"rule": rule.id, "message": m} for m in messages]
+            bucket = found[rule.severity]
+            for c, message in zip(clients.tolist(), messages):
+                bucket[c].append(message)
+        # missing features as one bitmask per client; the name lists are built per distinct mask
+        missing = np.array([_missing(cols[f]) for f in self.features], dtype=np.int64).reshape(len(self.features), n)
+        masks, pattern = np.unique((1 << np.arange(len(self.features), dtype=np.int64)) @ missing,
+                                   return_inverse=True)
+        names = [[f for j, f in enumerate(self.features) if mask >> j & 1] for mask in masks.tolist()]
+        lineage = {"source": "compliance_policies", "policy_version": self.version, "rules": len(self.rules)}
+        decisions = []
+        for redlines, conditions, disclosures, p in zip(found["redline"], found["condition"], found["disclosure"],
+                                                         pattern.tolist()):
+            decisions.append({
+                "status": "ReworkNeeded" if redlines else "ApprovalGranted",
+                "conditions": conditions,
+                "disclosures": disclosures,
+                "redlines": redlines,
+                "rationale": f"{len(redlines)} redline(s), {len(conditions)} condition(s) from "
+                             f"{len(self.rules)} policy rules" if redlines or conditions else "No violations",
+                "data_lineage": dict(lineage),
+                "missing_fields": list(names[p]),
+            })
+        return decisions
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+def features_from_input(client_input, plan=None, risk_report=None, kyc=None):
+    """Feature dict for a nested client input dict; cashflow features come from a PlanSet, the
+    asset-class weights from a RiskReport and the KYC status from a kyc record when given."""
+    profile = client_input.get("profile") or client_input.get("identity") or {}
+    tax_profile = client_input.get("tax_profile") or {}
+    base_currency = str(client_input.get("currency") or "USD").upper()
+    currencies, positions = {base_currency}, {}
+    cash = foreign_balance = 0.0
+    has_cost_basis = False
+    for account in client_input.get("accounts") or []:
+        currency = str(account.get("currency") or base_currency).upper()
+        currencies.add(currency)
+        balance = _number(account.get("balance", (account.get("balances") or {}).get("current")))
+        if not np.isnan(balance):
+            cash += balance
+            foreign_balance += max(balance, 0.0) if currency != "USD" else 0.0
+        for h in account.get("holdings") or []:
+            has_cost_basis |= any("cost" in k.lower() or "basis" in k.lower() for k in h)
+            value = _number(h.get("market_value"))
+            if np.isnan(value):
+                value = _number(h.get("quantity")) * _number(h.get("price"))
+            key = h.get("symbol") or h.get("asset_class") or "Unknown"
+            positions[key] = positions.get(key, 0.0) + (0.0 if np.isnan(value) else value)
+    portfolio = sum(positions.values())
+    baseline = (plan or {}).get("baseline_cashflow") or {}
+    exposures = (risk_report or {}).get("exposures") or {}
+    return {
+        "filing_status": tax_profile.get("filing_status"),
+        "residency_country": (profile.get("residency") or {}).get("country"),
+        "kyc_status": (kyc or {}).get("status"),
+        "citizenship": profile.get("citizenship"),
+        "age": profile.get("age"),
+        "non_usd_currency": currencies != {"USD"},
+        "foreign_balance": foreign_balance,
+        "has_cost_basis": has_cost_basis,
+        "cash": cash,
+        "portfolio": portfolio,
+        "net_worth": cash + portfolio,
+        "cash_share": cash / (cash + portfolio) if cash + portfolio else None,
+        "max_position_weight": max(positions.values()) / portfolio if portfolio > 0 else None,
+        "max_class_weight": max(exposures.values()) if exposures else None,
+        "holdings_count": sum(len(a.get("holdings") or []) for a in client_input.get("accounts") or []),
+        "monthly_expense": (baseline.get("expenses") or {}).get("monthly"),
+        "liquidity_runway_months": (plan or {}).get("liquidity_runway_months"),
+        "savings_rate": baseline.get("savings_rate"),
+        "tax_income": baseline.get("tax_income"),
+    }
+
+
+@lru_cache(maxsize=4)
+def get_policies(path=POLICIES_PATH):
+    with open(path) as f:
+        return PolicySet(yaml.safe_load(f))
+
+
+def check_compliance(features, policies=None):
+    """ComplianceDecision dict for one client's feature dict."""
+    return (policies or get_policies()).evaluate([features])[0]
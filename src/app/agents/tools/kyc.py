@@ -1,2 +1,157 @@
-def get_kyc_status():
-    return {"Alex Parker": "Verified"}
+"""
+KYC status lookup.
+
+Statuses are keyed by client id (profile__user_id in exports, identity.user_id in client input)
+in an indexed SQLite table that stands in for the KYC vendor; an empty store is seeded from
+mocks/kyc_status.json. `KYCStore.get_many(ids)` resolves a whole batch with one query (the ids
+travel as a single JSON parameter joined against the primary key, so the batch size is not bound
+by SQLite's parameter limit). KYCService sits in front with an in-process TTL cache: recently
+checked clients are answered from memory and only the rest go to the store, in one query. The
+cache holds at most KYC_CACHE_MAX_ENTRIES clients, evicting the least recently used. Clients the
+store does not know come back as "Unknown" (and are cached like any other answer).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app.config.settings import KYC_CACHE_MAX_ENTRIES, KYC_DB_PATH, KYC_TTL_SECONDS
+
+MOCK_KYC_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "mocks", "kyc_status.json")
+UNKNOWN = "Unknown"
+
+
+def load_seed(path=MOCK_KYC_PATH):
+    """{user_id: {"name", "status", "checked_at"}} from a seed file."""
+    with open(path) as f:
+        return json.load(f)["clients"]
+
+
+def _ids(user_ids):
+    # distinct ids as strings, in order; None / NaN are dropped
+    return list(dict.fromkeys(str(u) for u in user_ids if u is not None and u == u))
+
+
+class KYCStore:
+    """`kyc_status(user_id PRIMARY KEY, status, checked_at, name)` in SQLite."""
+
+    def __init__(self, path=None, seed_path=MOCK_KYC_PATH):
+        self.path = path or KYC_DB_PATH
+        if self.path != ":memory:" and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute("CREATE TABLE IF NOT EXISTS kyc_status (user_id TEXT PRIMARY KEY, status TEXT NOT NULL,"
+                           " checked_at TEXT, name TEXT) WITHOUT ROWID")
+        self.queries = 0
+        if seed_path and self._conn.execute("SELECT 1 FROM kyc_status LIMIT 1").fetchone() is None:
+            self.upsert(load_seed(seed_path))
+
+    def upsert(self, records):
+        """Writes {user_id: {"status", "checked_at", "name"}} in one transaction."""
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO kyc_status VALUES (?, ?, ?, ?)",
+                                   [(str(uid), r["status"], r.get("checked_at"), r.get("name"))
+                                    for uid, r in records.items()])
+
+    def get_many(self, user_ids):
+        """{user_id: {"status", "checked_at"}} for the ids the store knows, in one query."""
+        ids = _ids(user_ids)
+        if not ids:
+            return {}
+        with self._lock:
+            self.queries += 1
+            rows = self._conn.execute(
+                "SELECT k.user_id, k.status, k.checked_at FROM json_each(?) AS j"
+                " JOIN kyc_status AS k ON k.user_id = j.value", (json.dumps(ids),)
+            ).fetchall()
+        return {uid: {"status": status, "checked_at": checked_at} for uid, status, checked_at in rows}
+
+
+class KYCService:
+    """TTL-cached front for a KYCStore.
+
+    `get_many(ids)` returns {user_id: {"user_id", "status", "checked_at"}} for every distinct id;
+    only ids missing from the cache or older than `ttl_seconds` go to the store, in one batch. The
+    cache keeps the `max_entries` most recently used clients.
+    """
+
+    def __init__(self, store, ttl_seconds=None, max_entries=None):
+        self.store = store
+        self.ttl_seconds = KYC_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = KYC_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.store_calls = self.evictions = 0
+
+    def _cache_put(self, user_id, entry):
+        self._cache[user_id] = entry
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+
+    def get_many(self, user_ids):
+        wanted = _ids(user_ids)
+        now = time.monotonic()
+        found, stale = {}, []
+        with self._lock:
+            for u in wanted:
+                entry = self._cache.get(u)
+                if entry is None or now - entry[1] > self.ttl_seconds:
+                    stale.append(u)
+                else:
+                    self._cache.move_to_end(u)
+                    found[u] = entry[0]
+            self.hits += len(found)
+            self.misses += len(stale)
+        if stale:
+            fetched = self.store.get_many(stale)
+            with self._lock:
+                self.store_calls += 1
+                for u in stale:
+                    found[u] = fetched.get(u, {"status": UNKNOWN, "checked_at": None})
+                    self._cache_put(u, (found[u], now))
+        return {u: {"user_id": u, **found[u]} for u in wanted}
+
+    def get(self, user_id):
+        """One client's record, or None without an id."""
+        return next(iter(self.get_many([user_id]).values()), None)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses,
+                    "store_calls": self.store_calls, "evictions": self.evictions}
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_kyc_service():
+    """Process-wide service so every caller shares one cache."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = KYCService(KYCStore())
+        return _service
+
+
+def get_kyc_status(user_ids):
+    """{user_id: status} for a batch of client ids."""
+    return {u: r["status"] for u, r in get_kyc_service().get_many(user_ids).items()}
+
+
+def client_user_id(client_input):
+    """The client id of a nested client input dict (identity.user_id or profile.user_id)."""
+    for key in ("identity", "profile"):
+        user_id = (client_input.get(key) or {}).get("user_id")
+        if user_id is not None:
+            return str(user_id)
+    return None
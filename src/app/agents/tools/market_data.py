@@ -1,2 +1,206 @@
-def get_market_prices():
-    return {"VTI": 234.56, "AAPL": 189.12}
+"""
+Market-data price service.
+
+A PriceProvider answers batched multi-symbol lookups; the bundled file and SQLite providers stand
+in for a vendor feed. PriceService sits in front of a provider with an in-process TTL cache, so a
+batch run fetches each distinct symbol once and every client is valued against the same snapshot.
+The cache holds at most MARKET_DATA_CACHE_MAX_ENTRIES symbols, evicting the least recently used.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from app.config.settings import (MARKET_DATA_CACHE_MAX_ENTRIES, MARKET_DATA_PATH, MARKET_DATA_PROVIDER,
+                                 MARKET_DATA_TTL_SECONDS)
+
+MOCK_PRICES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "mocks", "market_prices.json")
+# stay well under SQLite's bound-parameter limit
+SQLITE_BATCH = 500
+
+
+class PriceProvider:
+    """Batched quote source: fetch(symbols) -> {symbol: (price, as_of)} for the symbols it knows."""
+
+    name = "base"
+
+    def fetch(self, symbols):
+        raise NotImplementedError
+
+
+class FilePriceProvider(PriceProvider):
+    """Prices from a JSON file: {"as_of": ..., "prices": {symbol: price | {"price", "as_of"}}}."""
+
+    name = "file"
+
+    def __init__(self, path=None):
+        self.path = path or MOCK_PRICES_PATH
+
+    def _load(self):
+        with open(self.path) as f:
+            data = json.load(f)
+        if isinstance(data.get("prices"), dict):
+            return data["prices"], data.get("as_of")
+        return data, None
+
+    def symbols(self):
+        return list(self._load()[0])
+
+    def fetch(self, symbols):
+        prices, default_as_of = self._load()
+        quotes = {}
+        for symbol in symbols:
+            quote = prices.get(symbol)
+            if isinstance(quote, dict):
+                quotes[symbol] = (float(quote["price"]), quote.get("as_of", default_as_of))
+            elif quote is not None:
+                quotes[symbol] = (float(quote), default_as_of)
+        return quotes
+
+
+class SQLitePriceProvider(PriceProvider):
+    """Prices from a `prices(symbol, price, as_of)` table, looked up with batched IN queries."""
+
+    name = "sqlite"
+
+    def __init__(self, path):
+        self.path = path
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute("CREATE TABLE IF NOT EXISTS prices (symbol TEXT PRIMARY KEY, price REAL, as_of TEXT)")
+
+    def upsert(self, quotes):
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO prices VALUES (?, ?, ?)",
+                                   [(s, float(p), a) for s, (p, a) in quotes.items()])
+
+    def fetch(self, symbols):
+        symbols = list(symbols)
+        quotes = {}
+        with self._lock:
+            for start in range(0, len(symbols), SQLITE_BATCH):
+                batch = symbols[start:start + SQLITE_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT symbol, price, as_of FROM prices WHERE symbol IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                quotes.update((s, (p, a)) for s, p, a in rows)
+        return quotes
+
+
+class PriceService:
+    """TTL-cached, de-duplicating front for a PriceProvider.
+
+    `snapshot(symbols)` returns one (symbol, price, as_of) row per distinct known symbol; only
+    symbols missing from the cache or older than `ttl_seconds` go to the provider, in one batch.
+    Unknown symbols are cached too, so they are not re-requested until their entry expires. The
+    cache keeps the `max_entries` most recently used symbols.
+    """
+
+    def __init__(self, provider, ttl_seconds=None, max_entries=None):
+        self.provider = provider
+        self.ttl_seconds = MARKET_DATA_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = MARKET_DATA_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.provider_calls = self.evictions = 0
+
+    def _cache_put(self, symbol, entry):
+        self._cache[symbol] = entry
+        self._cache.move_to_end(symbol)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+
+    def snapshot(self, symbols):
+        wanted = pd.unique(pd.Series(list(symbols), dtype=object).dropna().astype(str))
+        now = time.monotonic()
+        quotes, stale = {}, []
+        with self._lock:
+            for s in wanted:
+                entry = self._cache.get(s)
+                if entry is None or now - entry[2] > self.ttl_seconds:
+                    stale.append(s)
+                else:
+                    self._cache.move_to_end(s)
+                    quotes[s] = entry[:2]
+            self.hits += len(quotes)
+            self.misses += len(stale)
+        if stale:
+            fetched = self.provider.fetch(stale)
+            with self._lock:
+                self.provider_calls += 1
+                for s in stale:
+                    quotes[s] = fetched.get(s, (None, None))
+                    self._cache_put(s, (*quotes[s], now))
+        rows = [(s, *quotes[s]) for s in wanted if quotes[s][0] is not None]
+        return pd.DataFrame(rows, columns=["symbol", "price", "as_of"]).astype({"price": float})
+
+    def stats(self):
+        with self._lock:
+            return {"provider": self.provider.name, "entries": len(self._cache), "hits": self.hits,
+                    "misses": self.misses, "provider_calls": self.provider_calls, "evictions": self.evictions}
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+def revalue(holdings, snapshot):
+    """Holdings re-priced against a snapshot in one vectorized join.
+
+    Rows whose symbol is in the snapshot and that carry a quantity get price, price_as_of and
+    market_value = quantity * price; every other row keeps its exported values. `price_source`
+    records which rows were re-priced.
+    """
+    if holdings.empty or "symbol" not in holdings.columns or "quantity" not in holdings.columns or snapshot.empty:
+        return holdings.assign(price_source="export")
+    pos = pd.Index(snapshot["symbol"]).get_indexer(holdings["symbol"].astype(object))
+    quantity = holdings["quantity"].to_numpy(dtype=float)
+    live = (pos >= 0) & ~np.isnan(quantity)
+    new_price = np.where(live, snapshot["price"].to_numpy()[pos], np.nan)
+    old_price = holdings["price"].to_numpy(dtype=float) if "price" in holdings.columns else np.full(len(holdings), np.nan)
+    old_value = holdings["market_value"].to_numpy(dtype=float) if "market_value" in holdings.columns \
+        else quantity * old_price
+    as_of = pd.Series(np.where(live, snapshot["as_of"].to_numpy(dtype=object)[pos], None), index=holdings.index)
+    return holdings.assign(
+        price=np.where(live, new_price, old_price),
+        market_value=np.where(live, quantity * new_price, old_value),
+        price_as_of=as_of,
+        price_source=np.where(live, "live", "export"),
+    )
+
+
+def make_provider(kind=None, path=None):
+    kind = kind or MARKET_DATA_PROVIDER
+    path = path or MARKET_DATA_PATH or None
+    if kind == "sqlite":
+        return SQLitePriceProvider(path or os.path.join(".cache", "market_prices.sqlite"))
+    return FilePriceProvider(path)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_price_service():
+    """Process-wide service so every caller shares one cache."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = PriceService(make_provider())
+        return _service
+
+
+def get_market_prices(symbols=None):
+    """{symbol: price}; all symbols in the bundled mock file when none are given."""
+    if symbols is None:
+        symbols = FilePriceProvider().symbols()
+    snap = get_price_service().snapshot(symbols)
+    return dict(zip(snap["symbol"], snap["price"]))
@@ -0,0 +1,211 @@
+"""
+Stress-test and concentration engine over a holdings book.
+
+Holdings are pivoted into a (clients x positions) weight matrix and the stress library into a
+(positions x scenarios) shock matrix, so every client under every scenario is one matrix
+product. A position's shock is its symbol's override if the scenario has one, else the shock of
+its most specific asset class ("Equity/US" -> "equity/us", then "equity"), else zero.
+"""
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+STRESS_SCENARIOS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "mocks", "stress_scenarios.json")
+SYMBOL_LIMIT = 0.10
+CLASS_LIMIT = 0.25
+LIQUIDITY_TIERS = {"cash": "0-3mo", "money market": "0-3mo", "fixed income": "3-12mo", "bond": "3-12mo"}
+
+
+@lru_cache(maxsize=4)
+def load_stress_scenarios(path=STRESS_SCENARIOS_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def class_keys(asset_class):
+    """Lookup keys for an asset class label, most specific first."""
+    parts = str(asset_class).strip().lower().split("/")
+    return ["/".join(parts[:i]) for i in range(len(parts), 0, -1)]
+
+
+def _class_shock(shocks, asset_class):
+    for key in class_keys(asset_class):
+        if key in shocks:
+            return shocks[key]
+    return 0.0
+
+
+def holdings_from_input(client_input):
+    """Holdings table (symbol, asset_class, quantity, price, market_value) from a nested client input dict."""
+    rows = []
+    for account in client_input.get("accounts") or []:
+        for h in account.get("holdings") or []:
+            value = h.get("market_value")
+            if value is None and h.get("quantity") is not None and h.get("price") is not None:
+                value = float(h["quantity"]) * float(h["price"])
+            rows.append({"symbol": h.get("symbol"), "asset_class": h.get("asset_class") or "Unknown",
+                         "quantity": h.get("quantity"), "price": h.get("price"), "market_value": value})
+    columns = ["symbol", "asset_class", "quantity", "price", "market_value"]
+    return pd.DataFrame(rows, columns=columns).astype({"quantity": float, "price": float, "market_value": float})
+
+
+def _position_codes(holdings, client_col=None):
+    # (client codes, client labels, position codes, position labels, asset class) per holdings row
+    asset_class = holdings["asset_class"].astype(object).fillna("Unknown") if "asset_class" in holdings \
+        else pd.Series("Unknown", index=holdings.index, dtype=object)
+    symbol = holdings["symbol"].astype(object) if "symbol" in holdings else pd.Series(None, index=holdings.index, dtype=object)
+    key = symbol.where(symbol.notna(), asset_class).astype(str)
+    pos_codes, pos_labels = pd.factorize(key)
+    if client_col is None:
+        client_codes, clients = np.zeros(len(holdings), dtype=np.intp), pd.Index([None])
+    else:
+        client_codes, clients = pd.factorize(holdings[client_col].astype(object))
+    return client_codes, clients, pos_codes, pos_labels, asset_class
+
+
+def position_matrix(holdings, client_col=None):
+    """(client labels, position table, clients x positions market-value matrix).
+
+    A position is a symbol, or the asset class itself for rows without one (e.g. cash sweeps). Its
+    asset class is the one on its first row.
+    """
+    client_codes, clients, pos_codes, pos_labels, asset_class = _position_codes(holdings, client_col)
+    values = np.zeros((len(clients), len(pos_labels)))
+    np.add.at(values, (client_codes, pos_codes), np.nan_to_num(holdings["market_value"].to_numpy(dtype=float)))
+    first = pd.Series(np.arange(len(pos_codes))).groupby(pos_codes).first().to_numpy()
+    positions = pd.DataFrame({"position": pos_labels, "asset_class": asset_class.to_numpy()[first]})
+    return pd.Index(clients), positions, values
+
+
+def shock_matrix(positions, scenarios):
+    """(positions x scenarios) shocks for a position table from position_matrix."""
+    classes, class_codes = np.unique(positions["asset_class"].astype(str), return_inverse=True)
+    by_class = np.array([[_class_shock(spec.get("asset_class", {}), c) for spec in scenarios.values()]
+                         for c in classes]).reshape(len(classes), len(scenarios))
+    shocks = by_class[class_codes]
+    index = pd.Index(positions["position"])
+    for j, spec in enumerate(scenarios.values()):
+        overrides = spec.get("symbol", {})
+        if overrides:
+            rows = index.get_indexer(list(overrides))
+            hit = rows >= 0
+            shocks[rows[hit], j] = np.array(list(overrides.values()))[hit]
+    return shocks
+
+
+def _weights(values):
+    totals = values.sum(axis=1, keepdims=True)
+    return np.divide(values, totals, out=np.zeros_like(values), where=totals > 0), totals[:, 0]
+
+
+def stress_test(holdings, scenarios=None, client_col=None, matrix=None):
+    """Portfolio return (clients x scenarios) for each stress scenario.
+
+    `matrix` is position_matrix(holdings, client_col) when the caller already has it (likewise for
+    exposures and concentrations).
+    """
+    scenarios = load_stress_scenarios() if scenarios is None else scenarios
+    clients, positions, values = matrix or position_matrix(holdings, client_col)
+    weights, _ = _weights(values)
+    return pd.DataFrame(weights @ shock_matrix(positions, scenarios), index=clients, columns=list(scenarios))
+
+
+def exposures(holdings, client_col=None, matrix=None):
+    """Asset-class weights (clients x classes)."""
+    clients, positions, values = matrix or position_matrix(holdings, client_col)
+    weights, _ = _weights(values)
+    codes, classes = pd.factorize(positions["asset_class"].astype(str))
+    by_class = np.zeros((len(clients), len(classes)))
+    np.add.at(by_class.T, codes, weights.T)
+    return pd.DataFrame(by_class, index=clients, columns=classes)
+
+
+def concentrations(holdings, client_col=None, symbol_limit=SYMBOL_LIMIT, class_limit=CLASS_LIMIT, matrix=None):
+    """Long table of (client, kind, name, weight, limit, excess) for every breached limit."""
+    matrix = matrix or position_matrix(holdings, client_col)
+    clients, positions, values = matrix
+    weights, _ = _weights(values)
+    by_class = exposures(holdings, client_col, matrix=matrix)
+    is_symbol = (positions["position"] != positions["asset_class"].astype(str)).to_numpy()
+    frames = []
+    for kind, matrix, names, limit in (("symbol", weights[:, is_symbol], positions["position"][is_symbol], symbol_limit),
+                                       ("asset_class", by_class.to_numpy(), by_class.columns, class_limit)):
+        rows, cols = np.nonzero(matrix > limit)
+        frames.append(pd.DataFrame({
+            "client": clients[rows], "kind": kind, "name": np.asarray(names)[cols],
+            "weight": matrix[rows, cols], "limit": limit, "excess": matrix[rows, cols] - limit,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def liquidity_tiers(class_weights):
+    """Bucket one client's asset-class weights into liquidity tiers."""
+    tiers = {"0-3mo": 0.0, "3-12mo": 0.0, "12mo+": 0.0}
+    for asset_class, weight in class_weights.items():
+        tier = next((LIQUIDITY_TIERS[k] for k in class_keys(asset_class) if k in LIQUIDITY_TIERS), "12mo+")
+        tiers[tier] += float(weight)
+    return tiers
+
+
+def risk_report_fields(holdings, scenarios=None, symbol_limit=SYMBOL_LIMIT, class_limit=CLASS_LIMIT):
+    """RiskReport fields (exposures, concentrations, stress_results, liquidity_tiers, mitigations) for one client."""
+    return risk_report_fields_many(holdings, None, scenarios, symbol_limit, class_limit).get(None) or empty_report_fields()
+
+
+def empty_report_fields():
+    """RiskReport fields of a client with nothing to analyze."""
+    return {"exposures": {}, "concentrations": {}, "stress_results": [], "liquidity_tiers": {}, "mitigations": []}
+
+
+def risk_report_fields_many(holdings, client_col, scenarios=None, symbol_limit=SYMBOL_LIMIT, class_limit=CLASS_LIMIT):
+    """{client: risk_report_fields} for a book, from one position matrix and one stress product.
+
+    Each client's fields list its own positions and classes in the order they first appear in its
+    rows, as a one-client call would. Clients without a non-zero market value are left out.
+    """
+    if holdings.empty:
+        return {}
+    matrix = position_matrix(holdings, client_col)
+    clients, positions, values = matrix
+    stress = stress_test(holdings, scenarios, client_col, matrix=matrix)
+    class_weights = exposures(holdings, client_col, matrix=matrix)
+    breaches = concentrations(holdings, client_col, symbol_limit, class_limit, matrix=matrix)
+    breach_rows = {}
+    for row in zip(clients.get_indexer(breaches["client"]), breaches["kind"], breaches["name"].astype(str),
+                   breaches["weight"].tolist(), breaches["excess"].tolist()):
+        breach_rows.setdefault(row[0], []).append(row[1:])
+    # each client's positions in the order they first appear in its rows
+    client_codes, _, pos_codes, _, _ = _position_codes(holdings, client_col)
+    held = {}
+    for i, p in dict.fromkeys(zip(client_codes.tolist(), pos_codes.tolist())):
+        held.setdefault(i, []).append(p)
+    position_names = positions["position"].astype(str).tolist()
+    position_class = positions["asset_class"].astype(str).tolist()
+    class_index = {c: j for j, c in enumerate(class_weights.columns)}
+    scenario_names, stress, class_weights = list(stress.columns), stress.to_numpy(), class_weights.to_numpy()
+    totals = values.sum(axis=1)
+    out = {}
+    for i, client in enumerate(clients):
+        if not values[i].any():
+            continue
+        own = held[i]
+        classes = list(dict.fromkeys(position_class[p] for p in own))
+        weights = {c: float(class_weights[i, class_index[c]]) for c in classes}
+        rows = breach_rows.get(i, [])
+        if len(rows) > 1:
+            rank = {("symbol", position_names[p]): n for n, p in enumerate(own)}
+            rank.update({("asset_class", c): len(own) + n for n, c in enumerate(classes)})
+            rows.sort(key=lambda r: rank[r[:2]])
+        out[client] = {
+            "exposures": weights,
+            "concentrations": {name: float(weight) for kind, name, weight, _ in rows if kind == "symbol"},
+            "stress_results": [{"scenario": name, "pnl_pct": float(pct), "pnl": float(pct * totals[i])}
+                               for name, pct in zip(scenario_names, stress[i])],
+            "liquidity_tiers": liquidity_tiers(weights),
+            "mitigations": [{"action": "Trim", "symbol" if kind == "symbol" else "asset_class": name,
+                             "reduce_weight_by": round(float(excess), 4)} for kind, name, _, excess in rows],
+        }
+    return out
@@ -1,2 +1,161 @@
-def get_scenarios():
-    return [{"scenario_name": "base", "success_probability": 0.82}]
+"""
+Monte Carlo goal-funding simulator.
+
+Wealth is simulated in real (today's) dollars: W[t] = W[t-1] * (1 + r[t]) + savings. With the
+growth index G[t] = prod(1 + r[1..t]) that recursion is W[t] = G[t] * (W0 + savings * sum(1 / G[1..t])),
+so a whole (paths x years) block is two cumulative ops instead of a Python loop over years. Each
+goal is tested against the pooled portfolio at its own horizon.
+"""
+import hashlib
+from datetime import date
+
+import numpy as np
+
+DEFAULT_REAL_RETURN = 0.04
+DEFAULT_INFLATION = 0.025
+DEFAULT_VOLATILITY = 0.12
+PERCENTILES = (10, 25, 50, 75, 90)
+# cap on simulated cells (paths x years) held at once; ~40 MB of float64
+MAX_CELLS = 5_000_000
+
+
+def _field(record, *path):
+    """Nested ({"assumptions": {"inflation": ..}}) or flattened ("assumptions__inflation") lookup."""
+    flat = record.get("__".join(path))
+    if flat is not None:
+        return flat
+    value = record
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _num(value, default=None):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return default
+    return default if np.isnan(value) else value
+
+
+def _years_to(goal, as_of, current_age):
+    target_age = _num(_field(goal, "target_age"))
+    if target_age is not None and current_age is not None:
+        return max(1, int(round(target_age - current_age)))
+    target_year = _num(_field(goal, "target_year"))
+    if target_year is not None:
+        return max(1, int(target_year) - as_of.year)
+    target_date = _field(goal, "target_date")
+    if target_date:
+        try:
+            return max(1, int(round((date.fromisoformat(str(target_date)[:10]) - as_of).days / 365.25)))
+        except ValueError:
+            pass
+    return None
+
+
+def goals_from_input(client_input):
+    """Goal specs ({name, target_amount, years, real_return, inflation}) from a client input dict."""
+    as_of = client_input.get("as_of")
+    try:
+        as_of = date.fromisoformat(str(as_of)[:10])
+    except (TypeError, ValueError):
+        as_of = date.today()
+    # the client schema keeps age under identity; flattened exports under profile
+    current_age = _num((client_input.get("profile") or {}).get("age"))
+    if current_age is None:
+        current_age = _num((client_input.get("identity") or {}).get("age"))
+    goals = []
+    for i, goal in enumerate(client_input.get("goals") or []):
+        target = _num(_field(goal, "target_amount"))
+        years = _years_to(goal, as_of, current_age)
+        if not target or years is None:
+            continue
+        goals.append({
+            "name": goal.get("name") or goal.get("goal_id") or f"goal_{i + 1}",
+            "target_amount": target,
+            "years": years,
+            "real_return": _num(_field(goal, "assumptions", "real_return"), DEFAULT_REAL_RETURN),
+            "inflation": _num(_field(goal, "assumptions", "inflation"), DEFAULT_INFLATION),
+        })
+    return goals
+
+
+def starting_balance(client_input):
+    """Sum of account balances, falling back to holdings market value for accounts without one."""
+    total = 0.0
+    for account in client_input.get("accounts") or []:
+        balance = _num(_field(account, "balance"), _num(_field(account, "balances", "current")))
+        if balance is None:
+            balance = sum(_num(h.get("market_value"), 0.0) for h in account.get("holdings") or [])
+        total += balance
+    return total
+
+
+def simulate_paths(initial, annual_savings, years, real_return, volatility, n_paths, rng, antithetic=False):
+    """Real wealth at the end of each year, shape (n_paths, years)."""
+    if antithetic:
+        half = rng.standard_normal(((n_paths + 1) // 2, years))
+        z = np.concatenate((half, -half))[:n_paths]
+    else:
+        z = rng.standard_normal((n_paths, years))
+    # a year can lose at most 99%, which keeps the growth index strictly positive
+    growth = np.maximum(1.0 + real_return + volatility * z, 0.01)
+    np.cumprod(growth, axis=1, out=growth)
+    return growth * (initial + annual_savings * np.cumsum(1.0 / growth, axis=1))
+
+
+def simulate_goals(goals, initial, annual_savings, n_paths=100_000, volatility=DEFAULT_VOLATILITY, seed=None,
+                   antithetic=True, max_cells=MAX_CELLS):
+    """Success probability and wealth percentile band at each goal's horizon.
+
+    Goals sharing a real-return assumption share one simulation out to the longest of their
+    horizons. Paths are generated in chunks of at most `max_cells` (paths x years) so very long
+    horizons stay memory-bounded; only the horizon columns are kept between chunks.
+    """
+    rng = np.random.default_rng(seed)
+    results = [None] * len(goals)
+    by_return = {}
+    for i, goal in enumerate(goals):
+        by_return.setdefault(goal["real_return"], []).append((i, goal))
+    for real_return, indexed in by_return.items():
+        group = [g for _, g in indexed]
+        horizon = max(g["years"] for g in group)
+        cols = np.array([g["years"] - 1 for g in group])
+        chunk = max(2, min(n_paths, max_cells // horizon)) // 2 * 2
+        at_horizon = np.empty((n_paths, len(group)))
+        for start in range(0, n_paths, chunk):
+            size = min(chunk, n_paths - start)
+            paths = simulate_paths(initial, annual_savings, horizon, real_return, volatility, size, rng, antithetic)
+            at_horizon[start:start + size] = paths[:, cols]
+        targets = np.array([g["target_amount"] for g in group])
+        success = (at_horizon >= targets).mean(axis=0)
+        bands = np.percentile(at_horizon, PERCENTILES, axis=0)
+        for j, (i, goal) in enumerate(indexed):
+            results[i] = {
+                "goal": goal["name"],
+                "years": goal["years"],
+                "target_amount": goal["target_amount"],
+                "target_amount_nominal": goal["target_amount"] * (1 + goal["inflation"]) ** goal["years"],
+                "success_probability": float(success[j]),
+                "percentiles": {f"p{p}": float(bands[k, j]) for k, p in enumerate(PERCENTILES)},
+                "median_shortfall": float(max(0.0, goal["target_amount"] - bands[PERCENTILES.index(50), j])),
+            }
+    return results
+
+
+def get_scenarios(client_input=None, annual_savings=0.0, n_paths=100_000, seed=None, **kwargs):
+    """PlanSet scenario rows, one per goal, from a Monte Carlo run over the client's goals.
+
+    `seed` may be a string (e.g. the case id) so re-running a case reproduces its probabilities.
+    """
+    client_input = client_input or {}
+    if isinstance(seed, str):
+        seed = int(hashlib.sha256(seed.encode("utf-8")).hexdigest()[:16], 16)
+    goals = goals_from_input(client_input)
+    if not goals:
+        return []
+    results = simulate_goals(goals, starting_balance(client_input), annual_savings, n_paths=n_paths, seed=seed, **kwargs)
+    return [{"scenario_name": r["goal"], **r} for r in results]
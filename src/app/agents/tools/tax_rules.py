@@ -1,2 +1,132 @@
-def get_tax_brackets():
-    return {"CA": {"MFJ": [0.1, 0.12, 0.22, 0.24]}}
+"""
+Progressive tax engine over the bracket tables in mocks/tax_brackets.json.
+
+Tables are keyed by jurisdiction -> year -> filing status. A year without its own table uses the
+latest earlier one (state tables are published later than federal); a state without a table uses
+the flat "default" schedule. All functions take NumPy arrays of incomes, so a whole book or a grid
+of what-if incomes is priced in one call.
+"""
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+
+TAX_TABLES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "mocks", "tax_brackets.json")
+
+FILING_STATUS_ALIASES = {
+    "mfj": "married_filing_jointly",
+    "married": "married_filing_jointly",
+    "married_filing_jointly": "married_filing_jointly",
+    "mfs": "married_filing_separately",
+    "married_filing_separately": "married_filing_separately",
+    "hoh": "head_of_household",
+    "head_of_household": "head_of_household",
+    "single": "single",
+}
+
+
+class BracketSchedule:
+    """Lower bounds, marginal rates and the tax accrued below each bound (cumulative base)."""
+
+    def __init__(self, brackets, standard_deduction=0.0):
+        self.thresholds = np.array([b[0] for b in brackets], dtype=np.float64)
+        self.rates = np.array([b[1] for b in brackets], dtype=np.float64)
+        widths = np.diff(self.thresholds)
+        self.bases = np.concatenate(([0.0], np.cumsum(widths * self.rates[:-1])))
+        self.standard_deduction = float(standard_deduction)
+
+    def tax(self, taxable):
+        taxable = np.maximum(np.asarray(taxable, dtype=np.float64), 0.0)
+        idx = np.searchsorted(self.thresholds, taxable, side="right") - 1
+        return self.bases[idx] + (taxable - self.thresholds[idx]) * self.rates[idx]
+
+    def marginal_rate(self, taxable):
+        taxable = np.maximum(np.asarray(taxable, dtype=np.float64), 0.0)
+        return self.rates[np.searchsorted(self.thresholds, taxable, side="right") - 1]
+
+
+@lru_cache(maxsize=4)
+def load_tax_tables(path=TAX_TABLES_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def normalize_filing_status(status):
+    key = str(status or "").strip().lower()
+    return FILING_STATUS_ALIASES.get(key, "married_filing_jointly" if not key else key)
+
+
+def _pick_year(by_year, year):
+    years = sorted(int(y) for y in by_year)
+    if year is None:
+        return str(years[-1])
+    earlier = [y for y in years if y <= int(year)]
+    return str(earlier[-1] if earlier else years[0])
+
+
+def get_tax_brackets(jurisdiction="federal", year=None, filing_status="married_filing_jointly", path=TAX_TABLES_PATH):
+    """Raw table ({"standard_deduction", "brackets"}) for federal, ltcg or a state code."""
+    tables = load_tax_tables(path)
+    if jurisdiction in ("federal", "ltcg"):
+        by_year = tables[jurisdiction]
+    else:
+        by_year = tables["state"].get(str(jurisdiction or "").upper()) or tables["state"]["default"]
+    by_status = by_year[_pick_year(by_year, year)]
+    status = normalize_filing_status(filing_status)
+    # states without a separate MFS/HoH table tax those filers on the single schedule
+    return by_status.get(status) or by_status.get("single") or next(iter(by_status.values()))
+
+
+@lru_cache(maxsize=256)
+def get_schedule(jurisdiction="federal", year=None, filing_status="married_filing_jointly", path=TAX_TABLES_PATH):
+    table = get_tax_brackets(jurisdiction, year, filing_status, path)
+    return BracketSchedule(table["brackets"], table.get("standard_deduction", 0.0))
+
+
+def _tax_group(income, gains, status, state, year):
+    fed = get_schedule("federal", year, status)
+    ltcg = get_schedule("ltcg", year, status)
+    st = get_schedule(state, year, status)
+    taxable = np.maximum(income - fed.standard_deduction, 0.0)
+    # gains stack on top of ordinary income: tax the slice [taxable, taxable + gains]
+    ltcg_tax = ltcg.tax(taxable + gains) - ltcg.tax(taxable)
+    state_taxable = np.maximum(income + gains - st.standard_deduction, 0.0)
+    return {
+        "taxable_income": taxable,
+        "standard_deduction": np.full(income.shape, fed.standard_deduction),
+        "federal_tax": fed.tax(taxable),
+        "marginal_rate": fed.marginal_rate(taxable),
+        "ltcg_tax": ltcg_tax,
+        "state_taxable_income": state_taxable,
+        "state_tax": st.tax(state_taxable),
+    }
+
+
+def compute_tax(incomes, filing_status="married_filing_jointly", state=None, year=None, ltcg=0.0):
+    """Federal, LTCG and state tax for an array of gross incomes.
+
+    `filing_status` and `state` may be scalars or arrays aligned with `incomes`; each distinct
+    (status, state) pair is evaluated as one vectorized slice. Returns a dict of float64 arrays.
+    """
+    incomes = np.atleast_1d(np.asarray(incomes, dtype=np.float64))
+    incomes = np.nan_to_num(incomes, nan=0.0)
+    gains = np.broadcast_to(np.nan_to_num(np.asarray(ltcg, dtype=np.float64), nan=0.0), incomes.shape)
+    if np.ndim(filing_status) == 0 and np.ndim(state) == 0:
+        out = _tax_group(incomes, gains, normalize_filing_status(filing_status), state, year)
+    else:
+        statuses = np.broadcast_to(np.asarray(filing_status, dtype=object), incomes.shape)
+        states = np.broadcast_to(np.asarray(state, dtype=object), incomes.shape)
+        keys = np.array([f"{normalize_filing_status(s)}|{str(t or '').upper()}" for s, t in zip(statuses, states)])
+        uniq, inverse = np.unique(keys, return_inverse=True)
+        out = {}
+        for i, key in enumerate(uniq):
+            status, st = key.split("|")
+            mask = inverse == i
+            part = _tax_group(incomes[mask], gains[mask], status, st or None, year)
+            for name, values in part.items():
+                out.setdefault(name, np.empty(incomes.shape))[mask] = values
+    total = out["federal_tax"] + out["ltcg_tax"] + out["state_tax"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["effective_rate"] = np.where(incomes + gains > 0, total / (incomes + gains), 0.0)
+    return out
@@ -1 +1,15 @@
 # Optional pydantic Request/Response models for API
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    case_id: str
+    status: str
+    submitted_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    metrics: Optional[dict] = None  # queue/run seconds and per-agent timings, once finished
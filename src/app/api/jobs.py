@@ -0,0 +1,131 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from app.agents.runner import run_flow
+from app.config import settings
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobQueue:
+    """Bounded worker pool for case runs.
+
+    submit() returns at once with a job id; run_flow (which blocks on the LLM call) executes on
+    one of `workers` threads, so the event loop is never held by a run. At most `max_pending`
+    jobs may be queued or running; finished jobs are kept for lookup up to `history_max`.
+    """
+
+    def __init__(self, runner=None, workers=None, max_pending=None, history_max=None):
+        self._runner = runner or run_flow
+        self._workers = workers or settings.JOB_WORKERS
+        self._max_pending = max_pending or settings.JOB_QUEUE_MAX
+        self._history_max = history_max or settings.JOB_HISTORY_MAX
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="case-job")
+        self._jobs = OrderedDict()
+        self._pending = 0
+        self.completed = {}
+        self._lock = threading.Lock()
+
+    def submit(self, case_id, client_input):
+        with self._lock:
+            if self._pending >= self._max_pending:
+                raise QueueFull(f"{self._pending} jobs already queued or running")
+            self._pending += 1
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "case_id": case_id,
+                "status": "queued",
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "error": None,
+                "metrics": None,
+                "result": None,
+            }
+            self._trim()
+        self._executor.submit(self._run, job_id, case_id, client_input)
+        return self.status(job_id)
+
+    def _run(self, job_id, case_id, client_input):
+        job = self._jobs[job_id]
+        job["status"] = "running"
+        job["started_at"] = time.time()
+        try:
+            job["result"] = self._runner(case_id, client_input)
+            job["status"] = "succeeded"
+        except Exception as e:
+            job["error"] = f"{type(e).__name__}: {e}"
+            job["status"] = "failed"
+        finally:
+            job["finished_at"] = time.time()
+            job["metrics"] = self._metrics(job)
+            with self._lock:
+                self._pending -= 1
+                self.completed[job["status"]] = self.completed.get(job["status"], 0) + 1
+
+    @staticmethod
+    def _metrics(job):
+        # queue/run time plus the run's per-agent summary, when the runner reports one
+        run = job["result"].get("__run__") or {} if isinstance(job["result"], dict) else {}
+        agents = (run.get("metrics") or {}).get("agents", [])
+        return {
+            "queue_seconds": job["started_at"] - job["submitted_at"],
+            "run_seconds": job["finished_at"] - job["started_at"],
+            "recomputed": run.get("recomputed"),
+            "reused": run.get("reused"),
+            "agents": {a["agent"]: {"wall_seconds": a["wall_seconds"], "cpu_seconds": a["cpu_seconds"]} for a in agents},
+        }
+
+    def _trim(self):
+        # Drop the oldest finished jobs once the history bound is exceeded
+        excess = len(self._jobs) - self._history_max
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id]["finished_at"] is not None:
+                del self._jobs[job_id]
+                excess -= 1
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def status(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        return {k: v for k, v in job.items() if k != "result"}
+
+    def stats(self):
+        with self._lock:
+            pending, completed = self._pending, dict(self.completed)
+        return {"workers": self._workers, "pending": pending, "max_pending": self._max_pending,
+                "completed": completed}
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
+
+
+def shutdown_job_queue(wait=True):
+    global _queue
+    with _queue_lock:
+        if _queue is not None:
+            _queue.shutdown(wait=wait)
+            _queue = None
@@ -1,17 +1,37 @@
-from fastapi import APIRouter, Request
-from app.agents.runner import run_flow
-from app.storage.memory_store import MemoryStore
+from fastapi import APIRouter, HTTPException, Request
+from app.api.dto import JobStatus
+from app.api.jobs import QueueFull, get_job_queue
+from app.storage.store import get_artifacts as load_artifacts
 import json
 
 router = APIRouter()
 
-@router.post("/cases/{case_id}/run")
+@router.post("/cases/{case_id}/run", status_code=202, response_model=JobStatus)
 async def run_case(case_id: str, request: Request):
     client_input = await request.json()
-    artifacts = run_flow(case_id, client_input)
-    MemoryStore().set(case_id, "__final__", artifacts)
-    return artifacts
+    try:
+        return get_job_queue().submit(case_id, client_input)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    job = get_job_queue().status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=job["error"])
+    if job["status"] != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return job["result"]
 
 @router.get("/cases/{case_id}/artifacts")
 async def get_artifacts(case_id: str):
-    return MemoryStore().to_dict(case_id)
+    return load_artifacts(case_id)
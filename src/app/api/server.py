@@ -1,9 +1,33 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from app.api.routes import router
+from app.api.jobs import get_job_queue, shutdown_job_queue
+from app.core.instrumentation import render_prometheus
+from app.core.llm_cache import response_cache_if_open
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    shutdown_job_queue(wait=False)
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(router)
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    return {"status": "ok", "jobs": get_job_queue().stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text format: agent/step span totals and counters, plus job-queue and LLM-cache gauges.
+    # A scrape must not create the LLM cache's SQLite file: its gauges appear once something opened it.
+    jobs = get_job_queue().stats()
+    gauges = {"wm_jobs_pending": jobs["pending"], "wm_jobs_workers": jobs["workers"]}
+    cache = response_cache_if_open()
+    if cache is not None:
+        llm_cache = cache.stats()
+        gauges.update({"wm_llm_cache_entries": llm_cache["entries"], "wm_llm_cache_hits": llm_cache["hits"],
+                       "wm_llm_cache_misses": llm_cache["misses"]})
+    gauges.update({f"wm_jobs_{status}": n for status, n in jobs["completed"].items()})
+    return render_prometheus(gauges)
@@ -1,13 +1,23 @@
 import os
 
 
-# LLM provider config (supports openai, azure_openai, gemini)
+# LLM provider config (supports openai, azure_openai, gemini, and an offline "stub")
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
 LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
 LLM_API_KEY = os.getenv("LLM_API_KEY", "sk-REPLACE")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "gemini-REPLACE")
 TIMEOUT_SECONDS = int(os.getenv("TIMEOUT_SECONDS", "120"))
 MAX_TOKENS = int(os.getenv("MAX_TOKENS", "4000"))
+# Override the provider host, e.g. a local stub server for load tests
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "")
+LLM_API_VERSION = os.getenv("LLM_API_VERSION", "2024-06-01")  # azure_openai only
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+# Content-addressed response cache (see app.core.llm_cache)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") not in ("0", "false", "False")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_responses.sqlite")
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
 
 def get_llm_config():
 	if LLM_PROVIDER == "gemini":
@@ -16,7 +26,11 @@ def get_llm_config():
 			"model": LLM_MODEL,
 			"api_key": GEMINI_API_KEY,
 			"timeout": TIMEOUT_SECONDS,
-			"max_tokens": MAX_TOKENS
+			"max_tokens": MAX_TOKENS,
+			"base_url": LLM_BASE_URL,
+			"api_version": LLM_API_VERSION,
+			"max_concurrency": LLM_MAX_CONCURRENCY,
+			"max_retries": LLM_MAX_RETRIES
 		}
 	else:
 		return {
@@ -24,5 +38,9 @@ def get_llm_config():
 			"model": LLM_MODEL,
 			"api_key": LLM_API_KEY,
 			"timeout": TIMEOUT_SECONDS,
-			"max_tokens": MAX_TOKENS
+			"max_tokens": MAX_TOKENS,
+			"base_url": LLM_BASE_URL,
+			"api_version": LLM_API_VERSION,
+			"max_concurrency": LLM_MAX_CONCURRENCY,
+			"max_retries": LLM_MAX_RETRIES
 		}
@@ -1 +1,42 @@
-# General settings placeholder
+# General settings
+import os
+
+
+# Background job queue for POST /cases/{case_id}/run
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "100"))
+JOB_HISTORY_MAX = int(os.getenv("JOB_HISTORY_MAX", "1000"))
+
+# Market-data price service (app.agents.tools.market_data)
+MARKET_DATA_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "file")  # file | sqlite
+MARKET_DATA_PATH = os.getenv("MARKET_DATA_PATH", "")  # defaults to agents/mocks/market_prices.json for "file"
+MARKET_DATA_TTL_SECONDS = float(os.getenv("MARKET_DATA_TTL_SECONDS", "300"))
+MARKET_DATA_CACHE_MAX_ENTRIES = int(os.getenv("MARKET_DATA_CACHE_MAX_ENTRIES", "100000"))
+
+# KYC status lookup (app.agents.tools.kyc): local SQLite store standing in for the vendor
+KYC_DB_PATH = os.getenv("KYC_DB_PATH", ".cache/kyc.sqlite")
+KYC_TTL_SECONDS = float(os.getenv("KYC_TTL_SECONDS", "3600"))
+KYC_CACHE_MAX_ENTRIES = int(os.getenv("KYC_CACHE_MAX_ENTRIES", "100000"))
+
+# Artifact persistence (app.storage.store)
+ARTIFACT_DB_PATH = os.getenv("ARTIFACT_DB_PATH", ".cache/artifacts.sqlite")
+ARTIFACT_CACHE_SIZE = int(os.getenv("ARTIFACT_CACHE_SIZE", "512"))
+ARTIFACT_MAX_VERSIONS = int(os.getenv("ARTIFACT_MAX_VERSIONS", "5"))
+ARTIFACT_RETENTION_SECONDS = float(os.getenv("ARTIFACT_RETENTION_SECONDS", str(30 * 24 * 3600)))
+ARTIFACT_MAX_CASES = int(os.getenv("ARTIFACT_MAX_CASES", "10000"))
+
+# Artifact validation (app.schemas.validation): fast (lax, dict in / dict out) | strict (no coercion)
+ARTIFACT_VALIDATION = os.getenv("ARTIFACT_VALIDATION", "fast")
+
+# Agent DAG scheduler (app.agents.scheduler); per-agent override: timeout_seconds in agent_specs.yaml
+AGENT_TIMEOUT_SECONDS = float(os.getenv("AGENT_TIMEOUT_SECONDS", "120"))
+
+# Instrumentation (app.core.instrumentation)
+# comma-separated agent/span names to profile, or "*" for all; profiles are written to PROFILE_DIR
+PROFILE_AGENTS = {a.strip() for a in os.getenv("PROFILE_AGENTS", "").split(",") if a.strip()}
+PROFILE_DIR = os.getenv("PROFILE_DIR", ".cache/profiles")
+PROFILER = os.getenv("PROFILER", "cprofile")  # cprofile | pyinstrument (falls back to cprofile if not installed)
+TRACEMALLOC = os.getenv("TRACEMALLOC", "0") == "1"  # per-span peak memory; slows allocation-heavy code
+
+# Report rendering (app.reports.rendering); empty disables the on-disk Jinja bytecode cache
+REPORT_BYTECODE_CACHE_DIR = os.getenv("REPORT_BYTECODE_CACHE_DIR", ".cache/jinja")
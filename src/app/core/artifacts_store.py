@@ -1,14 +1,21 @@
+from app.storage.store import get_store
+
+
 class ArtifactStore:
-    _store = {}
+    """Class-level facade over the shared artifact store (app.storage.store)."""
 
     @classmethod
     def set(cls, case_id, name, data):
-        cls._store.setdefault(case_id, {})[name] = data
+        return get_store().set(case_id, name, data)
+
+    @classmethod
+    def set_many(cls, case_id, artifacts):
+        return get_store().set_many(case_id, artifacts)
 
     @classmethod
     def get(cls, case_id, name):
-        return cls._store.get(case_id, {}).get(name)
+        return get_store().get(case_id, name)
 
     @classmethod
     def to_dict(cls, case_id):
-        return cls._store.get(case_id, {})
+        return get_store().to_dict(case_id)
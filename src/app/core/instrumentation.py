@@ -0,0 +1,236 @@
+"""
+Lightweight run instrumentation: per-agent wall/CPU time, optional tracemalloc peak, counters and
+an opt-in per-agent profiler.
+
+`run_metrics()` opens a recorder for one run (a pipeline run, a run_graph call); `span(name)` and
+`count(name, n)` report into the innermost open recorder and into the process-wide REGISTRY that
+backs the Prometheus `/metrics` endpoint. The recorder lives in a ContextVar, so spans opened on
+asyncio.to_thread workers still land in the run that started them. Outside a run they only
+update REGISTRY.
+"""
+import cProfile
+import os
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from app.config import settings
+
+_current = ContextVar("wm_run_metrics", default=None)
+
+
+class MetricsRegistry:
+    """Process-wide totals: per-span count/wall/CPU seconds and named counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans = {}
+        self.counters = {}
+
+    def observe(self, name, wall, cpu):
+        with self._lock:
+            entry = self.spans.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += wall
+            entry[2] += cpu
+
+    def inc(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        with self._lock:
+            return {k: list(v) for k, v in self.spans.items()}, dict(self.counters)
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+
+class RunMetrics:
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self.wall_seconds = self.cpu_seconds = None
+
+    def _add_span(self, record):
+        with self._lock:
+            self.spans.append(record)
+
+    def _inc(self, name, n):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def close(self):
+        self.wall_seconds = time.perf_counter() - self._wall
+        self.cpu_seconds = time.process_time() - self._cpu
+
+    def summary(self):
+        """JSON-able run summary."""
+        with self._lock:
+            return {
+                "run": self.name,
+                "wall_seconds": self.wall_seconds if self.wall_seconds is not None else time.perf_counter() - self._wall,
+                "cpu_seconds": self.cpu_seconds if self.cpu_seconds is not None else time.process_time() - self._cpu,
+                "agents": list(self.spans),
+                "counters": dict(self.counters),
+            }
+
+
+@contextmanager
+def run_metrics(name):
+    metrics = RunMetrics(name)
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        metrics.close()
+        _current.reset(token)
+
+
+def current_run():
+    return _current.get()
+
+
+def _profile_enabled(name):
+    wanted = settings.PROFILE_AGENTS
+    return bool(wanted) and (wanted == {"*"} or name in wanted)
+
+
+def _profile_path(name, ext):
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+    return os.path.join(settings.PROFILE_DIR, f"{safe}-{os.getpid()}-{time.time_ns()}.{ext}")
+
+
+@contextmanager
+def _profiled(name):
+    if not _profile_enabled(name):
+        yield None
+        return
+    if settings.PROFILER == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            Profiler = None
+        if Profiler is not None:
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield None
+            finally:
+                profiler.stop()
+                path = _profile_path(name, "html")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(profiler.output_html())
+            return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield None
+    finally:
+        profiler.disable()
+        profiler.dump_stats(_profile_path(name, "prof"))
+
+
+class _PeakCell:
+    __slots__ = ("peak",)
+
+    def __init__(self, peak):
+        self.peak = peak
+
+
+# Traced spans still open. tracemalloc has a single process-wide peak, and every span resets it on
+# entry, so before a reset the peak so far is folded into each open span's cell: a nested span
+# does not wipe its parent's peak.
+_trace_lock = threading.Lock()
+_trace_open = []
+
+
+def _trace_enter():
+    with _trace_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        current, peak = tracemalloc.get_traced_memory()
+        for cell in _trace_open:
+            cell.peak = max(cell.peak, peak)
+        tracemalloc.reset_peak()
+        cell = _PeakCell(current)
+        _trace_open.append(cell)
+        return current, cell
+
+
+def _trace_exit(cell):
+    with _trace_lock:
+        _trace_open.remove(cell)
+        return max(cell.peak, tracemalloc.get_traced_memory()[1])
+
+
+@contextmanager
+def span(name, **fields):
+    """Times a block: wall seconds, CPU seconds of the current thread and, when TRACEMALLOC is on,
+    the peak traced memory above the block's starting point (process-wide, so approximate
+    while other threads allocate). Extra keyword fields (e.g. rows=) are kept on the record."""
+    record = {"agent": name, **fields}
+    trace = settings.TRACEMALLOC
+    if trace:
+        mem_start, cell = _trace_enter()
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        with _profiled(name):
+            yield record
+    finally:
+        record["wall_seconds"] = time.perf_counter() - wall
+        record["cpu_seconds"] = time.thread_time() - cpu
+        if trace:
+            record["mem_peak_kb"] = round((_trace_exit(cell) - mem_start) / 1024, 1)
+        REGISTRY.observe(name, record["wall_seconds"], record["cpu_seconds"])
+        run = _current.get()
+        if run is not None:
+            run._add_span(record)
+
+
+def count(name, n=1):
+    """Adds to a named counter (e.g. rows processed) in the current run and REGISTRY."""
+    n = int(n)
+    REGISTRY.inc(name, n)
+    run = _current.get()
+    if run is not None:
+        run._inc(name, n)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(gauges=None, registry=None):
+    """Prometheus text exposition of REGISTRY plus optional {name: value} gauges."""
+    spans, counters = (registry or REGISTRY).snapshot()
+    lines = [
+        "# HELP wm_span_runs_total Completed instrumented spans (agents, steps).",
+        "# TYPE wm_span_runs_total counter",
+    ]
+    lines += [f'wm_span_runs_total{{span="{_label(k)}"}} {v[0]}' for k, v in sorted(spans.items())]
+    lines += ["# HELP wm_span_wall_seconds_total Wall-clock seconds spent in spans.",
+              "# TYPE wm_span_wall_seconds_total counter"]
+    lines += [f'wm_span_wall_seconds_total{{span="{_label(k)}"}} {v[1]:.6f}' for k, v in sorted(spans.items())]
+    lines += ["# HELP wm_span_cpu_seconds_total CPU seconds (span thread) spent in spans.",
+              "# TYPE wm_span_cpu_seconds_total counter"]
+    lines += [f'wm_span_cpu_seconds_total{{span="{_label(k)}"}} {v[2]:.6f}' for k, v in sorted(spans.items())]
+    lines += ["# HELP wm_events_total Named event counters (rows processed, cache hits, ...).",
+              "# TYPE wm_events_total counter"]
+    lines += [f'wm_events_total{{name="{_label(k)}"}} {v}' for k, v in sorted(counters.items())]
+    for name, value in sorted((gauges or {}).items()):
+        lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,61 @@
+"""
+Deferred imports for heavy dependencies.
+
+`lazy_import("pandas")` returns a module object whose code runs on first attribute access, so a
+module can keep `pd = lazy_import("pandas")` at the top and still start (e.g. for `--help`)
+without paying for pandas. A module that is already imported is returned as is.
+
+The first access executes the module under a lock: threads that reach it concurrently (Streamlit
+sessions, pool and job workers) wait for one complete load instead of seeing a half-initialized
+module. importlib's LazyLoader cannot be used for this; its module turns itself into a plain
+module before executing, so a second thread can read attributes that do not exist yet. Once loaded
+the object is a plain module again and attribute access costs nothing extra.
+"""
+import importlib.util
+import sys
+import threading
+import types
+
+_load_lock = threading.RLock()
+_loading = set()
+
+
+class _LazyModule(types.ModuleType):
+    def __getattribute__(self, attr):
+        if type(self) is _LazyModule:
+            with _load_lock:
+                # re-entrant access while the module executes (e.g. a submodule import reading
+                # __path__) must see the module as it is, not start a second load
+                if type(self) is _LazyModule and id(self) not in _loading:
+                    _loading.add(id(self))
+                    try:
+                        spec = types.ModuleType.__getattribute__(self, "__spec__")
+                        spec.loader.exec_module(self)
+                        self.__class__ = types.ModuleType
+                    finally:
+                        _loading.discard(id(self))
+        return types.ModuleType.__getattribute__(self, attr)
+
+
+def lazy_import(name):
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with _load_lock:
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+        spec = importlib.util.find_spec(name)
+        if spec is None:
+            raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+        module = importlib.util.module_from_spec(spec)
+        try:
+            module.__class__ = _LazyModule
+        except TypeError:
+            # extension modules come back from create_module as their own type: import them now
+            return importlib.import_module(name)
+        sys.modules[name] = module
+        parent, _, child = name.rpartition(".")
+        if parent:
+            setattr(sys.modules[parent], child, module)
+        return module
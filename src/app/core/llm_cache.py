@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from app.config.llm import LLM_CACHE_ENABLED, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS
+
+
+def cache_key(provider, model, prompt):
+    """Content address of a completion: provider + model + canonical prompt text."""
+    canonical = json.dumps({"provider": provider, "model": model, "prompt": prompt.strip()}, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed LLM response cache with TTL, LRU size bound and in-flight de-duplication.
+
+    Only successful completions are stored. Concurrent callers asking for the same key while it
+    is being computed wait for the first caller's result instead of issuing their own call. The
+    in-flight map is keyed by cache key alone and holds concurrent.futures.Future objects, so the
+    de-duplication spans threads and event loops (each run_graph call has its own loop): sync
+    callers block on the future, async callers await it via asyncio.wrap_future.
+    """
+
+    def __init__(self, path=None, ttl_seconds=None, max_entries=None, enabled=None):
+        self.path = path or LLM_CACHE_PATH
+        self.ttl_seconds = LLM_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = LLM_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.enabled = LLM_CACHE_ENABLED if enabled is None else enabled
+        if self.path != ":memory:" and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            " key TEXT PRIMARY KEY, provider TEXT, model TEXT, response TEXT,"
+            " created_at REAL, last_access REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_responses_lru ON llm_responses(last_access)")
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.hits = self.misses = self.dedupes = self.evictions = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE llm_responses SET last_access = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def put(self, key, response, provider=None, model=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, provider, model, response, now, now),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+            if self.max_entries and count > self.max_entries:
+                excess = count - self.max_entries
+                self._conn.execute(
+                    "DELETE FROM llm_responses WHERE key IN"
+                    " (SELECT key FROM llm_responses ORDER BY last_access LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+
+    def _lookup(self, key, bypass):
+        if bypass or not self.enabled:
+            return None
+        cached = self.get(key)
+        with self._lock:
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return cached
+
+    def _claim(self, key):
+        """(future for `key`, True if the caller owns it and must compute the value). A value the
+        previous owner stored after the caller's lookup comes back as a finished future."""
+        oldest = time.time() - self.ttl_seconds if self.ttl_seconds else float("-inf")
+        with self._lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                row = self._conn.execute("SELECT response FROM llm_responses WHERE key = ? AND created_at >= ?",
+                                         (key, oldest)).fetchone()
+                if row is None:
+                    pending = self._inflight[key] = Future()
+                    # running: a waiter that is cancelled cannot cancel the owner's computation
+                    pending.set_running_or_notify_cancel()
+                    return pending, True
+                pending = Future()
+                pending.set_result(row[0])
+            self.dedupes += 1
+            return pending, False
+
+    def _settle(self, key, pending, value=None, provider=None, model=None, error=None):
+        try:
+            if error is None:
+                self.put(key, value, provider, model)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            if error is None:
+                pending.set_result(value)
+            else:
+                pending.set_exception(error)
+
+    def get_or_compute(self, key, compute, bypass=False, provider=None, model=None):
+        cached = self._lookup(key, bypass)
+        if cached is not None:
+            return cached
+        if bypass or not self.enabled:
+            return compute()
+        pending, owner = self._claim(key)
+        if not owner:
+            return pending.result()
+        try:
+            value = compute()
+        except BaseException as e:
+            self._settle(key, pending, error=e)
+            raise
+        self._settle(key, pending, value, provider, model)
+        return value
+
+    async def aget_or_compute(self, key, compute, bypass=False, provider=None, model=None):
+        """Async variant; `compute` is a zero-argument coroutine function."""
+        cached = self._lookup(key, bypass)
+        if cached is not None:
+            return cached
+        if bypass or not self.enabled:
+            return await compute()
+        pending, owner = self._claim(key)
+        if not owner:
+            return await asyncio.wrap_future(pending)
+        try:
+            value = await compute()
+        except BaseException as e:
+            self._settle(key, pending, error=e)
+            raise
+        self._settle(key, pending, value, provider, model)
+        return value
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+            return {
+                "enabled": self.enabled,
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "inflight_dedupes": self.dedupes,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+
+def response_cache_if_open():
+    """The process-wide cache if something has already opened it, else None (without creating it)."""
+    return _cache
@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import random
+import threading
+import time
+
+import httpx
+
+from app.config.llm import get_llm_config
+from app.core.prompts import numbered_comms_format
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+DEFAULT_BASE_URLS = {
+    "gemini": "https://generativelanguage.googleapis.com",
+    "openai": "https://api.openai.com",
+}
+
+
+class LLMError(Exception):
+    pass
+
+
+class _RetryableError(LLMError):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def stub_completion(prompt):
+    """Deterministic offline completion: same prompt, same text, no network."""
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+    return f"{numbered_comms_format()}\n\n(stub completion {digest})"
+
+
+class LLMClient:
+    """Pooled LLM client driven by get_llm_config().
+
+    Keeps one keep-alive connection pool per client, caps in-flight calls with a semaphore
+    (`max_concurrency`), applies the configured per-call timeout and retries 429/5xx and
+    transport errors with jittered exponential backoff (honouring Retry-After). `complete()` is
+    for worker threads, `acomplete()` for event loops; provider "stub" answers offline.
+
+    `acomplete()` sends through the same pool from a worker thread (asyncio.to_thread) and waits
+    for its backoff on the loop. httpx async pools and asyncio semaphores are bound to one event
+    loop, and every run_graph call has its own, so a per-loop pool would be rebuilt per run and
+    the cap would only hold per loop; this way connections are reused across runs and the cap
+    holds for the whole process.
+    """
+
+    def __init__(self, config=None, backoff_base=0.5, backoff_cap=8.0):
+        cfg = {**get_llm_config(), **(config or {})}
+        self.provider = cfg["provider"]
+        self.model = cfg["model"]
+        self.api_key = cfg["api_key"]
+        self.max_tokens = cfg.get("max_tokens")
+        self.api_version = cfg.get("api_version")
+        self.max_retries = cfg.get("max_retries", 3)
+        self.max_concurrency = cfg.get("max_concurrency", 8)
+        self.base_url = (cfg.get("base_url") or DEFAULT_BASE_URLS.get(self.provider, "")).rstrip("/")
+        self.timeout = httpx.Timeout(cfg.get("timeout", 120))
+        self.limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._sem = threading.BoundedSemaphore(self.max_concurrency)
+
+    # -- request shaping per provider -------------------------------------------------------
+
+    def _request(self, prompt):
+        if self.provider == "gemini":
+            url = f"{self.base_url}/v1beta/models/{self.model}:generateContent"
+            body = {"contents": [{"parts": [{"text": prompt}]}]}
+            if self.max_tokens:
+                body["generationConfig"] = {"maxOutputTokens": self.max_tokens}
+            return url, {"x-goog-api-key": self.api_key}, body
+        body = {"model": self.model, "messages": [{"role": "user", "content": prompt}]}
+        if self.max_tokens:
+            body["max_tokens"] = self.max_tokens
+        if self.provider == "azure_openai":
+            url = f"{self.base_url}/openai/deployments/{self.model}/chat/completions?api-version={self.api_version}"
+            return url, {"api-key": self.api_key}, body
+        return f"{self.base_url}/v1/chat/completions", {"Authorization": f"Bearer {self.api_key}"}, body
+
+    def _parse(self, response):
+        if response.status_code in RETRY_STATUS:
+            raise _RetryableError(f"HTTP {response.status_code}", response.headers.get("Retry-After"))
+        if response.status_code >= 400:
+            raise LLMError(f"HTTP {response.status_code}: {response.text[:200]}")
+        try:
+            data = response.json()
+            if self.provider == "gemini":
+                return data["candidates"][0]["content"]["parts"][0]["text"]
+            return data["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise LLMError(f"Unexpected {self.provider} response: {e}")
+
+    def _delay(self, attempt, error):
+        if isinstance(error, _RetryableError) and error.retry_after:
+            try:
+                return min(float(error.retry_after), self.backoff_cap)
+            except ValueError:
+                pass
+        # full jitter
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    # -- sync ------------------------------------------------------------------------------
+
+    def _sync_client(self):
+        with self._client_lock:
+            if self._client is None:
+                self._client = httpx.Client(timeout=self.timeout, limits=self.limits)
+            return self._client
+
+    def _send(self, url, headers, body):
+        # one attempt through the shared pool, counted against the process-wide cap
+        client = self._sync_client()
+        with self._sem:
+            return self._parse(client.post(url, headers=headers, json=body))
+
+    def complete(self, prompt):
+        if self.provider == "stub":
+            return stub_completion(prompt)
+        url, headers, body = self._request(prompt)
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._send(url, headers, body)
+            except (_RetryableError, httpx.TransportError) as e:
+                if attempt == self.max_retries:
+                    raise LLMError(f"{self.provider} call failed after {attempt + 1} attempts: {e}")
+                time.sleep(self._delay(attempt, e))
+
+    # -- async -----------------------------------------------------------------------------
+
+    async def acomplete(self, prompt):
+        if self.provider == "stub":
+            return stub_completion(prompt)
+        url, headers, body = self._request(prompt)
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await asyncio.to_thread(self._send, url, headers, body)
+            except (_RetryableError, httpx.TransportError) as e:
+                if attempt == self.max_retries:
+                    raise LLMError(f"{self.provider} call failed after {attempt + 1} attempts: {e}")
+                await asyncio.sleep(self._delay(attempt, e))
+
+    def close(self):
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    """Process-wide client so every caller shares one connection pool and concurrency cap."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+        return _client
@@ -1,6 +1,11 @@
+import hashlib
+import json
+
+from app.schemas.validation import validate
+
 def validate_artifact(artifact, model):
-    # Validate artifact against Pydantic model
-    return model(**artifact)
+    # Validated dict for a model class or contract name; artifacts validated upstream pass through
+    return validate(model, artifact)
 
 def ensure_comms_defaults(comms_dict):
     comms_dict.setdefault("proposal_refs", {})
@@ -8,3 +13,8 @@ def ensure_comms_defaults(comms_dict):
     comms_dict.setdefault("agenda", ["Executive Summary","Financial DNA Dashboard","Action Plan","Risk Management","Compliance","Next Steps"])
     comms_dict.setdefault("approval_status", "Pending")
     return comms_dict
+
+def content_hash(data):
+    # Stable sha256 of a JSON-able value: key order and whitespace do not matter
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
@@ -1,5 +1,4 @@
 from app.agents.runner import run_flow
-from app.storage.memory_store import MemoryStore
 import json
 
 def main():
@@ -8,7 +7,6 @@ def main():
         client_input = json.load(f)
 
     artifacts = run_flow(case_id, client_input)
-    MemoryStore().set(case_id, "__final__", artifacts)
 
     print("Flow complete. Artifacts:")
     print(json.dumps(artifacts, indent=2))
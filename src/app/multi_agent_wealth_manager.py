@@ -6,25 +6,53 @@ A single-file, runnable Python "multi-agent" pipeline that produces a client-fac
 
 Usage:
   python multi_agent_wealth_manager.py --input /path/to/Agent1_fixed.csv --output ./output
+  python multi_agent_wealth_manager.py --input /path/to/book.csv --output ./output --all-users
+  python multi_agent_wealth_manager.py --input /path/to/book.csv --output ./output --all-users --workers 8
 
 Dependencies:
   pip install pandas matplotlib jinja2
+  pip install pyarrow  # optional, for --cache
 """
 
 from __future__ import annotations
 import argparse
+import hashlib
+import importlib.util
 import os
+import shutil
 import sys
 import json
 import logging
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from jinja2 import Template
-
-logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Dict, Any, Iterator, List, Tuple
+
+if not __package__:
+    # run as a script: make the `app` package importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.core.instrumentation import count, run_metrics, span
+from app.core.lazy import lazy_import
+from app.reports.rendering import EXTENSIONS, render_report, report_view
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+# Heavy imports are deferred to first use so `--help` and API/CLI cold starts stay cheap;
+# matplotlib and jinja2 are imported only when a chart or the report is produced.
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+market_data = lazy_import('app.agents.tools.market_data')
+risk = lazy_import('app.agents.tools.risk')
+tax_rules = lazy_import('app.agents.tools.tax_rules')
+cashflow = lazy_import('app.agents.tools.cashflow')
+categorize = lazy_import('app.agents.tools.categorize')
+compliance_rules = lazy_import('app.agents.tools.compliance_rules')
+kyc = lazy_import('app.agents.tools.kyc')
+
+logger = logging.getLogger(__name__)
 
 def ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
@@ -32,143 +60,628 @@ def ensure_dir(path: str):
 def safe_numeric(series: pd.Series) -> pd.Series:
     return pd.to_numeric(series, errors='coerce').fillna(0.0)
 
+def client_ids(df: pd.DataFrame) -> pd.Series:
+    """Forward-filled profile__user_id: continuation rows belong to the client above them."""
+    return df['profile__user_id'].ffill()
+
+_BOOL_STRINGS = {'True': True, 'False': False, 'true': True, 'false': False, 'TRUE': True, 'FALSE': False}
+
+def iter_csv_chunks(path: str, chunksize: int, dtype: Any = object, **read_kwargs) -> Iterator[Tuple[pd.Series, pd.DataFrame]]:
+    """Yields (forward-filled user ids, rows) per chunk; the fill carries across chunk boundaries.
+
+    Cells are kept as strings (object columns by default, the cheapest parse), like every
+    DataAgent read: read_csv infers types per chunk, so inferred chunks would disagree with each
+    other and with a whole-file read. NormalizeAgent types the columns it uses.
+    """
+    last_uid = None
+    for chunk in pd.read_csv(path, chunksize=chunksize, dtype=dtype, **read_kwargs):
+        chunk.columns = [c.strip() for c in chunk.columns]
+        if 'profile__user_id' not in chunk.columns:
+            raise ValueError('DataAgent: chunked mode requires a profile__user_id column')
+        ids = chunk['profile__user_id'].astype(object)
+        if last_uid is not None and pd.isna(ids.iloc[0]):
+            ids.iloc[0] = last_uid
+        ids = ids.ffill()
+        last_uid = ids.iloc[-1]
+        yield ids, chunk
+
+CACHE_DIRNAME = '.wm_cache'
+CACHE_BUCKETS = 64
+
+def _cache_bucket(uid: Any) -> int:
+    return zlib.crc32(str(uid).encode('utf-8')) % CACHE_BUCKETS
+
+@dataclass
+class ParquetCache:
+    """Columnar (Parquet) cache of a parsed input CSV, written next to it under .wm_cache/.
+
+    Rows are partitioned by a hash bucket of the forward-filled profile__user_id, so a single-client
+    load prunes to one bucket and filters rows inside it (predicate pushdown). The cache is keyed by
+    path + mtime + content hash: a size/mtime match is trusted, otherwise the file is re-hashed and
+    the cache is rebuilt only if the bytes changed. Requires pyarrow.
+    """
+    source: str
+    chunksize: int = 100_000
+    @staticmethod
+    def available() -> bool:
+        return importlib.util.find_spec('pyarrow') is not None
+    @property
+    def root(self) -> str:
+        src = os.path.abspath(self.source)
+        return os.path.join(os.path.dirname(src), CACHE_DIRNAME, os.path.basename(src) + '.parquet')
+    def _content_hash(self) -> str:
+        h = hashlib.sha256()
+        with open(self.source, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        return h.hexdigest()
+    def _manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.root, 'manifest.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    def _write_manifest(self, root: str, manifest: Dict[str, Any]):
+        with open(os.path.join(root, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+    def is_fresh(self) -> bool:
+        manifest = self._manifest()
+        if manifest is None:
+            return False
+        st = os.stat(self.source)
+        if (manifest['size'], manifest['mtime_ns']) == (st.st_size, st.st_mtime_ns):
+            return True
+        if manifest['size'] == st.st_size and manifest['sha256'] == self._content_hash():
+            manifest['mtime_ns'] = st.st_mtime_ns
+            self._write_manifest(self.root, manifest)
+            return True
+        return False
+    def build(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        logger.info("ParquetCache: building %s", self.root)
+        st = os.stat(self.source)
+        digest = self._content_hash()
+        tmp = f'{self.root}.tmp-{os.getpid()}'
+        shutil.rmtree(tmp, ignore_errors=True)
+        data_dir = os.path.join(tmp, 'data')
+        schema, rows = None, 0
+        # str columns, so an all-empty column in the first chunk still gets a string Parquet type
+        for i, (ids, chunk) in enumerate(iter_csv_chunks(self.source, self.chunksize, dtype=str)):
+            clients = ids.fillna('').astype(str)
+            buckets = {uid: _cache_bucket(uid) for uid in clients.unique()}
+            chunk = chunk.assign(_row=np.arange(rows, rows + len(chunk), dtype='int64'),
+                                 _client=clients, wm_bucket=clients.map(buckets).astype('int32'))
+            rows += len(chunk)
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            schema = schema or table.schema
+            pq.write_to_dataset(table, data_dir, partition_cols=['wm_bucket'], basename_template=f'part-{i}-{{i}}.parquet')
+        os.makedirs(tmp, exist_ok=True)
+        self._write_manifest(tmp, {'source': os.path.abspath(self.source), 'size': st.st_size,
+                                   'mtime_ns': st.st_mtime_ns, 'sha256': digest, 'rows': rows})
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.replace(tmp, self.root)
+    def load(self, user_ids: Optional[List[str]] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Loads the cached rows (rebuilding first if the source changed), in file order."""
+        import pyarrow.parquet as pq
+        if not self.is_fresh():
+            self.build()
+        filters = None
+        if user_ids:
+            filters = [('wm_bucket', 'in', sorted({_cache_bucket(u) for u in user_ids})),
+                       ('_client', 'in', [str(u) for u in user_ids])]
+        data_dir = os.path.join(self.root, 'data')
+        if not os.path.isdir(data_dir):
+            return pd.DataFrame()
+        read_cols = None if columns is None else list(dict.fromkeys(list(columns) + ['_row']))
+        table = pq.read_table(data_dir, columns=read_cols, filters=filters)
+        df = table.to_pandas().sort_values('_row')
+        return df.drop(columns=[c for c in ('_row', '_client', 'wm_bucket') if c in df.columns]).reset_index(drop=True)
+    def users(self) -> pd.DataFrame:
+        """(profile__user_id, profile__name) per client, read from two columns only."""
+        df = self.load(columns=['profile__user_id', 'profile__name'])
+        return df.dropna(subset=['profile__user_id']).drop_duplicates().reset_index(drop=True)
+
 @dataclass
 class DataAgent:
-    """Loads raw CSV and exposes a normalized DataFrame."""
+    """Loads raw CSV and exposes a normalized DataFrame.
+
+    With `chunksize` set the file is streamed: only rows of the requested user(s) are kept, and
+    `groups()` yields each client as soon as its rows are complete, so peak memory is bounded by
+    the largest client rather than the file. `usecols` prunes columns at parse time
+    (profile__user_id is always kept). With `cache` the rows come from a ParquetCache next to the
+    input (built on first use, rebuilt when the file changes) instead of re-parsing the CSV. In every
+    mode cells are kept as strings; NormalizeAgent types the columns it uses.
+    """
     input_path: str
+    chunksize: Optional[int] = None
+    usecols: Optional[List[str]] = None
+    cache: bool = False
     df: Optional[pd.DataFrame] = field(default=None, init=False)
+    def _read_kwargs(self) -> Dict[str, Any]:
+        if not self.usecols:
+            return {}
+        wanted = set(self.usecols) | {'profile__user_id'}
+        return {'usecols': lambda c: c.strip() in wanted}
+    def _chunks(self) -> Iterator[Tuple[pd.Series, pd.DataFrame]]:
+        return iter_csv_chunks(self.input_path, self.chunksize, **self._read_kwargs())
     def run(self, user_id: Optional[str] = None) -> pd.DataFrame:
-        logging.info(f"DataAgent: loading {self.input_path}")
-        self.df = pd.read_csv(self.input_path)
-        self.df.columns = [c.strip() for c in self.df.columns]
-        if user_id:
-            if 'profile__user_id' in self.df.columns:
-                filtered = self.df[self.df['profile__user_id'] == user_id]
-                logging.info(f"DataAgent: filtered for user_id={user_id}, rows={len(filtered)}")
-                self.df = filtered.reset_index(drop=True)
-            else:
-                logging.warning(f"DataAgent: user_id column not found, using all data")
-        logging.info(f"DataAgent: loaded rows={len(self.df)} cols={len(self.df.columns)}")
+        """Loads the file, optionally filtered to one user id or a collection of them."""
+        wanted = [user_id] if isinstance(user_id, str) else (list(user_id) if user_id else [])
+        logger.info("DataAgent: loading %s%s", self.input_path, f" in chunks of {self.chunksize}" if self.chunksize else "")
+        if self.cache and not ParquetCache.available():
+            logger.warning("DataAgent: pyarrow not installed, parquet cache disabled")
+            self.cache = False
+        if self.cache:
+            cols = None if not self.usecols else ['profile__user_id'] + [c for c in self.usecols if c != 'profile__user_id']
+            self.df = ParquetCache(self.input_path, chunksize=self.chunksize or 100_000).load(wanted or None, columns=cols)
+            if wanted:
+                logger.info("DataAgent: filtered for user_id=%s from cache, rows=%d", user_id, len(self.df))
+        elif self.chunksize:
+            kept = []
+            for ids, chunk in self._chunks():
+                mask = ids.isin(wanted) if wanted else slice(None)
+                kept.append(chunk[mask])
+            self.df = pd.concat(kept, ignore_index=True) if kept else pd.DataFrame()
+            if wanted:
+                logger.info("DataAgent: filtered for user_id=%s, rows=%d", user_id, len(self.df))
+        else:
+            self.df = pd.read_csv(self.input_path, dtype=object, **self._read_kwargs())
+            self.df.columns = [c.strip() for c in self.df.columns]
+            if wanted:
+                if 'profile__user_id' in self.df.columns:
+                    filtered = self.df[client_ids(self.df).isin(wanted)]
+                    logger.info("DataAgent: filtered for user_id=%s, rows=%d", user_id, len(filtered))
+                    self.df = filtered.reset_index(drop=True)
+                else:
+                    logger.warning("DataAgent: user_id column not found, using all data")
+        logger.info("DataAgent: loaded rows=%d cols=%d", len(self.df), len(self.df.columns))
         return self.df
+    def _stream_groups(self) -> Iterator[Tuple[str, pd.DataFrame]]:
+        # Clients are contiguous in custodian exports; a client's frame is emitted when the next
+        # client starts, so at most one client plus one chunk is held at a time.
+        current, parts, seen = None, [], set()
+        for ids, chunk in self._chunks():
+            runs = (ids != ids.shift()).cumsum()
+            for _, run_rows in chunk.groupby(runs, sort=False):
+                uid = ids.loc[run_rows.index[0]]
+                if uid != current:
+                    if parts:
+                        yield str(current), pd.concat(parts, ignore_index=True)
+                    if uid in seen:
+                        logger.warning("DataAgent: rows for user_id=%s are not contiguous; it will be processed more than once", uid)
+                    seen.add(uid)
+                    current, parts = uid, []
+                parts.append(run_rows)
+        if parts:
+            yield str(current), pd.concat(parts, ignore_index=True)
+    def users(self) -> pd.DataFrame:
+        """Distinct (profile__user_id, profile__name) pairs, without loading the other columns."""
+        if self.cache and ParquetCache.available():
+            return ParquetCache(self.input_path).users()
+        df = pd.read_csv(self.input_path, dtype=str, usecols=lambda c: c.strip() in ('profile__user_id', 'profile__name'))
+        df.columns = [c.strip() for c in df.columns]
+        if 'profile__user_id' not in df.columns:
+            return pd.DataFrame(columns=['profile__user_id', 'profile__name'])
+        return df.dropna(subset=['profile__user_id']).drop_duplicates().reset_index(drop=True)
+    def symbols(self) -> List[str]:
+        """Distinct holding symbols across the file, reading only the symbol column."""
+        if self.df is not None:
+            return holding_symbols(self.df)
+        src = _symbol_column([c.strip() for c in pd.read_csv(self.input_path, nrows=0).columns])
+        if src is None:
+            return []
+        if self.cache and ParquetCache.available():
+            values = ParquetCache(self.input_path).load(columns=[src])[src]
+        else:
+            values = pd.read_csv(self.input_path, dtype=str, usecols=lambda c: c.strip() == src).iloc[:, 0]
+        return sorted(values.dropna().astype(str).unique())
+    def groups(self) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """Yields (user_id, rows) per client in file order."""
+        if self.chunksize and not self.cache and self.df is None:
+            yield from self._stream_groups()
+            return
+        if self.df is None:
+            self.run()
+        if 'profile__user_id' not in self.df.columns:
+            logger.warning("DataAgent: user_id column not found, treating file as one client")
+            yield 'all', self.df
+            return
+        ids = client_ids(self.df)
+        for uid, rows in self.df.groupby(ids, sort=False):
+            yield str(uid), rows.reset_index(drop=True)
+
+# Entity tables carved out of the wide `__`-delimited layout. Order matters: the first prefix a
+# column matches wins, so holdings are claimed before plain account fields.
+ENTITY_PREFIXES = [
+    ('holdings', 'accounts__holdings__'),
+    ('accounts', 'accounts__'),
+    ('transactions', 'transactions__'),
+    ('liabilities', 'liabilities__'),
+    ('goals', 'goals__'),
+    ('recurring_cashflows', 'recurring_cashflows__'),
+]
+
+# role -> alternatives in priority order; an alternative is a field name (exact match wins, then
+# substring) or a tuple of substrings that must all appear.
+ENTITY_ROLES: Dict[str, Dict[str, tuple]] = {
+    'holdings': {'symbol': ('symbol',), 'quantity': ('quantity', 'qty'), 'price': ('price',),
+                 'asset_class': ('asset_class', 'assetclass'), 'market_value': (('market', 'value'),)},
+    'accounts': {'account_id': ('account_id',), 'type': ('type',), 'balance': ('balance', 'current')},
+    'transactions': {'tx_id': ('tx_id',), 'date': ('date',), 'account_id': ('account_id',),
+                     'amount': ('amount', 'amt'), 'merchant': ('merchant',)},
+    'liabilities': {'type': ('type',), 'balance': ('current_balance', 'balance'),
+                    'monthly_payment': ('monthly_payment', 'payment')},
+    'goals': {'goal_id': ('goal_id',), 'name': ('name',), 'target_amount': ('target_amount',),
+              'target_age': ('target_age',), 'real_return': ('real_return',), 'inflation': ('inflation',)},
+    'recurring_cashflows': {'name': ('name',), 'amount': ('amount',), 'frequency': ('frequency',)},
+}
+
+DATE_HINTS = ('date', 'as_of', 'next_due', 'next_occurrence', 'next_paydate')
+PROFILE_PREFIXES = ('profile__', 'tax_profile__', 'employment__', 'partner_employment__')
+EARNER_PREFIXES = ('employment__', 'partner_employment__')
+# client key column of the stacked per-block frames handed to the book-level engines
+CLIENT_KEY = '_client'
+# clients per batch block: the cashflow, tax, risk and compliance engines run once per block
+CLIENT_BLOCK_SIZE = 256
+# roles that are always money/quantities: stray text in them becomes NaN instead of a category
+NUMERIC_ROLES = frozenset({'quantity', 'price', 'market_value', 'balance', 'amount', 'monthly_payment',
+                           'target_amount', 'target_age', 'real_return', 'inflation'})
+# roles that are always labels: "529" stays an account type rather than becoming a number
+TEXT_ROLES = frozenset({'symbol', 'asset_class', 'type', 'name', 'merchant', 'frequency'})
+
+def _match_role(fields: List[str], alternatives: tuple) -> Optional[str]:
+    for alt in alternatives:
+        if isinstance(alt, str) and alt in fields:
+            return alt
+    for alt in alternatives:
+        parts = (alt,) if isinstance(alt, str) else alt
+        hit = next((f for f in fields if all(p in f.lower() for p in parts)), None)
+        if hit is not None:
+            return hit
+    return None
+
+@dataclass(frozen=True)
+class EntitySchema:
+    """Source column -> canonical field mapping for one entity table."""
+    name: str
+    columns: Tuple[Tuple[str, str], ...]
+    dates: frozenset
+
+@dataclass(frozen=True)
+class SchemaMap:
+    entities: Dict[str, EntitySchema]
+    profile_cols: Tuple[str, ...]
+    currency_cols: Tuple[str, ...]
+    has_cost_basis: bool
+
+@lru_cache(maxsize=32)
+def resolve_schema(columns: Tuple[str, ...]) -> SchemaMap:
+    """Resolves column roles once per distinct header; every client in a file shares the result."""
+    grouped: Dict[str, List[Tuple[str, str]]] = {name: [] for name, _ in ENTITY_PREFIXES}
+    for col in columns:
+        for name, prefix in ENTITY_PREFIXES:
+            if col.startswith(prefix):
+                # recurring_cashflows__|__amount: the `|` list marker carries no meaning
+                fld = col[len(prefix):].lstrip('|').lstrip('_')
+                if fld:
+                    grouped[name].append((col, fld))
+                break
+    entities = {}
+    for name, pairs in grouped.items():
+        fields = [f for _, f in pairs]
+        renames = {}
+        for role, alternatives in ENTITY_ROLES.get(name, {}).items():
+            hit = _match_role(fields, alternatives)
+            if hit is not None and hit not in renames:
+                renames[hit] = role
+        mapped, seen = [], set()
+        for col, fld in pairs:
+            canonical = renames.get(fld, fld)
+            if canonical in seen or (fld not in renames and canonical in renames.values()):
+                continue
+            seen.add(canonical)
+            mapped.append((col, canonical))
+        dates = frozenset(c for _, c in mapped if any(h in c.lower() for h in DATE_HINTS))
+        entities[name] = EntitySchema(name=name, columns=tuple(mapped), dates=dates)
+    return SchemaMap(
+        entities=entities,
+        profile_cols=tuple(c for c in columns if c.startswith(PROFILE_PREFIXES)),
+        currency_cols=tuple(c for c in columns if c == 'currency' or c.endswith('__currency')),
+        has_cost_basis=any('cost' in c.lower() or 'basis' in c.lower() for c in columns),
+    )
+
+def _symbol_column(columns: List[str]) -> Optional[str]:
+    holdings = resolve_schema(tuple(columns)).entities['holdings']
+    return next((src for src, canonical in holdings.columns if canonical == 'symbol'), None)
+
+def holding_symbols(df: pd.DataFrame) -> List[str]:
+    """Distinct holding symbols in a loaded frame (one client or a whole book)."""
+    src = _symbol_column(list(df.columns))
+    return sorted(df[src].dropna().astype(str).unique()) if src else []
+
+def _typed_dates(values: pd.Series) -> pd.Series:
+    # ISO dates in one vectorized pass; anything else falls back to per-value parsing. One unit
+    # for every block, so a client's column does not depend on which rows it was typed with.
+    parsed = pd.to_datetime(values, errors='coerce', format='ISO8601').dt.as_unit('ns')
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(values[retry], errors='coerce', format='mixed').dt.as_unit('ns')
+    return parsed
+
+def _typed_column(values: pd.Series, canonical: str, is_date: bool) -> pd.Series:
+    if is_date:
+        return _typed_dates(values)
+    if canonical.endswith('_id') or canonical in TEXT_ROLES:
+        if isinstance(values.dtype, pd.StringDtype):
+            return values
+        return values.astype(str).where(values.notna())
+    if canonical in NUMERIC_ROLES:
+        return pd.to_numeric(values, errors='coerce').astype('float64')
+    present = values.notna()
+    if not present.any():
+        return values
+    if pd.api.types.infer_dtype(values, skipna=True) == 'boolean':
+        return values.astype('boolean')
+    if values[present].isin(list(_BOOL_STRINGS)).all():
+        return values.map(_BOOL_STRINGS).astype('boolean')
+    numeric = pd.to_numeric(values, errors='coerce')
+    if numeric.notna().sum() == present.sum():
+        return numeric.astype('float64')
+    return values
+
+def _profile_value(value: Any, name: str) -> Any:
+    # typed value by value, so a client's fields do not depend on the rest of its block
+    if not isinstance(value, str):
+        return None if pd.isna(value) else value
+    if name.endswith('_id'):
+        return value
+    if value in _BOOL_STRINGS:
+        return _BOOL_STRINGS[value]
+    try:
+        return float(value) if '_' not in value else value
+    except ValueError:
+        return value
 
 @dataclass
-class HoldingsAgent:
-    """Extracts holdings, computes market values and allocation by asset class."""
+class ClientTables:
+    """One client's data as compact typed per-entity tables."""
+    profile: Dict[str, Any]
+    accounts: pd.DataFrame
+    holdings: pd.DataFrame
+    transactions: pd.DataFrame
+    liabilities: pd.DataFrame
+    goals: pd.DataFrame
+    recurring_cashflows: pd.DataFrame
+    currencies: List[str]
+    has_cost_basis: bool
+
+def normalize_block(frames: List[pd.DataFrame]) -> List[ClientTables]:
+    """ClientTables for each client's wide rows, in order. The rows are stacked and every column is
+    typed once for the block; each client's tables are then sliced out by position (all-empty rows
+    dropped). Profile fields are the client's first non-empty value, typed value by value."""
+    stacked = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    owner = np.repeat(np.arange(len(frames)), [len(f) for f in frames])
+    schema = resolve_schema(tuple(stacked.columns))
+    bounds = np.arange(len(frames) + 1)
+    present = stacked.notna().to_numpy()
+    position = {c: i for i, c in enumerate(stacked.columns)}
+    tables: Dict[str, List[pd.DataFrame]] = {}
+    for name, entity in schema.entities.items():
+        if not entity.columns:
+            tables[name] = [pd.DataFrame() for _ in frames]
+            continue
+        columns = [position[src] for src, _ in entity.columns]
+        rows = np.flatnonzero(present[:, columns].any(axis=1))
+        raw = stacked.iloc[rows, columns].reset_index(drop=True)
+        typed = pd.DataFrame({canonical: _typed_column(raw[src], canonical, canonical in entity.dates)
+                              for src, canonical in entity.columns}, index=raw.index)
+        if len(frames) == 1:
+            tables[name] = [typed]
+            continue
+        edges = np.searchsorted(owner[rows], bounds)
+        tables[name] = [typed.iloc[a:b].reset_index(drop=True) for a, b in zip(edges[:-1], edges[1:])]
+    profiles: List[Dict[str, Any]] = [{} for _ in frames]
+    for c in schema.profile_cols:
+        # each client's first non-empty value (owner is sorted, so a client's rows are contiguous)
+        rows = np.flatnonzero(present[:, position[c]])
+        first = rows[np.r_[True, owner[rows][1:] != owner[rows][:-1]]] if len(rows) else rows
+        values = stacked[c].to_numpy(dtype=object)
+        for i in range(len(frames)):
+            profiles[i][c] = None
+        for i, value in zip(owner[first].tolist(), values[first].tolist()):
+            profiles[i][c] = _profile_value(value, c)
+    currencies: List[List[str]] = [[] for _ in frames]
+    if schema.currency_cols:
+        codes = set()
+        for c in schema.currency_cols:
+            rows = np.flatnonzero(present[:, position[c]])
+            codes.update(zip(owner[rows].tolist(), map(str, stacked[c].to_numpy(dtype=object)[rows].tolist())))
+        for i, code in sorted(codes):
+            currencies[i].append(code)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info('NormalizeAgent: %d client(s) %s', len(frames),
+                    ' '.join(f'{k}={sum(len(t) for t in v)}' for k, v in tables.items()))
+    return [ClientTables(profile=profiles[i], currencies=currencies[i], has_cost_basis=schema.has_cost_basis,
+                         **{name: tables[name][i] for name in tables})
+            for i in range(len(frames))]
+
+@dataclass
+class NormalizeAgent:
+    """Splits one client's wide rows into typed entity tables (see normalize_block)."""
     df: pd.DataFrame
+    def run(self) -> ClientTables:
+        return normalize_block([self.df])[0]
+
+@dataclass
+class HoldingsAgent:
+    """Computes market values and allocation by asset class from the holdings table.
+
+    With a `prices` snapshot (symbol, price, as_of) positions are revalued at those prices instead
+    of the price baked into the export; see market_data.revalue.
+    """
+    tables: ClientTables
+    prices: Optional[pd.DataFrame] = None
     results: Dict[str, Any] = field(default_factory=dict, init=False)
     def run(self) -> Dict[str, Any]:
-        logging.info("HoldingsAgent: extracting holdings")
-        hold_cols = [c for c in self.df.columns if 'accounts__holdings' in c]
-        if not hold_cols:
-            logging.warning('HoldingsAgent: no holdings columns found')
+        logger.info("HoldingsAgent: extracting holdings")
+        holdings = self.tables.holdings
+        if self.prices is not None and not holdings.empty:
+            holdings = market_data.revalue(holdings, self.prices)
+            logger.info("HoldingsAgent: revalued %d/%d positions", (holdings['price_source'] == 'live').sum(), len(holdings))
+        if holdings.empty:
+            logger.warning('HoldingsAgent: no holdings found')
             self.results = {'holdings_df': pd.DataFrame(), 'alloc': pd.DataFrame(), 'total': 0.0}
             return self.results
-        holdings = self.df[hold_cols].copy()
-        sym = next((c for c in holdings.columns if 'symbol' in c.lower()), None)
-        qty = next((c for c in holdings.columns if 'quantity' in c.lower() or 'qty' in c.lower()), None)
-        price = next((c for c in holdings.columns if 'price' in c.lower()), None)
-        asset_class = next((c for c in holdings.columns if 'asset_class' in c.lower() or 'assetclass' in c.lower()), None)
-        market_col = next((c for c in holdings.columns if 'market' in c.lower() and 'value' in c.lower()), None)
-        if market_col is None and qty and price:
-            holdings['market_value'] = safe_numeric(holdings[qty]) * safe_numeric(holdings[price])
-        elif market_col is not None:
-            holdings['market_value'] = safe_numeric(holdings[market_col])
+        if 'market_value' in holdings.columns:
+            market_value = holdings['market_value'].fillna(0.0)
+        elif 'quantity' in holdings.columns and 'price' in holdings.columns:
+            market_value = holdings['quantity'].fillna(0.0) * holdings['price'].fillna(0.0)
         else:
-            holdings['market_value'] = 0.0
-        holdings['symbol_clean'] = holdings[sym].astype(str) if sym else 'Unknown'
-        holdings['asset_class_clean'] = holdings[asset_class].astype(str) if asset_class else 'Unknown'
-        alloc = holdings.groupby('asset_class_clean', dropna=False)['market_value'].sum().reset_index()
+            market_value = 0.0
+        holdings = holdings.assign(market_value=market_value)
+        if 'asset_class' not in holdings.columns:
+            holdings['asset_class'] = pd.Categorical(['Unknown'] * len(holdings))
+        alloc = holdings.groupby('asset_class', observed=True)['market_value'].sum().reset_index()
         total = alloc['market_value'].sum()
         alloc['Pct'] = alloc['market_value'] / (total if total != 0 else 1) * 100
         self.results = {'holdings_df': holdings, 'alloc': alloc.sort_values('market_value', ascending=False), 'total': total}
-        logging.info(f"HoldingsAgent: total portfolio value = {self.results['total']:.2f}")
+        logger.info("HoldingsAgent: total portfolio value = %.2f", self.results['total'])
         return self.results
 
+def _earners(profile: Dict[str, Any]) -> pd.DataFrame:
+    """One row per earner (employment, partner_employment) with the fields after the prefix."""
+    rows = [{k[len(p):]: v for k, v in profile.items() if k.startswith(p)} for p in EARNER_PREFIXES]
+    return pd.DataFrame([r for r in rows if any(v is not None for v in r.values())])
+
+def _stack_clients(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    # one frame for a block of clients, keyed by position in CLIENT_KEY
+    keyed = [f.assign(**{CLIENT_KEY: str(i)}) for i, f in enumerate(frames) if len(f)]
+    return pd.concat(keyed, ignore_index=True) if keyed else pd.DataFrame()
+
+def book_cashflow(tables: List[ClientTables], transactions: Optional[pd.DataFrame] = None) -> List[Dict[str, Any]]:
+    """baseline_cashflow for each client in `tables`, in order, from one compute_cashflow call over
+    their stacked transactions, recurring cashflows and earners (keyed by position).
+    `transactions` is the stacked transactions when the caller already has them."""
+    if transactions is None:
+        transactions = _stack_clients([t.transactions for t in tables])
+    flows = cashflow.compute_cashflow(transactions, _stack_clients([t.recurring_cashflows for t in tables]),
+                                      _stack_clients([_earners(t.profile) for t in tables]), client_col=CLIENT_KEY)
+    return [cashflow.baseline_cashflow(flows, str(i)) for i in range(len(tables))]
+
+def book_category_spend(tables: List[ClientTables], transactions: Optional[pd.DataFrame] = None) -> List[pd.DataFrame]:
+    """categorize.category_spend for each client in `tables`, in order, from one call over their
+    stacked transactions (see book_cashflow)."""
+    if transactions is None:
+        transactions = _stack_clients([t.transactions for t in tables])
+    table = categorize.category_spend(transactions, client_col=CLIENT_KEY)
+    # rows come back grouped by client: cut them where the key changes
+    keys = table[CLIENT_KEY].to_numpy()
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype=int)
+    table = table.drop(columns=CLIENT_KEY)
+    parts = {keys[a]: table.iloc[a:b].reset_index(drop=True) for a, b in zip(starts, np.r_[starts[1:], len(keys)])}
+    return [parts[str(i)] if str(i) in parts else table.iloc[:0] for i in range(len(tables))]
+
 @dataclass
 class TransactionsAgent:
-    """Extracts transactions and computes simple income/expense summary."""
-    df: pd.DataFrame
+    """Observed income/expense totals, spend by merchant category (agents/tools/categorize.py) and
+    the annualized cashflow (agents/tools/cashflow.py) from the transactions, the declared
+    recurring cashflows and the employment fields. `flows` is this client's row of a book_cashflow
+    call and `categories` its book_category_spend table (each computed here when not given)."""
+    tables: ClientTables
+    flows: Optional[Dict[str, Any]] = None
+    categories: Optional[pd.DataFrame] = None
     results: Dict[str, Any] = field(default_factory=dict, init=False)
     def run(self) -> Dict[str, Any]:
-        logging.info('TransactionsAgent: scanning for transaction columns')
-        trans_cols = [c for c in self.df.columns if c.startswith('transactions__')]
-        trans = self.df[trans_cols].copy() if trans_cols else pd.DataFrame()
-        amt_col = next((c for c in trans.columns if 'amount' in c.lower() or 'amt' in c.lower()), None)
-        date_col = next((c for c in trans.columns if 'date' in c.lower()), None)
+        logger.info('TransactionsAgent: summarizing transactions')
+        trans = self.tables.transactions
         income = expense = None
-        if amt_col is not None:
-            trans_amt = safe_numeric(trans[amt_col])
-            income = trans_amt[trans_amt > 0].sum()
-            expense = -trans_amt[trans_amt < 0].sum()
-            trans['amount_combined'] = trans_amt
+        if 'amount' in trans.columns:
+            amounts = trans['amount']
+            income = amounts[amounts > 0].sum()
+            expense = -amounts[amounts < 0].sum()
         else:
-            logging.warning('TransactionsAgent: no amount column found in transactions')
-        if date_col is not None:
-            trans['date_parsed'] = pd.to_datetime(trans[date_col], errors='coerce')
-            min_date = trans['date_parsed'].min()
-            max_date = trans['date_parsed'].max()
+            logger.warning('TransactionsAgent: no amount column found in transactions')
+        if 'date' in trans.columns:
+            min_date = trans['date'].min()
+            max_date = trans['date'].max()
         else:
             min_date = max_date = None
-        self.results = {'transactions_df': trans, 'income': income, 'expense': expense, 'period': (min_date, max_date)}
-        logging.info(f"TransactionsAgent: income={income} expense={expense} period={min_date} to {max_date}")
+        flows = self.flows if self.flows is not None else book_cashflow([self.tables])[0]
+        categories = self.categories if self.categories is not None else categorize.category_spend(trans)
+        self.results = {'transactions_df': trans, 'income': income, 'expense': expense, 'period': (min_date, max_date),
+                        'categories': categories, 'cashflow': flows}
+        logger.info("TransactionsAgent: income=%s expense=%s period=%s to %s annual_income=%.2f", income, expense,
+                    min_date, max_date, self.results['cashflow']['income']['total_income'])
         return self.results
 
 @dataclass
 class AccountsAgent:
-    """Extracts account-level balances (cash) and computes liquidity."""
-    df: pd.DataFrame
+    """Sums account-level balances (cash) for liquidity."""
+    tables: ClientTables
     results: Dict[str, Any] = field(default_factory=dict, init=False)
     def run(self) -> Dict[str, Any]:
-        logging.info('AccountsAgent: extracting account balances')
-        acct_cols = [c for c in self.df.columns if c.startswith('accounts__') and 'holdings' not in c]
-        balances = pd.DataFrame()
-        balance_col = next((c for c in acct_cols if 'balance' in c.lower() or 'current' in c.lower()), None)
+        logger.info('AccountsAgent: extracting account balances')
+        accounts = self.tables.accounts
         total_cash = 0.0
-        if balance_col is not None:
-            total_cash = safe_numeric(self.df[balance_col]).sum()
+        if 'balance' in accounts.columns:
+            total_cash = float(accounts['balance'].sum())
         else:
-            logging.warning('AccountsAgent: no balance-like column found')
-        self.results = {'accounts_cols': acct_cols, 'balance_col': balance_col, 'total_cash': total_cash}
-        logging.info(f"AccountsAgent: total cash = {total_cash:.2f}")
+            logger.warning('AccountsAgent: no balance-like column found')
+        self.results = {'accounts_df': accounts, 'total_cash': total_cash}
+        logger.info("AccountsAgent: total cash = %.2f", total_cash)
         return self.results
 
 @dataclass
 class TaxAgent:
-    """Performs illustrative tax calculations."""
+    """Federal, state and LTCG tax from the bracket tables in agents/mocks/tax_brackets.json."""
     income: Optional[float]
     filing_status: str = 'married_filing_jointly'
+    state: Optional[str] = None
+    year: Optional[int] = None
+    ltcg: float = 0.0
     def run(self) -> Dict[str, Any]:
-        logging.info('TaxAgent: running illustrative tax calc')
-        if self.income is None:
-            return {'federal_tax': None, 'state_tax': None, 'notes': 'No income data for tax calc'}
-        annual_income = float(self.income)
-        brackets = [
-            (0, 20550, 0.10),
-            (20550, 83550, 0.12),
-            (83550, 178150, 0.22),
-            (178150, 340100, 0.24),
-            (340100, 431900, 0.32),
-            (431900, 647850, 0.35),
-            (647850, float('inf'), 0.37),
-        ]
-        standard_deduction = 30000
-        taxable = max(0.0, annual_income - standard_deduction)
-        tax = 0.0
-        for low, high, rate in brackets:
-            if taxable <= low:
-                break
-            taxed_at = min(taxable, high) - low
-            tax += taxed_at * rate
-        state_tax = annual_income * 0.06
-        result = {'federal_tax': tax, 'state_tax': state_tax, 'taxable_income': taxable, 'standard_deduction': standard_deduction}
-        logging.info(f"TaxAgent: federal_tax={tax:.2f} state_tax={state_tax:.2f}")
-        return result
+        return TaxAgent.run_many([self])[0]
+    @staticmethod
+    def run_many(agents: List[TaxAgent]) -> List[Dict[str, Any]]:
+        """run() for each agent, in order, with one compute_tax call per tax year over their incomes."""
+        logger.info('TaxAgent: running illustrative tax calc for %d client(s)', len(agents))
+        results: List[Dict[str, Any]] = [{'federal_tax': None, 'state_tax': None, 'notes': 'No income data for tax calc'}
+                                         for _ in agents]
+        by_year: Dict[Optional[int], List[int]] = {}
+        for i, agent in enumerate(agents):
+            if agent.income is not None:
+                by_year.setdefault(agent.year, []).append(i)
+        for year, positions in by_year.items():
+            group = [agents[i] for i in positions]
+            calc = tax_rules.compute_tax([float(a.income) for a in group],
+                                         filing_status=[a.filing_status for a in group],
+                                         state=[a.state for a in group], year=year, ltcg=[a.ltcg for a in group])
+            for j, (i, agent) in enumerate(zip(positions, group)):
+                result = {k: float(v[j]) for k, v in calc.items()}
+                result.update(filing_status=agent.filing_status, state=agent.state, year=agent.year)
+                results[i] = result
+        return results
 
 @dataclass
 class RiskAgent:
-    """Analyzes concentration and suggests target allocation."""
+    """Analyzes concentration, stress scenarios and suggests target allocation."""
     holdings_info: Dict[str, Any]
     def run(self) -> Dict[str, Any]:
+        return RiskAgent.run_many([self])[0]
+    @staticmethod
+    def run_many(agents: List[RiskAgent]) -> List[Dict[str, Any]]:
+        """run() for each agent, in order, with one risk.risk_report_fields_many over their holdings."""
+        priced = [i for i, a in enumerate(agents) if a.holdings_info.get('total', 0.0) > 0]
+        fields = {}
+        if priced:
+            frames = [agents[i].holdings_info.get('holdings_df', pd.DataFrame()) for i in priced]
+            book = pd.concat(frames, ignore_index=True)
+            book[CLIENT_KEY] = np.repeat(priced, [len(f) for f in frames])
+            fields = risk.risk_report_fields_many(book, CLIENT_KEY)
+        return [agent._assess((fields.get(i) or risk.empty_report_fields()) if i in priced else {})
+                for i, agent in enumerate(agents)]
+    def _assess(self, fields: Dict[str, Any]) -> Dict[str, Any]:
         alloc: pd.DataFrame = self.holdings_info.get('alloc', pd.DataFrame())
         total = self.holdings_info.get('total', 0.0)
         score = 'Unknown'
@@ -183,28 +696,92 @@ class RiskAgent:
             else:
                 score = 'Diversified enough'
                 suggestions.append('No single asset-class concentration detected')
-        return {'risk_score': score, 'suggestions': suggestions}
+        for r in fields.get('concentrations', {}).items():
+            suggestions.append(f'{r[0]} is {r[1]:.1%} of the portfolio (limit {risk.SYMBOL_LIMIT:.0%})')
+        return {'risk_score': score, 'suggestions': suggestions, **fields}
 
 @dataclass
 class ComplianceAgent:
-    """Checks for common reporting flags (foreign assets, missing cost-basis)."""
-    df: pd.DataFrame
+    """Evaluates the policy rules (agents/mocks/compliance_policies.yaml: KYC status, FBAR/FATCA
+    triggers, concentration caps, missing cost basis, ...) on this client's features. `notes` are
+    the redline and condition messages; `decision` is the full ComplianceDecision."""
+    tables: ClientTables
+    kyc_record: Optional[Dict[str, Any]] = None
+    accounts_res: Dict[str, Any] = field(default_factory=dict)
+    holdings_res: Dict[str, Any] = field(default_factory=dict)
+    trans_res: Dict[str, Any] = field(default_factory=dict)
+    risk_res: Dict[str, Any] = field(default_factory=dict)
+    def features(self) -> Dict[str, Any]:
+        profile, accounts = self.tables.profile, self.tables.accounts
+        non_usd = bool(self.tables.currencies) and not all(u.upper() == 'USD' for u in self.tables.currencies)
+        if {'balance', 'currency'} <= set(accounts.columns):
+            foreign = accounts['currency'].astype(str).str.upper() != 'USD'
+            foreign_balance = float(accounts['balance'][foreign & accounts['currency'].notna()].clip(lower=0).sum())
+        else:
+            foreign_balance = None if non_usd else 0.0
+        holdings = self.holdings_res.get('holdings_df', pd.DataFrame())
+        total = float(self.holdings_res.get('total', 0.0) or 0.0)
+        max_position = None
+        if total > 0 and 'symbol' in holdings.columns:
+            max_position = float(holdings.groupby('symbol', observed=True)['market_value'].sum().max() / total)
+        exposures = self.risk_res.get('exposures') or {}
+        cash = float(self.accounts_res.get('total_cash', 0.0) or 0.0)
+        flows = self.trans_res.get('cashflow') or {}
+        monthly_expense = (flows.get('expenses') or {}).get('monthly')
+        return {
+            'filing_status': profile.get('tax_profile__filing_status'),
+            'residency_country': profile.get('profile__residency__country'),
+            'kyc_status': (self.kyc_record or {}).get('status'),
+            'citizenship': profile.get('profile__citizenship'),
+            'age': profile.get('profile__age'),
+            'non_usd_currency': non_usd,
+            'foreign_balance': foreign_balance,
+            'has_cost_basis': self.tables.has_cost_basis,
+            'cash': cash,
+            'portfolio': total,
+            'net_worth': cash + total,
+            'cash_share': cash / (cash + total) if cash + total else None,
+            'max_position_weight': max_position,
+            'max_class_weight': max(exposures.values()) if exposures else None,
+            'holdings_count': len(self.tables.holdings),
+            'transactions_count': len(self.tables.transactions),
+            'monthly_expense': monthly_expense,
+            'liquidity_runway_months': cash / monthly_expense if monthly_expense else None,
+            'savings_rate': flows.get('savings_rate'),
+            'tax_income': flows.get('tax_income'),
+        }
     def run(self) -> Dict[str, Any]:
-        notes = []
-        cur = self.df.get('currency') if 'currency' in self.df.columns else None
-        if cur is not None and cur.dropna().unique().size > 0:
-            unique = cur.dropna().unique().tolist()
-            if not all(u.upper() == 'USD' for u in unique):
-                notes.append('Non-USD currency exposures detected — check FBAR/FATCA triggers for foreign accounts')
-        has_cost = any('cost' in c.lower() or 'basis' in c.lower() for c in self.df.columns)
-        if not has_cost:
-            notes.append('No cost-basis columns present; cannot compute realized/unrealized capital gains precisely')
-        return {'notes': notes}
+        return ComplianceAgent.run_many([self])[0]
+    @staticmethod
+    def run_many(agents: List[ComplianceAgent]) -> List[Dict[str, Any]]:
+        """run() for each agent, in order, with one PolicySet.evaluate over all their features."""
+        decisions = compliance_rules.get_policies().evaluate([a.features() for a in agents])
+        results = []
+        for decision in decisions:
+            notes = [hit['message'] for hit in decision['redlines'] + decision['conditions']]
+            results.append({'notes': notes, 'status': decision['status'], 'decision': decision})
+        logger.info('ComplianceAgent: %d client(s), %d need rework', len(results),
+                    sum(r['status'] == 'ReworkNeeded' for r in results))
+        return results
+
+def _figure(figsize: Tuple[float, float]) -> Figure:
+    # Off-screen Agg canvas: no GUI backend is selected and pyplot is never imported
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
 
 @dataclass
 class ReportAgent:
-    """Generates markdown report and saves CSVs + charts."""
-    output_dir: str
+    """Generates the report (markdown by default; see app.reports.rendering) and saves CSVs + charts.
+
+    `formats` picks the renderers (md, html, json); each lands under 'report_<format>'. With
+    write_files=False nothing touches disk: `run()` returns the rendered reports and matplotlib
+    Figures under the plot keys instead of paths. With charts=False no figures are drawn (and
+    matplotlib is never imported).
+    """
+    output_dir: Optional[str]
     profile: Dict[str, Any]
     accounts_res: Dict[str, Any]
     holdings_res: Dict[str, Any]
@@ -212,290 +789,383 @@ class ReportAgent:
     tax_res: Dict[str, Any]
     risk_res: Dict[str, Any]
     comp_res: Dict[str, Any]
+    write_files: bool = True
+    charts: bool = True
+    formats: Tuple[str, ...] = ('md',)
     def _save_csv(self, df: pd.DataFrame, name: str):
         path = os.path.join(self.output_dir, name)
         df.to_csv(path, index=False)
         return path
-    def _save_plot_allocation(self):
-        alloc = self.holdings_res.get('alloc', pd.DataFrame()).copy()
-        if alloc.empty:
+    def _save_figure(self, fig: Optional[Figure], name: str):
+        # Figures are built through the object API (not pyplot state), so concurrent callers such
+        # as Streamlit sessions never share a current figure.
+        if fig is None or not self.write_files:
+            return fig
+        path = os.path.join(self.output_dir, name)
+        fig.savefig(path, bbox_inches='tight')
+        return path
+    def _plot_allocation(self) -> Optional[Figure]:
+        alloc = self.holdings_res.get('alloc', pd.DataFrame())
+        if alloc.empty or not alloc['market_value'].any():
             return None
-        plt.figure(figsize=(6,6))
-        labels = alloc['asset_class_clean'].astype(str).tolist()
+        fig = _figure((6, 6))
+        ax = fig.subplots()
+        labels = alloc['asset_class'].astype(str).tolist()
         sizes = alloc['market_value'].astype(float).tolist()
-        plt.pie(sizes, labels=labels, autopct='%1.1f%%')
-        plt.title('Portfolio Allocation by Asset Class')
-        path = os.path.join(self.output_dir, 'plot_allocation.png')
-        plt.savefig(path, bbox_inches='tight')
-        plt.close()
-        return path
-    def _save_plot_income_expense(self):
+        ax.pie(sizes, labels=labels, autopct='%1.1f%%')
+        ax.set_title('Portfolio Allocation by Asset Class')
+        return fig
+    def _plot_income_expense(self) -> Figure:
         income = self.trans_res.get('income') or 0.0
         expense = self.trans_res.get('expense') or 0.0
-        plt.figure(figsize=(6,4))
-        plt.bar(['Income','Expense'], [income, expense])
-        plt.title('Income vs Expense (observed period)')
-        plt.ylabel('Amount')
-        path = os.path.join(self.output_dir, 'plot_income_expense.png')
-        plt.savefig(path, bbox_inches='tight')
-        plt.close()
-        return path
+        fig = _figure((6, 4))
+        ax = fig.subplots()
+        ax.bar(['Income','Expense'], [income, expense])
+        ax.set_title('Income vs Expense (observed period)')
+        ax.set_ylabel('Amount')
+        return fig
     def run(self) -> Dict[str, Any]:
-        logging.info('ReportAgent: generating report and saving artifacts')
-        ensure_dir(self.output_dir)
+        logger.info('ReportAgent: generating report%s', ' and saving artifacts' if self.write_files else '')
         holdings_df = self.holdings_res.get('holdings_df', pd.DataFrame())
         alloc_df = self.holdings_res.get('alloc', pd.DataFrame())
         trans_df = self.trans_res.get('transactions_df', pd.DataFrame())
         files = {}
-        if not holdings_df.empty:
-            files['holdings_csv'] = self._save_csv(holdings_df, 'holdings_extracted.csv')
-        if not alloc_df.empty:
-            alloc_saved = alloc_df.copy()
-            alloc_saved['market_value'] = alloc_saved['market_value'].astype(float)
-            files['alloc_csv'] = self._save_csv(alloc_saved, 'alloc.csv')
-        if not trans_df.empty:
-            files['transactions_csv'] = self._save_csv(trans_df, 'transactions_extracted.csv')
-        files['plot_allocation'] = self._save_plot_allocation()
-        files['plot_income_expense'] = self._save_plot_income_expense()
-        # Advanced metrics
-        cash = self.accounts_res.get('total_cash', 0.0)
-        portfolio = self.holdings_res.get('total', 0.0)
-        net_worth = cash + portfolio
-        alloc = alloc_df
-        liquidity_pct = (cash / net_worth * 100) if net_worth else 0.0
-        income = self.trans_res.get('income', 0.0)
-        expense = self.trans_res.get('expense', 0.0)
-        period = self.trans_res.get('period', (None, None))
-        savings = income - expense if income and expense else 0.0
-        savings_rate = (savings / income * 100) if income else 0.0
-        monthly_expense = (expense * 52 / 12) if period and period[0] and period[1] and (pd.to_datetime(period[1]) - pd.to_datetime(period[0])).days + 1 <= 14 else (expense / 12 if expense else 0.0)
-        cash_runway_months = (cash / monthly_expense) if monthly_expense else 0.0
-
-        tmpl = Template(DETAILED_REPORT_TEMPLATE)
-        report_md = tmpl.render(
-            profile=self.profile,
-            accounts=self.accounts_res,
-            holdings=self.holdings_res,
-            transactions=self.trans_res,
-            tax=self.tax_res,
-            risk=self.risk_res,
-            compliance=self.comp_res,
-            files=files,
-            cash=cash,
-            portfolio=portfolio,
-            net_worth=net_worth,
-            liquidity_pct=liquidity_pct,
-            income=income,
-            expense=expense,
-            savings=savings,
-            savings_rate=savings_rate,
-            cash_runway_months=cash_runway_months,
-            alloc=alloc,
-            period=period
-        )
-        report_path = os.path.join(self.output_dir, 'wealth_report.md')
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(report_md)
-        logging.info(f'ReportAgent: saved report to {report_path}')
-        files['report_md'] = report_path
+        if self.write_files:
+            ensure_dir(self.output_dir)
+            if not holdings_df.empty:
+                files['holdings_csv'] = self._save_csv(holdings_df, 'holdings_extracted.csv')
+            if not alloc_df.empty:
+                alloc_saved = alloc_df.copy()
+                alloc_saved['market_value'] = alloc_saved['market_value'].astype(float)
+                files['alloc_csv'] = self._save_csv(alloc_saved, 'alloc.csv')
+            if not trans_df.empty:
+                files['transactions_csv'] = self._save_csv(trans_df, 'transactions_extracted.csv')
+            categories_df = self.trans_res.get('categories', pd.DataFrame())
+            if not categories_df.empty:
+                files['categories_csv'] = self._save_csv(categories_df, 'spend_by_category.csv')
+        if self.charts:
+            with span('ReportAgent.charts'):
+                files['plot_allocation'] = self._save_figure(self._plot_allocation(), 'plot_allocation.png')
+                files['plot_income_expense'] = self._save_figure(self._plot_income_expense(), 'plot_income_expense.png')
+        with span('ReportAgent.render'):
+            view = report_view(self.profile, self.accounts_res, self.holdings_res, self.trans_res,
+                               self.tax_res, self.risk_res, self.comp_res, files)
+            reports = render_report(view, self.formats)
+        for fmt, text in reports.items():
+            if not self.write_files:
+                files[f'report_{fmt}'] = text
+                continue
+            report_path = os.path.join(self.output_dir, f'wealth_report.{EXTENSIONS[fmt]}')
+            with open(report_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            logger.info('ReportAgent: saved report to %s', report_path)
+            files[f'report_{fmt}'] = report_path
         return files
 
-DETAILED_REPORT_TEMPLATE = r"""
-Executive summary
-
-Client: {{ profile.get('profile__name','Unknown') }}, age {{ profile.get('profile__age','Unknown') }}, {{ profile.get('profile__marital_status','Unknown') }}, 1 dependent ({{ profile.get('profile__dependents__name','Unknown') }}, age {{ profile.get('profile__dependents__age','Unknown') }}). (Profile in dataset: US resident, {{ profile.get('profile__residency__state','Unknown') }} — {{ profile.get('profile__residency__city','Unknown') }}.)
-
-Snapshot (observed data in the upload):
-
-Cash / account balances: ${{ '{:,.2f}'.format(cash) }} (USD)
-Portfolio (holdings) market value: ${{ '{:,.2f}'.format(portfolio) }} (USD)
-Estimated Net Worth (cash + portfolio): ${{ '{:,.2f}'.format(net_worth) }} (USD)
-
-Observed transactions (sample period {{ period[0] }} → {{ period[1] }}):
-
-Income (sample week): ${{ '{:,.2f}'.format(income) }}
-Expenses (sample week): ${{ '{:,.2f}'.format(expense) }}
-Savings in that sample week: ${{ '{:,.2f}'.format(savings) }} (savings rate ≈ {{ '{:.1f}'.format(savings_rate) }}% for observed period)
-
-Liquidity: cash is ~{{ '{:.1f}'.format(liquidity_pct) }}% of cash + portfolio.
-Cash runway (using sample-week expenses annualized → monthly): ~{{ '{:.1f}'.format(cash_runway_months) }} months of observed spending covered by cash (very conservative — excellent liquidity).
-
-Portfolio total (from holdings in file): ${{ '{:,.2f}'.format(portfolio) }} (USD). I computed allocation by reported accounts__holdings__asset_class and market values in the file.
-
-Important assumption & data note: the transaction totals provided are for {{ period[0] }}–{{ period[1] }} (one-week sample). Where I annualize (for tax estimates) I make that explicit; please treat annualized figures as illustrative projections unless you confirm income cadence.
-
-1) Financial / portfolio analysis (data-driven)
-Portfolio & cash
-
-Cash balances (sum of accounts__balance): ${{ '{:,.2f}'.format(cash) }}.
-Total holdings (sum of computed market values): ${{ '{:,.2f}'.format(portfolio) }}.
-Net worth (cash + holdings): ${{ '{:,.2f}'.format(net_worth) }}.
-
-Allocation (top asset-class summary)
-
-I derived allocations from accounts__holdings__asset_class and market value computed as quantity × price in the file. A CSV of the allocation and the top holdings is attached (links below).
-(Full allocation CSV attached: alex_alloc_for_report.csv)
-
-Cashflow (observed)
-
-Sample-week totals ({{ period[0] }} → {{ period[1] }}): Income = ${{ '{:,.2f}'.format(income) }}; Expense = ${{ '{:,.2f}'.format(expense) }}.
-
-If that income / expense pattern repeated weekly, the implied annualized income ≈ ${{ '{:,.2f}'.format(income*52) }} and annualized expenses ≈ ${{ '{:,.2f}'.format(expense*52) }}. I use that only for illustrative tax projections below — please confirm cadence (weekly pay, biweekly, monthly, etc.) before relying on annualized tax computations.
-
-Key financial observations
-
-Very strong liquidity: ~{{ '{:.1f}'.format(liquidity_pct) }}% cash and ~{{ '{:.1f}'.format(cash_runway_months) }} months of observed spending covered by cash — ideal for a near-term safety cushion.
-Net worth is moderate/solid for age {{ profile.get('profile__age','Unknown') }}; with high savings rate in the sample period ({{ '{:.1f}'.format(savings_rate) }}% in week observed) — unusually high, worth verifying whether this weekend included a pay cycle.
-No cost-basis data found for many holdings (no CostBasis column present). That restricts precise realized/unrealized-gain tax calculations — we can request broker lot-level export for accurate tax planning.
-
-2) Tax analysis (U.S. federal + California — illustrative estimates)
-
-Because Alex is a U.S. citizen and CA resident, I use federal IRS rules and California guidance for context. Sources used: IRS tax rates pages and IRS 2025 inflation adjustments, IRS capital gains guidance, and California FTB materials. 
-IRS
-+2
-IRS
-+2
-Franchise Tax Board
-
-A — Method & assumptions
-
-Observed income (${{ '{:,.2f}'.format(income) }}) and expense (${{ '{:,.2f}'.format(expense) }}) are for {{ period[0] }}–{{ period[1] }}. For federal tax illustrative projection I annualized income by multiplying weekly gross by 52 → ${{ '{:,.2f}'.format(income*52) }} (illustrative only). If actual pay cadence differs please tell me and I’ll re-run the projection.
-
-Standard deduction (federal) for 2025 (married filing jointly) used: $30,000 (IRS 2025 inflation adjustments). 
-IRS
-
-California (state) standard deduction and tax rules referenced from FTB and state tables. CA standard deduction (2024/2025 filings) for MFJ ≈ $11,080 (CA FTB). 
-Franchise Tax Board
-H&R Block Tax preparation company
-
-B — Rough federal-income-tax illustration (annualized, illustrative)
-
-Annualized gross (observed-week extrapolation): ${{ '{:,.2f}'.format(income*52) }}.
-Taxable income after federal standard deduction ($30,000): ${{ '{:,.2f}'.format(income*52-30000) }}.
-
-Using 2025 federal brackets for married filing jointly, a stepwise calculation gives estimated federal income tax ≈ ${{ '{:,.2f}'.format(tax.get('federal_tax',0.0)) }} (effective federal tax ≈ {{ '{:.1f}'.format((tax.get('federal_tax',0.0)/(income*52))*100 if income else 0.0) }}% of gross). (This is an illustration using published 2025 bracket thresholds.) 
-IRS
-Tax Foundation
-
-C — Rough California state tax (illustrative)
-
-CA taxable income (annualized gross minus CA standard deduction ≈ $11,080) ≈ ${{ '{:,.2f}'.format(income*52-11080) }}.
-
-California is progressive; for this taxable level CA state tax estimate is roughly $10–$15k (approximate effective state rate ~5%–7% for this income band). Use CA Dept. of Revenue / FTB tables for a precise figure, or I can compute exact stepwise state calculation once you confirm annual income cadence. 
-Franchise Tax Board
-Blog
-
-D — Capital gains & investment tax notes
-
-Long-term capital gains rates remain 0%, 15%, 20% depending on taxable income thresholds in 2025. For married filing jointly the 0% → 15% threshold is ~$96,700; 15% → 20% kicks in above $600,050 (2025). Since Alex’s projected taxable income (illustrative) is in the mid-$100ks, capital gains on significant sales may be taxed at 15% (plus potential NIIT). Exact taxes depend on realized gains and holding periods. 
-NerdWallet
-Bankrate
-
-E — Immediate tax opportunities & constraints (recommendations)
-
-Max out pre-tax retirement (401(k)/403(b)/403a, if available) to reduce taxable income today. If employer match exists, capture it. (If you want, I can compute optimal deferral given your pay cadence.)
-Use an HSA (if eligible) — triple tax advantage; consider family HSA to lower taxable income.
-529 plan for child savings — tax-advantaged for education (especially CA-qualified plans for state-level benefits).
-Tax-loss harvesting: since cost-basis is missing, get broker tax-lot exports. If realized gains exist, harvest offsetting losses strategically (avoid wash-sale pitfalls).
-Roth conversion strategy: given current taxable income projections, partial/conservative Roth conversions in low-tax years may be attractive — but needs multi-year modelling.
-Citations used above (federal brackets, standard deduction, capital gains thresholds, CA guidance). 
-IRS
-+1
-NerdWallet
-Franchise Tax Board
-
-3) Risk analysis & portfolio recommendations
-Observed (from file)
-
-I computed asset-class breakdown from accounts__holdings__asset_class. The portfolio value is ${{ '{:,.2f}'.format(portfolio) }}. Exact class weights are in the attached allocation CSV and pie chart.
-
-Quick risk takeaways
-
-Age {{ profile.get('profile__age','Unknown') }} with dependent → long investment horizon; capacity for growth-oriented allocation is present.
-High cash → Alex has the capacity to take longer-term volatility (excess cash could be put to work tax-efficiently).
-Unknown concentration — need to check single-stock exposure (symbol column present in file) — if large single-stock positions exist, consider diversification or hedging.
-
-Suggested target allocations (starter, to discuss vs goals)
-
-Growth & long horizon ({{ profile.get('profile__age','Unknown') }} y/o) — 70–85% equities / 10–25% fixed income / 0–5% alternatives or cash (tweak based on risk tolerance and goals).
-Given current liquidity, consider dollar-cost averaging into diversified ETFs or tax-efficient mutual funds to avoid market-timing risk.
-Add a small bond ladder or short-duration bond funds for stability; use municipal bonds (if in high tax state and taxable account) for tax efficiency.
-
-4) Compliance & reporting checklist (U.S. focus)
-
-FBAR (FinCEN Form 114): if Alex has aggregate foreign account balances > $10,000 at any time in the year — must file FBAR. (Check foreign account exposures.) 
-FinCEN.gov
-
-Form 8938 (FATCA): thresholds vary — for married filing jointly living in the U.S., filing required if specified foreign assets exceed $100,000 on last day or $150,000 at any time during the year (higher thresholds apply if living abroad). 
-IRS
-
-Broker statements & records: obtain tax-lot detail (trade date, quantity, cost basis, realized gain/loss). Without these, accurate capital gains tax and tax-loss harvesting are not possible.
-Document retention: keep 6+ years for tax records; maintain export of brokerage CSVs and annual statements.
-
-5) Immediate, short-term, and medium-term action plan (priority-ranked)
-Immediate (within 7–14 days)
-
-Confirm cadence of income (weekly/biweekly/monthly) so I can replace the “weekly → annualized” assumption for accurate tax projections. (If you prefer, I will assume weekly and proceed; I already used weekly for the illustrative tax calc.)
-Export broker tax-lot data (cost basis, trade dates) for each holding — upload CSV or let me know the broker and I’ll give exact export instructions. This unlocks exact capital-gains, tax-loss harvesting, and realized/unrealized gain calculations.
-Review employer benefits: 401(k) contribution level & match, HSA eligibility, dependent benefits.
-
-Short-term (1–3 months)
-
-Tax optimization: implement pre-tax retirement / HSA contributions for 2025 if appropriate. Consider Roth conversion amounts if taxable profile favors it (I can model scenarios).
-Diversification: if any single holding >10–15% of portfolio, set a plan to reduce concentration over time to target allocation (DCA out).
-Set up automated rebalancing and target allocation buckets.
-
-Medium-term (3–12 months)
-
-Estate & beneficiary review: confirm beneficiary designations and a simple will/trust if desired.
-Education plan: open / fund 529 for Mia if future education is a goal.
-Tax-aware investing: explore municipal bonds or tax-efficient ETFs for taxable accounts.
-"""
-
-def run_pipeline(input_csv: str, output_dir: str, user_id: str = None):
-    ensure_dir(output_dir)
-    data_agent = DataAgent(input_csv)
-    df = data_agent.run(user_id)
-    profile_cols = [c for c in df.columns if c.startswith('profile__')]
-    profile = {}
-    for c in profile_cols:
-        vals = df[c].dropna().unique()
-        profile[c] = vals[0] if len(vals)>0 else None
-    holdings_agent = HoldingsAgent(df=df)
-    holdings_res = holdings_agent.run()
-    accounts_agent = AccountsAgent(df=df)
-    accounts_res = accounts_agent.run()
-    trans_agent = TransactionsAgent(df=df)
-    trans_res = trans_agent.run()
-    income_observed = trans_res.get('income')
-    period = trans_res.get('period')
-    if income_observed and period and period[0] and period[1]:
-        days = (pd.to_datetime(period[1]) - pd.to_datetime(period[0])).days + 1
-        if days <= 14:
-            annual_income = float(income_observed) * 52
-        else:
-            annual_income = float(income_observed)
-    else:
-        annual_income = income_observed
-    tax_agent = TaxAgent(income=annual_income)
-    tax_res = tax_agent.run()
-    risk_agent = RiskAgent(holdings_info=holdings_res)
-    risk_res = risk_agent.run()
-    comp_agent = ComplianceAgent(df=df)
-    comp_res = comp_agent.run()
+@dataclass
+class ClientRun:
+    """One client's agent results, filled in stage by stage: _analyze_clients and _run_engines
+    (once for a block of clients) and _report_client (per client)."""
+    tables: ClientTables
+    kyc_record: Optional[Dict[str, Any]]
+    holdings_res: Dict[str, Any]
+    accounts_res: Dict[str, Any]
+    trans_res: Dict[str, Any] = field(default_factory=dict)
+    tax_res: Dict[str, Any] = field(default_factory=dict)
+    risk_res: Dict[str, Any] = field(default_factory=dict)
+    comp_res: Dict[str, Any] = field(default_factory=dict)
+
+def _analyze_clients(frames: List[pd.DataFrame], prices: Optional[pd.DataFrame] = None,
+                     kyc_records: Optional[List[Optional[Dict[str, Any]]]] = None) -> List[ClientRun]:
+    """The per-client steps for a block of clients' rows: one normalization for the block, then
+    holdings and accounts per client. Missing KYC records are resolved in one lookup for the block."""
+    count('rows_processed', sum(len(df) for df in frames))
+    with span('NormalizeAgent'):
+        block = normalize_block(frames)
+    kyc_records = list(kyc_records or [None] * len(block))
+    missing = [i for i, record in enumerate(kyc_records) if record is None]
+    if missing:
+        found = _kyc_snapshot([block[i].profile.get('profile__user_id') for i in missing])
+        for i in missing:
+            kyc_records[i] = found.get(block[i].profile.get('profile__user_id'))
+    runs = []
+    for tables, kyc_record in zip(block, kyc_records):
+        count('holdings_rows', len(tables.holdings))
+        count('transactions_rows', len(tables.transactions))
+        with span('HoldingsAgent'):
+            holdings_res = HoldingsAgent(tables=tables, prices=prices).run()
+        with span('AccountsAgent'):
+            accounts_res = AccountsAgent(tables=tables).run()
+        runs.append(ClientRun(tables=tables, kyc_record=kyc_record, holdings_res=holdings_res,
+                              accounts_res=accounts_res))
+    return runs
+
+def _tax_agent(run: ClientRun) -> TaxAgent:
+    profile = run.tables.profile
+    tax_year = profile.get('tax_profile__marginal_brackets_hint__federal')
+    return TaxAgent(income=run.trans_res['cashflow']['tax_income'] or None,
+                    filing_status=profile.get('tax_profile__filing_status') or 'married_filing_jointly',
+                    state=profile.get('tax_profile__state'),
+                    year=int(tax_year) if tax_year is not None and not pd.isna(tax_year) else None)
+
+def _run_engines(runs: List[ClientRun]) -> List[ClientRun]:
+    """The book-level steps for a block of clients: one cashflow, one category spend, one tax (per
+    tax year), one risk and one compliance evaluation over all of them, each client getting its
+    row back."""
+    with span('TransactionsAgent'):
+        tables = [r.tables for r in runs]
+        transactions = _stack_clients([t.transactions for t in tables])
+        for run, flows, categories in zip(runs, book_cashflow(tables, transactions), book_category_spend(tables, transactions)):
+            run.trans_res = TransactionsAgent(tables=run.tables, flows=flows, categories=categories).run()
+    with span('TaxAgent'):
+        for run, tax_res in zip(runs, TaxAgent.run_many([_tax_agent(r) for r in runs])):
+            run.tax_res = tax_res
+    with span('RiskAgent'):
+        for run, risk_res in zip(runs, RiskAgent.run_many([RiskAgent(holdings_info=r.holdings_res) for r in runs])):
+            run.risk_res = risk_res
+    with span('ComplianceAgent'):
+        agents = [ComplianceAgent(tables=r.tables, kyc_record=r.kyc_record, accounts_res=r.accounts_res,
+                                  holdings_res=r.holdings_res, trans_res=r.trans_res, risk_res=r.risk_res)
+                  for r in runs]
+        for run, comp_res in zip(runs, ComplianceAgent.run_many(agents)):
+            run.comp_res = comp_res
+    return runs
+
+def _report_client(run: ClientRun, output_dir: Optional[str], write_files: bool = True, charts: bool = True,
+                   formats: Tuple[str, ...] = ('md',)) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    profile, accounts_res, holdings_res = run.tables.profile, run.accounts_res, run.holdings_res
+    trans_res, tax_res, risk_res, comp_res = run.trans_res, run.tax_res, run.risk_res, run.comp_res
     report_agent = ReportAgent(output_dir=output_dir, profile=profile, accounts_res=accounts_res,
                                holdings_res=holdings_res, trans_res=trans_res, tax_res=tax_res,
-                               risk_res=risk_res, comp_res=comp_res)
-    files = report_agent.run()
-    logging.info('Pipeline finished. Artifacts:')
-    for k,v in files.items():
-        logging.info(f' - {k}: {v}')
+                               risk_res=risk_res, comp_res=comp_res, write_files=write_files, charts=charts,
+                               formats=formats)
+    with span('ReportAgent'):
+        files = report_agent.run()
+    cash = accounts_res.get('total_cash', 0.0)
+    portfolio = holdings_res.get('total', 0.0)
+    summary = {
+        'user_id': profile.get('profile__user_id'),
+        'name': profile.get('profile__name'),
+        'kyc_status': (run.kyc_record or {}).get('status'),
+        'cash': cash,
+        'portfolio': portfolio,
+        'net_worth': cash + portfolio,
+        'income': trans_res.get('income'),
+        'expense': trans_res.get('expense'),
+        'annual_income': trans_res['cashflow']['income']['total_income'],
+        'annual_expense': trans_res['cashflow']['expenses']['total_expenses'],
+        'tax_income': trans_res['cashflow']['tax_income'] or None,
+        'federal_tax': tax_res.get('federal_tax'),
+        'state_tax': tax_res.get('state_tax'),
+        'risk_score': risk_res.get('risk_score'),
+        'compliance_status': comp_res.get('status'),
+        'compliance_notes': len(comp_res.get('notes', [])),
+        'report_md': files.get('report_md') if write_files else None,
+    }
+    return files, summary
+
+def run_client(df: pd.DataFrame, output_dir: Optional[str], write_files: bool = True,
+               prices: Optional[pd.DataFrame] = None, charts: bool = True,
+               formats: Tuple[str, ...] = ('md',),
+               kyc_record: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Runs the agent chain for one client's rows. Returns (files, summary row); see ReportAgent
+    for what `files` holds when write_files is False and for `charts` and `formats`. `prices` is a
+    market_data snapshot to revalue holdings against; `kyc_record` is the client's KYC status from a
+    batch lookup (looked up here when not given). Each agent runs in an instrumentation span.
+    Batch mode runs the same stages over blocks of clients (_run_block_job)."""
+    run, = _analyze_clients([df], prices, [kyc_record])
+    _run_engines([run])
+    return _report_client(run, output_dir, write_files=write_files, charts=charts, formats=formats)
+
+def _price_snapshot(symbols: List[str]) -> pd.DataFrame:
+    snapshot = market_data.get_price_service().snapshot(symbols)
+    logger.info("Prices: %d/%d symbols priced in one lookup", len(snapshot), len(symbols))
+    return snapshot
+
+def _kyc_snapshot(user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    records = kyc.get_kyc_service().get_many(user_ids)
+    logger.info("KYC: %d clients resolved in one lookup", len(records))
+    return records
+
+def run_pipeline(input_csv: str, output_dir: Optional[str], user_id: str = None, chunksize: Optional[int] = None,
+                 cache: bool = False, df: Optional[pd.DataFrame] = None, write_files: bool = True,
+                 reprice: bool = False, charts: bool = True, formats: Tuple[str, ...] = ('md',)):
+    """Runs one client end to end. An already-loaded book can be passed as `df` (it is filtered to
+    `user_id`, not re-read); with write_files=False the report and figures come back as objects.
+    With reprice holdings are valued at current market-data prices; charts=False skips the plots and
+    `formats` picks the report renderers (md, html, json).
+
+    `files['metrics']` is the run's instrumentation summary (per-agent wall/CPU seconds, row
+    counters; see app.core.instrumentation), also written to metrics.json with write_files."""
+    with run_metrics('pipeline') as metrics:
+        with span('DataAgent'):
+            if df is None:
+                df = DataAgent(input_csv, chunksize=chunksize, cache=cache).run(user_id)
+            elif user_id and 'profile__user_id' in df.columns:
+                df = df[client_ids(df) == user_id].reset_index(drop=True)
+        prices = _price_snapshot(holding_symbols(df)) if reprice else None
+        files, _ = run_client(df, output_dir, write_files=write_files, prices=prices, charts=charts,
+                              formats=formats)
+    files['metrics'] = metrics.summary()
+    if write_files:
+        with open(os.path.join(output_dir, 'metrics.json'), 'w', encoding='utf-8') as f:
+            json.dump(files['metrics'], f, indent=2)
+        logger.info('Pipeline finished in %.2fs. Artifacts:', files['metrics']['wall_seconds'])
+        for k,v in files.items():
+            if k != 'metrics':
+                logger.info(' - %s: %s', k, v)
     return files
 
+def _run_block_job(block: List[Tuple[str, pd.DataFrame]], output_dir: str,
+                   prices: Optional[pd.DataFrame] = None, charts: bool = True,
+                   formats: Tuple[str, ...] = ('md',)) -> List[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+    """Worker entry point: the agent chain for a block of clients, with normalization, the KYC
+    lookup and the cashflow, tax, risk and compliance engines run once for the whole block
+    (_analyze_clients, _run_engines). Errors are returned, not raised, so one bad client cannot
+    abort the batch; if a block-level step fails, the block's clients are retried one at a time.
+    Each summary row carries the client's wall/CPU seconds, including an equal share of the
+    block-level time."""
+    results: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+    seconds: Dict[str, List[float]] = {uid: [0.0, 0.0] for uid, _ in block}
+    def charge(uids: List[str], metrics):
+        for uid in uids:
+            seconds[uid][0] += metrics.wall_seconds / len(uids)
+            seconds[uid][1] += metrics.cpu_seconds / len(uids)
+    def failed(uid: str, e: Exception):
+        logger.exception('Client %s failed', uid)
+        results[uid] = ({}, {'user_id': uid, 'error': f'{type(e).__name__}: {e}'})
+    def by_block(step, items: Dict[str, Any]) -> Dict[str, Any]:
+        # step(uids, inputs) -> outputs, for the whole block or, if that fails, client by client
+        if not items:
+            return {}
+        try:
+            with run_metrics('block') as metrics:
+                done = dict(zip(items, step(list(items), list(items.values()))))
+        except Exception:
+            logger.exception('Block of %d clients failed; retrying them one at a time', len(items))
+            done = {}
+            for uid, item in items.items():
+                with run_metrics(uid) as client_metrics:
+                    try:
+                        done[uid] = step([uid], [item])[0]
+                    except Exception as e:
+                        failed(uid, e)
+                charge([uid], client_metrics)
+        charge(list(done) or list(items), metrics)
+        return done
+    runs = by_block(lambda uids, frames: _analyze_clients(frames, prices), dict(block))
+    runs = by_block(lambda uids, client_runs: _run_engines(client_runs), runs)
+    for uid, run in runs.items():
+        with run_metrics(uid) as metrics:
+            try:
+                files, summary = _report_client(run, os.path.join(output_dir, uid), charts=charts, formats=formats)
+                summary['user_id'] = uid
+                summary['error'] = None
+                results[uid] = (files, summary)
+            except Exception as e:
+                failed(uid, e)
+        charge([uid], metrics)
+    out = []
+    for uid, _ in block:
+        files, summary = results[uid]
+        summary['wall_seconds'], summary['cpu_seconds'] = seconds[uid]
+        out.append((uid, files, summary))
+    return out
+
+def _blocks(groups: Iterator[Tuple[str, pd.DataFrame]], size: int) -> Iterator[List[Tuple[str, pd.DataFrame]]]:
+    block: List[Tuple[str, pd.DataFrame]] = []
+    for item in groups:
+        block.append(item)
+        if len(block) >= size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+def run_all_users(input_csv: str, output_dir: str, workers: int = 1, chunksize: Optional[int] = None, cache: bool = False,
+                  reprice: bool = False, charts: bool = True, formats: Tuple[str, ...] = ('md',),
+                  block_size: Optional[int] = None) -> pd.DataFrame:
+    """Batch mode: one read of the CSV, one output directory per client plus summary.csv.
+
+    Clients are processed in blocks of `block_size` (default CLIENT_BLOCK_SIZE, capped so every
+    worker gets a block unless the file is streamed): normalization, the KYC lookup and the
+    cashflow, tax, risk and compliance engines run once per block (_run_block_job). With
+    workers > 1 the blocks are fanned out over a ProcessPoolExecutor; only the block's row slices
+    are sent to the workers. With chunksize the file is streamed and at most 2 * workers blocks
+    are in flight. With reprice the distinct symbols of the whole book are priced in one lookup
+    and every client is revalued against that snapshot; charts=False skips the plots and `formats`
+    picks the report renderers. The per-client `files` dicts are kept in `summary.attrs['files']`.
+    """
+    ensure_dir(output_dir)
+    data_agent = DataAgent(input_csv, chunksize=chunksize, cache=cache)
+    streaming = bool(chunksize) and not cache
+    if not streaming:
+        # loaded once here; symbols() and groups() reuse the frame
+        data_agent.run()
+    prices = _price_snapshot(data_agent.symbols()) if reprice else None
+    if block_size is None:
+        block_size = CLIENT_BLOCK_SIZE
+        if not streaming and workers > 1 and 'profile__user_id' in data_agent.df.columns:
+            block_size = min(block_size, -(-client_ids(data_agent.df).nunique() // workers))
+    blocks = _blocks(data_agent.groups(), max(block_size, 1))
+    started = time.perf_counter()
+    results: List[Tuple[str, Dict[str, Any], Dict[str, Any]]] = []
+    if workers <= 1:
+        for block in blocks:
+            results.extend(_run_block_job(block, output_dir, prices, charts, formats))
+    else:
+        order: List[str] = []
+        by_uid: Dict[str, Tuple[str, Dict[str, Any], Dict[str, Any]]] = {}
+        def collect(done):
+            for fut in done:
+                uids = pending.pop(fut)
+                try:
+                    by_uid.update((uid, result) for uid, result in zip(uids, fut.result()))
+                except Exception as e:
+                    # the worker process itself died (e.g. killed, unpicklable result)
+                    logger.error('Block of clients %s..%s worker failed: %s', uids[0], uids[-1], e)
+                    for uid in uids:
+                        by_uid[uid] = (uid, {}, {'user_id': uid, 'error': f'{type(e).__name__}: {e}'})
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = {}
+            for block in blocks:
+                if len(pending) >= 2 * workers:
+                    collect(wait(pending, return_when=FIRST_COMPLETED).done)
+                uids = [uid for uid, _ in block]
+                order.extend(uids)
+                pending[pool.submit(_run_block_job, block, output_dir, prices, charts, formats)] = uids
+            collect(wait(pending).done)
+        results = [by_uid[uid] for uid in order]
+    elapsed = time.perf_counter() - started
+    summary_df = pd.DataFrame([summary for _, _, summary in results])
+    summary_df.attrs['files'] = {uid: files for uid, files, _ in results}
+    summary_path = os.path.join(output_dir, 'summary.csv')
+    summary_df.to_csv(summary_path, index=False)
+    failed = int(summary_df['error'].notna().sum()) if 'error' in summary_df.columns else 0
+    throughput = len(results) / elapsed if elapsed > 0 else float('inf')
+    logger.info('Batch finished: clients=%d failed=%d workers=%d elapsed=%.2fs throughput=%.2f clients/sec summary=%s',
+                len(results), failed, max(workers, 1), elapsed, throughput, summary_path)
+    return summary_df
+
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
     parser = argparse.ArgumentParser(description='Run multi-agent wealth manager pipeline')
     parser.add_argument('--input', required=True, help='Input CSV path')
     parser.add_argument('--output', default='./output', help='Output directory')
     parser.add_argument('--user_id', required=False, help='User ID to analyze (e.g., u_1001)')
+    parser.add_argument('--all-users', action='store_true', help='Analyze every profile__user_id in the file (one subdirectory per client)')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for --all-users (default 1 = in-process)')
+    parser.add_argument('--block-size', type=int, default=None, help='Clients per --all-users block; the cashflow, tax, risk and compliance engines run once per block (default: up to 256, spread over the workers)')
+    parser.add_argument('--chunksize', type=int, default=None, help='Stream the CSV in chunks of this many rows (bounds memory by the largest client)')
+    parser.add_argument('--cache', action='store_true', help='Load via a Parquet cache next to the input (needs pyarrow; rebuilt when the file changes)')
+    parser.add_argument('--reprice', action='store_true', help='Value holdings at current market-data prices (MARKET_DATA_PROVIDER) instead of the exported price')
+    parser.add_argument('--no-charts', dest='charts', action='store_false', help='Skip the matplotlib charts (matplotlib is then never imported)')
+    parser.add_argument('--formats', default='md', help='Comma-separated report formats to render: md, html, json (default md)')
     args = parser.parse_args()
-    run_pipeline(args.input, args.output, args.user_id)
+    formats = tuple(f.strip() for f in args.formats.split(',') if f.strip())
+    if args.all_users:
+        run_all_users(args.input, args.output, workers=args.workers, chunksize=args.chunksize, cache=args.cache,
+                      reprice=args.reprice, charts=args.charts, formats=formats, block_size=args.block_size)
+    else:
+        run_pipeline(args.input, args.output, args.user_id, chunksize=args.chunksize, cache=args.cache,
+                     reprice=args.reprice, charts=args.charts, formats=formats)
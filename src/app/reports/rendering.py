@@ -0,0 +1,198 @@
+"""
+Report rendering.
+
+`report_view()` turns the agents' results into a view-model once per client: the derived metrics
+(net worth, savings rate, runway, annualized figures, spend by category, effective tax rate, ...) as raw numbers
+under "metrics" and as display strings under "f", plus the allocation, risk and compliance
+details. Renderers only substitute those values:
+
+  md    templates/wealth_report.md.j2 (the client report)
+  html  templates/wealth_report.html.j2 (autoescaped)
+  json  the view-model's raw values
+
+Templates come from one module-level Jinja Environment: each is compiled on first use and kept in
+the environment's cache, and the compiled bytecode is cached on disk under
+REPORT_BYTECODE_CACHE_DIR so new processes (batch workers) skip the compile step too.
+"""
+import json
+import math
+import os
+import threading
+
+from app.config import settings
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+TEMPLATES = {"md": "wealth_report.md.j2", "html": "wealth_report.html.j2"}
+EXTENSIONS = {"md": "md", "html": "html", "json": "json"}
+FORMATS = tuple(EXTENSIONS)
+
+_env = None
+_env_lock = threading.Lock()
+
+
+def get_environment():
+    """The shared Environment (jinja2 is imported on first call)."""
+    global _env
+    with _env_lock:
+        if _env is None:
+            from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+            bytecode_cache = None
+            if settings.REPORT_BYTECODE_CACHE_DIR:
+                os.makedirs(settings.REPORT_BYTECODE_CACHE_DIR, exist_ok=True)
+                bytecode_cache = FileSystemBytecodeCache(settings.REPORT_BYTECODE_CACHE_DIR)
+            _env = Environment(
+                loader=FileSystemLoader(TEMPLATES_DIR),
+                bytecode_cache=bytecode_cache,
+                autoescape=select_autoescape(["html", "html.j2"]),
+                auto_reload=False,
+                cache_size=-1,
+            )
+        return _env
+
+
+def _number(value):
+    # None / NaN / non-numeric -> 0.0, numpy scalars -> float
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(value) else value
+
+
+def _money(value, decimals=2):
+    return f"{value:,.{decimals}f}"
+
+
+def _profile(profile, key):
+    return profile.get(key, "Unknown")
+
+
+def _date(value):
+    # pandas Timestamps print as "2025-08-09 00:00:00", like the original template
+    return str(value)
+
+
+def report_view(profile, accounts, holdings, transactions, tax, risk, compliance, files=None):
+    """View-model for one client's report; see the module docstring."""
+    cash = _number(accounts.get("total_cash", 0.0))
+    portfolio = _number(holdings.get("total", 0.0))
+    net_worth = cash + portfolio
+    income = _number(transactions.get("income"))
+    expense = _number(transactions.get("expense"))
+    period = transactions.get("period") or (None, None)
+    savings = income - expense if income and expense else 0.0
+    # annualized figures come from the cashflow engine (TransactionsAgent, tools/cashflow.py)
+    cashflow = transactions.get("cashflow") or {}
+    cf_income, cf_expenses = cashflow.get("income") or {}, cashflow.get("expenses") or {}
+    income_streams = [s for s in cashflow.get("streams") or [] if s["direction"] == "income"]
+    annual_income = _number(cf_income.get("total_income"))
+    monthly_expense = _number(cf_expenses.get("monthly"))
+    tax_income = _number(cashflow.get("tax_income"))
+    federal_tax = _number(tax.get("federal_tax"))
+    metrics = {
+        "cash": cash,
+        "portfolio": portfolio,
+        "net_worth": net_worth,
+        "liquidity_pct": cash / net_worth * 100 if net_worth else 0.0,
+        "income": income,
+        "expense": expense,
+        "savings": savings,
+        "savings_rate": savings / income * 100 if income else 0.0,
+        "cash_runway_months": cash / monthly_expense if monthly_expense else 0.0,
+        "annual_income": annual_income,
+        "annual_expense": _number(cf_expenses.get("total_expenses")),
+        "monthly_expense": monthly_expense,
+        "tax_income": tax_income,
+        "federal_tax": federal_tax,
+        "state_tax": _number(tax.get("state_tax")),
+        "taxable_income": _number(tax.get("taxable_income")),
+        "state_taxable_income": _number(tax.get("state_taxable_income")),
+        "standard_deduction": _number(tax.get("standard_deduction")),
+        "effective_federal_rate": federal_tax / tax_income * 100 if tax_income else 0.0,
+    }
+    concentrations = risk.get("concentrations") or {}
+    stress = risk.get("stress_results") or []
+    worst = min(stress, key=lambda s: s["pnl_pct"]) if stress else None
+    categories = transactions.get("categories")
+    spending = [] if categories is None or len(categories) == 0 else [
+        {"category": str(c), "spend": float(v), "share": float(p)}
+        for c, v, p in zip(categories["category"], categories["spend"], categories["share"]) if v > 0
+    ]
+    alloc = holdings.get("alloc")
+    allocation = [] if alloc is None or len(alloc) == 0 else [
+        {"asset_class": str(a), "market_value": float(v), "pct": float(p)}
+        for a, v, p in zip(alloc["asset_class"], alloc["market_value"], alloc["Pct"])
+    ]
+    m = metrics
+    return {
+        "client": {
+            "user_id": profile.get("profile__user_id"),
+            "name": _profile(profile, "profile__name"),
+            "age": _profile(profile, "profile__age"),
+            "marital_status": _profile(profile, "profile__marital_status"),
+            "dependent_name": _profile(profile, "profile__dependents__name"),
+            "dependent_age": _profile(profile, "profile__dependents__age"),
+            "state": _profile(profile, "profile__residency__state"),
+            "city": _profile(profile, "profile__residency__city"),
+        },
+        "period": [None if p is None else _date(p) for p in period],
+        "metrics": metrics,
+        "cashflow": cashflow,
+        "tax": {"year": tax.get("year"), "filing_status": tax.get("filing_status"), "state": tax.get("state")},
+        "allocation": allocation,
+        "spending": spending,
+        "concentrations": {str(k): float(v) for k, v in concentrations.items()},
+        "worst_stress": None if worst is None else
+            {"scenario": worst["scenario"], "pnl_pct": float(worst["pnl_pct"]), "pnl": float(worst["pnl"])},
+        "risk_score": risk.get("risk_score"),
+        "compliance_status": compliance.get("status"),
+        "compliance_notes": list(compliance.get("notes", [])),
+        "disclosures": list((compliance.get("decision") or {}).get("disclosures", [])),
+        "files": {k: v for k, v in (files or {}).items() if isinstance(v, str)},
+        "f": {
+            **{k: _money(m[k]) for k in ("cash", "portfolio", "net_worth", "income", "expense", "savings",
+                                          "annual_income", "annual_expense", "monthly_expense", "tax_income",
+                                          "federal_tax", "state_tax", "taxable_income", "state_taxable_income")},
+            **{k: f"{m[k]:.1f}" for k in ("savings_rate", "liquidity_pct", "cash_runway_months",
+                                         "effective_federal_rate")},
+            "standard_deduction": _money(m["standard_deduction"], 0),
+            "income_cadence": ", ".join(f"{s['label'] or s['account_id'] or 'income'} {s['cadence']}"
+                                        for s in income_streams) or "no income observed",
+            "tax_basis": "declared gross salary" if _number(cf_income.get("employment_gross")) > 0
+                         else "annualized cashflow",
+            "period_start": _date(period[0]),
+            "period_end": _date(period[1]),
+            "tax_year": tax.get("year"),
+            "filing_status": (tax.get("filing_status") or "married_filing_jointly").replace("_", " "),
+            "tax_state": tax.get("state") or "State",
+            "spending": "; ".join(f"{s['category']} ${s['spend']:,.2f} ({s['share']:.0%})" for s in spending),
+            "concentrations": ", ".join(f"{k} {v:.1%}" for k, v in concentrations.items()),
+            "worst_stress": None if worst is None else
+                f"{worst['scenario']} ≈ {worst['pnl_pct']:.1%} (${worst['pnl']:,.0f})",
+        },
+    }
+
+
+def _template_renderer(name):
+    def render(view):
+        return get_environment().get_template(name).render(view)
+    return render
+
+
+def _render_json(view):
+    return json.dumps({k: v for k, v in view.items() if k != "f"}, indent=2, default=str)
+
+
+RENDERERS = {
+    "md": _template_renderer(TEMPLATES["md"]),
+    "html": _template_renderer(TEMPLATES["html"]),
+    "json": _render_json,
+}
+
+
+def render_report(view, formats=("md",)):
+    """{format: rendered text} for the requested formats only."""
+    unknown = [f for f in formats if f not in RENDERERS]
+    if unknown:
+        raise ValueError(f"unknown report format(s) {unknown}; expected some of {list(RENDERERS)}")
+    return {fmt: RENDERERS[fmt](view) for fmt in formats}
@@ -7,6 +7,7 @@ class ClientProfile(BaseModel):
     currency: str
     identity: Dict[str, Any]
     preferences: Dict[str, Any]
+    kyc: Dict[str, Any] = Field(default_factory=dict)
     rationale: str
     data_lineage: Dict[str, Any]
     missing_fields: List[str]
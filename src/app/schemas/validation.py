@@ -0,0 +1,94 @@
+"""
+Artifact validation with validators compiled once per process.
+
+For every contract in app.schemas.models two pydantic-core validators are built when this module is
+imported, not per artifact:
+
+  fast    (default) a TypeAdapter over a TypedDict with the model's fields: validates a plain dict
+          in lax mode (the model's coercions, e.g. "1.5" -> 1.5) and returns a plain dict in one
+          pass, without building a model instance and dumping it again. Fields with a default
+          are optional and filled in afterwards.
+  strict  a TypeAdapter over the model itself with strict=True (no coercion: a wrong type is an
+          error), dumped with model_dump semantics. Slower; for tests and debugging.
+
+ARTIFACT_VALIDATION picks the mode. Both raise pydantic.ValidationError.
+
+Artifacts are validated once, by the step that produces them (`artifact(Model, **fields)`), and
+come back as a ValidatedArtifact: a dict tagged with its contract. `validate()` passes an
+artifact already tagged with the requested contract straight through, so consumers downstream
+(other steps, the store, the API) never pay for validation again.
+"""
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import NotRequired, TypedDict
+
+from app.config.settings import ARTIFACT_VALIDATION
+from app.schemas import models
+
+MODES = ("fast", "strict")
+
+
+class ValidatedArtifact(dict):
+    """A validated artifact: a plain dict tagged with the contract it satisfies."""
+
+    __slots__ = ("contract",)
+
+    def __init__(self, data, contract):
+        super().__init__(data)
+        self.contract = contract
+
+    def __reduce__(self):
+        return ValidatedArtifact, (dict(self), self.contract)
+
+
+class ContractValidator:
+    """The compiled fast and strict validators for one model."""
+
+    def __init__(self, model):
+        self.model = model
+        self.name = model.__name__
+        fields, self.defaults = {}, {}
+        for name, info in model.model_fields.items():
+            if info.is_required():
+                fields[name] = info.annotation
+            else:
+                fields[name] = NotRequired[info.annotation]
+                self.defaults[name] = info
+        self._fast = TypeAdapter(TypedDict(f"{self.name}Fields", fields))
+        self._strict = TypeAdapter(model)
+
+    def validate(self, data, mode=None):
+        mode = mode or ARTIFACT_VALIDATION
+        if mode == "fast":
+            out = self._fast.validate_python(data)
+            for name, info in self.defaults.items():
+                if name not in out:
+                    out[name] = info.get_default(call_default_factory=True)
+        elif mode == "strict":
+            out = self._strict.dump_python(self._strict.validate_python(data, strict=True))
+        else:
+            raise ValueError(f"unknown validation mode {mode!r}; expected one of {MODES}")
+        return ValidatedArtifact(out, self.name)
+
+
+VALIDATORS = {
+    name: ContractValidator(model) for name, model in vars(models).items()
+    if isinstance(model, type) and issubclass(model, BaseModel) and model.__module__ == models.__name__
+}
+
+
+def get_validator(contract):
+    """Validator for a model class or contract name."""
+    return VALIDATORS[contract if isinstance(contract, str) else contract.__name__]
+
+
+def validate(contract, data, mode=None):
+    """`data` as a ValidatedArtifact of `contract`; one that already is passes through unchanged."""
+    validator = get_validator(contract)
+    if isinstance(data, ValidatedArtifact) and data.contract == validator.name:
+        return data
+    return validator.validate(data, mode)
+
+
+def artifact(contract, **fields):
+    """A step's output: `fields` validated once against `contract`."""
+    return get_validator(contract).validate(fields)
@@ -1,11 +1,14 @@
+from app.storage.store import get_store
+
+
 class MemoryStore:
-    _store = {}
+    """Instance facade over the shared artifact store; kept for existing callers."""
 
     def set(self, case_id, name, data):
-        self._store.setdefault(case_id, {})[name] = data
+        return get_store().set(case_id, name, data)
 
     def get(self, case_id, name):
-        return self._store.get(case_id, {}).get(name)
+        return get_store().get(case_id, name)
 
     def to_dict(self, case_id):
-        return self._store.get(case_id, {})
+        return get_store().to_dict(case_id)
@@ -1,7 +1,193 @@
-# Stub for Postgres/S3 persistence
+# SQLite artifact persistence (stand-in for Postgres)
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from app.config import settings
+
+
+class SQLiteArtifactStore:
+    """Versioned artifact store: zlib-compressed JSON blobs keyed by (case_id, name, version).
+
+    Every `set_many` is one run: all of its artifacts share a new version number and are written
+    in one transaction. Reads return the latest version through a bounded LRU cache (returned
+    objects are shared with the cache; do not mutate them). Retention keeps the newest
+    `max_versions` runs per case, drops runs older than `retention_seconds` and, beyond
+    `max_cases`, the least recently written cases (tracked in an indexed `cases` table, so pruning
+    does not scan the artifacts). Cached reads of every case retention touches are evicted.
+    """
+
+    def __init__(self, path=None, cache_size=None, max_versions=None, retention_seconds=None, max_cases=None):
+        self.path = path or settings.ARTIFACT_DB_PATH
+        self.cache_size = settings.ARTIFACT_CACHE_SIZE if cache_size is None else cache_size
+        self.max_versions = settings.ARTIFACT_MAX_VERSIONS if max_versions is None else max_versions
+        self.retention_seconds = settings.ARTIFACT_RETENTION_SECONDS if retention_seconds is None else retention_seconds
+        self.max_cases = settings.ARTIFACT_MAX_CASES if max_cases is None else max_cases
+        if self.path != ":memory:" and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            " case_id TEXT, name TEXT, version INTEGER, created_at REAL, blob BLOB,"
+            " PRIMARY KEY (case_id, name, version))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS artifacts_created ON artifacts(created_at)")
+        if self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'cases'").fetchone() is None:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS cases (case_id TEXT PRIMARY KEY, last_written REAL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cases_written ON cases(last_written)")
+            # stores written before the table existed
+            self._conn.execute("INSERT OR IGNORE INTO cases SELECT case_id, MAX(created_at) FROM artifacts"
+                               " GROUP BY case_id")
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def _encode(data):
+        return zlib.compress(json.dumps(data, separators=(",", ":"), default=str).encode("utf-8"))
+
+    @staticmethod
+    def _decode(blob):
+        return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+    def _cache_put(self, key, value):
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def set_many(self, case_id, artifacts):
+        """Writes one run's artifacts in a single transaction; returns the run's version."""
+        now = time.time()
+        rows = [(name, self._encode(data)) for name, data in artifacts.items()]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = self._conn.execute(
+                    "SELECT COALESCE(MAX(version), 0) + 1 FROM artifacts WHERE case_id = ?", (case_id,)
+                ).fetchone()[0]
+                self._conn.executemany(
+                    "INSERT INTO artifacts VALUES (?, ?, ?, ?, ?)",
+                    [(case_id, name, version, now, blob) for name, blob in rows],
+                )
+                self._conn.execute("INSERT OR REPLACE INTO cases VALUES (?, ?)", (case_id, now))
+                touched = self._apply_retention(case_id, version, now)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            touched.add(case_id)
+            for key in [k for k in self._cache if k[0] in touched]:
+                del self._cache[key]
+        return version
+
+    def set(self, case_id, name, data):
+        return self.set_many(case_id, {name: data})
+
+    def _apply_retention(self, case_id, version, now):
+        """Deletes what retention drops; returns the other cases whose artifacts it deleted."""
+        touched = set()
+        if self.max_versions:
+            self._conn.execute("DELETE FROM artifacts WHERE case_id = ? AND version <= ?",
+                               (case_id, version - self.max_versions))
+        if self.retention_seconds:
+            cutoff = now - self.retention_seconds
+            touched.update(c for (c,) in self._conn.execute(
+                "SELECT DISTINCT case_id FROM artifacts WHERE created_at < ?", (cutoff,)))
+            self._conn.execute("DELETE FROM artifacts WHERE created_at < ?", (cutoff,))
+            self._conn.execute("DELETE FROM cases WHERE last_written < ?", (cutoff,))
+        if self.max_cases and version == 1:
+            # the case count only grows when a case is first written
+            dropped = [c for (c,) in self._conn.execute(
+                "SELECT case_id FROM cases ORDER BY last_written DESC LIMIT -1 OFFSET ?", (self.max_cases,))]
+            self._conn.executemany("DELETE FROM artifacts WHERE case_id = ?", [(c,) for c in dropped])
+            self._conn.executemany("DELETE FROM cases WHERE case_id = ?", [(c,) for c in dropped])
+            touched.update(dropped)
+        return touched
+
+    def get(self, case_id, name, version=None):
+        if version is None:
+            with self._lock:
+                if (case_id, name) in self._cache:
+                    self.hits += 1
+                    self._cache.move_to_end((case_id, name))
+                    return self._cache[(case_id, name)]
+                self.misses += 1
+                row = self._conn.execute(
+                    "SELECT blob FROM artifacts WHERE case_id = ? AND name = ? ORDER BY version DESC LIMIT 1",
+                    (case_id, name),
+                ).fetchone()
+                value = None if row is None else self._decode(row[0])
+                if value is not None:
+                    self._cache_put((case_id, name), value)
+                return value
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT blob FROM artifacts WHERE case_id = ? AND name = ? AND version = ?", (case_id, name, version)
+            ).fetchone()
+        return None if row is None else self._decode(row[0])
+
+    def to_dict(self, case_id, version=None, internal=False):
+        """Latest version of every artifact of a case (or exactly one run's artifacts). Names
+        starting with "__" (run bookkeeping) are left out unless `internal`."""
+        with self._lock:
+            if version is None:
+                rows = self._conn.execute(
+                    "SELECT name, blob FROM artifacts a WHERE case_id = ? AND version ="
+                    " (SELECT MAX(version) FROM artifacts b WHERE b.case_id = a.case_id AND b.name = a.name)",
+                    (case_id,),
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT name, blob FROM artifacts WHERE case_id = ? AND version = ?", (case_id, version)
+                ).fetchall()
+        return {name: self._decode(blob) for name, blob in rows if internal or not name.startswith("__")}
+
+    def versions(self, case_id, name=None):
+        query = "SELECT DISTINCT version FROM artifacts WHERE case_id = ?"
+        params = (case_id,)
+        if name is not None:
+            query += " AND name = ?"
+            params += (name,)
+        with self._lock:
+            return [v for (v,) in self._conn.execute(query + " ORDER BY version", params)]
+
+    def stats(self):
+        with self._lock:
+            cases, rows, size = self._conn.execute(
+                "SELECT COUNT(DISTINCT case_id), COUNT(*), COALESCE(SUM(LENGTH(blob)), 0) FROM artifacts"
+            ).fetchone()
+            return {"cases": cases, "artifacts": rows, "compressed_bytes": size,
+                    "cache_entries": len(self._cache), "cache_hits": self.hits, "cache_misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM artifacts")
+            self._conn.execute("DELETE FROM cases")
+            self._cache.clear()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SQLiteArtifactStore()
+        return _store
+
 
 def save_artifacts(case_id, artifacts):
-    pass
+    return get_store().set_many(case_id, artifacts)
+
 
 def get_artifacts(case_id):
-    pass
+    return get_store().to_dict(case_id)
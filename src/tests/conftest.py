@@ -0,0 +1,7 @@
+import os
+
+# Tests run offline against the deterministic stub LLM unless a provider is chosen explicitly
+os.environ.setdefault("LLM_PROVIDER", "stub")
+os.environ.setdefault("LLM_CACHE_PATH", ":memory:")
+os.environ.setdefault("ARTIFACT_DB_PATH", ":memory:")
+os.environ.setdefault("KYC_DB_PATH", ":memory:")
@@ -0,0 +1,74 @@
+def _book():
+    import pandas as pd
+    tx = pd.DataFrame({
+        "client": ["a"] * 6 + ["b"] * 2,
+        "date": pd.to_datetime(["2025-07-04", "2025-07-18", "2025-08-01", "2025-07-01", "2025-08-01", "2025-07-10",
+                                "2025-08-04", "2025-08-06"]),
+        "account_id": ["chk"] * 6 + ["b_chk"] * 2,
+        "merchant": ["ACME payroll"] * 3 + ["Rent", "Rent", "Costco", "Uber", "Rent"],
+        "amount": [3500.0, 3500.0, 3500.0, -2000.0, -2000.0, -300.0, -40.0, -550.0],
+    })
+    recurring = pd.DataFrame({"client": ["a", "a"], "name": ["Rent", "Savings sweep"], "amount": [2000.0, 500.0],
+                              "frequency": ["Monthly", "monthly"], "from_account_id": ["chk", "chk"],
+                              "to_account_id": [None, "sav"]})
+    employment = pd.DataFrame({"client": ["a", "b", "b"], "salary_gross_annual": [120000.0, 90000.0, 30000.0],
+                               "pay_frequency": ["biweekly", "semi-monthly", None]})
+    return tx, recurring, employment
+
+
+def test_cadence_detection_and_annualization_over_a_book():
+    from pytest import approx
+    from app.agents.tools import cashflow
+    tx, recurring, employment = _book()
+    result = cashflow.compute_cashflow(tx, recurring, employment, client_col="client")
+    summary = result["summary"]
+    assert list(summary.index) == ["a", "b"]
+    streams = result["streams"].set_index(["client_id", "merchant", "name"])
+    assert streams.loc[("a", "ACME payroll", ""), "cadence"] == "biweekly"
+    assert streams.loc[("a", "ACME payroll", ""), "annual"] == 3500 * 26
+    # the declared rent replaces the matching transaction stream; the transfer is not cashflow
+    assert ("a", "Rent", "") not in streams.index and ("a", "", "Rent") in streams.index
+    a, b = summary.loc["a"], summary.loc["b"]
+    assert a["annual_income"] == 91000 and a["expense_recurring"] == 24000
+    assert a["annual_expense"] == approx(24000 + 300 * 365 / 32) and a["window_days"] == 32
+    assert a["tax_income"] == 120000 and b["tax_income"] == 120000
+    # b: one-off expenses over a 3-day window scale as a week
+    assert b["annual_expense"] == approx(590 * 365 / 7) and b["annual_income"] == 0 and b["pay_frequency"] == "semi-monthly"
+    monthly = result["monthly"]
+    assert monthly.loc[monthly["client_id"] == "a", "income"].tolist() == [7000.0, 3500.0]
+
+
+def test_single_client_baseline_and_nested_input():
+    import json
+    from app.agents.tools import cashflow
+    tx, recurring, employment = _book()
+    one = cashflow.compute_cashflow(tx[tx["client"] == "a"], recurring, employment[employment["client"] == "a"])
+    book = cashflow.compute_cashflow(tx, recurring, employment, client_col="client")
+    assert one["summary"].loc["all"].drop("pay_frequency").tolist() == book["summary"].loc["a"].drop("pay_frequency").tolist()
+
+    with open("src/app/agents/mocks/client_input_alex_from_csv.json") as f:
+        client_input = json.load(f)
+    baseline = cashflow.cashflow_from_input({**client_input, "transactions": [
+        {"date": "2025-08-01", "account_id": "chk", "amount": 4200, "merchant": "Payroll"},
+        {"date": "2025-08-03", "account_id": "chk", "amount": -80.5, "merchant": "Grocer"},
+    ]})
+    json.dumps(baseline)
+    assert baseline["income"]["total_income"] == 4200 * 26  # single paycheck at the declared biweekly cadence
+    assert baseline["tax_income"] == 145000 + 10000 + 52000
+    assert baseline["observed_period"] == ["2025-08-01", "2025-08-03"]
+    assert cashflow.cashflow_from_input({})["net_cashflow"] == 0.0
+
+
+def test_pipeline_and_graph_use_the_cashflow_engine():
+    from pytest import approx
+    from app.agents import graph
+    from app.multi_agent_wealth_manager import run_pipeline
+    files = run_pipeline("synthetic_training_data.csv", None, "u_2001", write_files=False, charts=False,
+                         formats=("md", "json"))
+    assert "Jordan Paycheck biweekly" in files["report_md"] and "annualized cashflow" not in files["report_md"]
+    plan = graph._planning("case_cf", {"employment": {"salary_gross_annual": 100000},
+                                       "transactions": [{"date": "2025-08-01", "amount": -700.0}]}, {})
+    assert plan["baseline_cashflow"]["expenses"]["total_expenses"] == approx(700 * 365 / 7)
+    assert plan["savings_withdrawals"]["annual_savings"] == approx(-700 * 365 / 7)
+    tax = graph._tax("case_cf", {"tax_profile": {"filing_status": "single", "state": "CA"}}, {"PlanSet": plan})
+    assert tax["expected_tax_impact"]["gross_income"] == 100000 and tax["expected_tax_impact"]["federal_tax"] > 0
@@ -0,0 +1,64 @@
+def test_rule_precedence_and_normalization():
+    from app.agents.tools.categorize import MerchantIndex
+    index = MerchantIndex({
+        "default": "Other",
+        "exact": {"Uber": "Rideshare"},
+        "prefix": {"Uber": "Transport", "Uber Eats": "Dining", "Trader Joe": "Groceries"},
+        "regex": [[r"\bpizza\b", "Dining"], [r"\bjoe\b", "People"]],
+    })
+    assert index.lookup("UBER") == "Rideshare"               # exact beats prefix
+    assert index.lookup("Uber   Trip 42") == "Transport"
+    assert index.lookup("UBER EATS*1234") == "Dining"        # longest prefix wins
+    assert index.lookup("Ubertino") == "Other"               # prefixes match whole words
+    assert index.lookup("TRADER JOE'S #552") == "Groceries"  # prefix beats regex
+    assert index.lookup("Joe's Pizza") == "Dining"           # first regex in file order
+    assert index.categories == ["Dining", "Groceries", "Other", "People", "Rideshare", "Transport"]
+
+
+def test_categorize_broadcasts_unique_merchants_and_builds_spend_tables():
+    import pandas as pd
+    from app.agents.tools import categorize
+    calls = []
+    index = categorize.get_merchant_index()
+    lookup = index.lookup
+    tx = pd.DataFrame({"client": ["a", "a", "a", "b", "b"],
+                       "merchant": ["Netflix", "Trader Joe's #1", "Netflix", None, "Trader Joe's #1"],
+                       "amount": [-15.0, -80.0, -15.0, -20.0, 120.0]})
+    try:
+        index.lookup = lambda m: calls.append(m) or lookup(m)
+        cats = categorize.categorize(tx["merchant"])
+        assert list(cats) == ["Subscriptions", "Groceries", "Subscriptions", "Uncategorized", "Groceries"]
+        assert sorted(calls) == ["Netflix", "Trader Joe's #1"]
+        # categorical input reuses its categories (no factorize)
+        assert list(categorize.categorize(tx["merchant"].astype("category"))) == list(cats)
+    finally:
+        del index.lookup
+    table = categorize.category_spend(tx, client_col="client")
+    rows = {(r.client, r.category): r for r in table.itertuples()}
+    assert rows[("a", "Subscriptions")].spend == 30 and rows[("a", "Subscriptions")].transactions == 2
+    assert abs(rows[("a", "Groceries")].share - 80 / 110) < 1e-9
+    assert rows[("b", "Groceries")].income == 120 and rows[("b", "Groceries")].share == 0
+    assert list(table[table["client"] == "a"]["category"]) == ["Groceries", "Subscriptions"]
+    assert categorize.category_spend(tx.iloc[:0]).empty
+
+
+def test_book_category_spend_matches_each_client_alone():
+    import pandas as pd
+    from app.agents.tools import categorize
+    from app.multi_agent_wealth_manager import DataAgent, book_category_spend, normalize_block
+    frames = [rows for _, rows in DataAgent("synthetic_training_data.csv").groups()]
+    # a client without transactions gets an empty table
+    frames.append(frames[0][["profile__user_id", "profile__name"]])
+    tables = normalize_block(frames)
+    for t, spend in zip(tables, book_category_spend(tables)):
+        alone = categorize.category_spend(t.transactions)
+        if alone.empty:
+            assert spend.empty and list(spend.columns) == list(alone.columns)
+        else:
+            pd.testing.assert_frame_equal(spend, alone)
+
+
+def test_report_shows_spend_by_category():
+    from app.multi_agent_wealth_manager import run_pipeline
+    files = run_pipeline("synthetic_training_data.csv", None, "u_2001", write_files=False, charts=False)
+    assert "Spending by category (observed): Groceries $162.45 (77%); Subscriptions $48.99 (23%)." in files["report_md"]
@@ -0,0 +1,85 @@
+def test_policy_rules_decide_a_batch():
+    from app.agents.tools import compliance_rules
+    policies = compliance_rules.get_policies()
+    clients = [
+        {"filing_status": "married_filing_jointly", "non_usd_currency": True, "foreign_balance": 120_000,
+         "has_cost_basis": True, "max_position_weight": 0.4, "holdings_count": 5, "residency_country": "US"},
+        {"filing_status": "single", "non_usd_currency": True, "foreign_balance": 60_000, "has_cost_basis": True,
+         "monthly_expense": 4_000, "liquidity_runway_months": 1.5, "residency_country": "US", "tax_income": 90_000},
+        {"has_cost_basis": False, "residency_country": "FR"},
+    ]
+    joint, single, abroad = policies.evaluate(clients)
+    assert joint["status"] == "ReworkNeeded"
+    assert [r["rule"] for r in joint["redlines"]] == ["position_hard_cap"]
+    assert [c["rule"] for c in joint["conditions"]] == ["non_usd_exposure", "fbar_filing", "fatca_8938_joint"]
+    assert "$120,000" in joint["conditions"][1]["message"] and "40.0%" in joint["redlines"][0]["message"]
+    assert single["status"] == "ApprovalGranted"
+    assert [c["rule"] for c in single["conditions"]] == ["non_usd_exposure", "fbar_filing", "fatca_8938_other",
+                                                          "emergency_reserve"]
+    assert single["disclosures"][0] == "Standard client disclosure" and len(single["disclosures"]) == 2
+    assert "max_position_weight" in single["missing_fields"] and "foreign_balance" not in single["missing_fields"]
+    # unknown values never trip a threshold; the legacy cost-basis note keeps its wording
+    assert abroad["status"] == "ReworkNeeded" and abroad["conditions"] == [{
+        "rule": "missing_cost_basis",
+        "message": "No cost-basis columns present; cannot compute realized/unrealized capital gains precisely"}]
+
+
+def test_missing_values_never_pass_inequalities():
+    from app.agents.tools.compliance_rules import PolicySet, get_policies
+    client = {"non_usd_currency": True, "foreign_balance": 500_000, "has_cost_basis": True, "residency_country": "US"}
+    no_status, single = get_policies().evaluate([client, {**client, "filing_status": "single"}])
+    # FATCA's single-filer threshold needs a known filing status other than joint
+    assert [c["rule"] for c in no_status["conditions"]] == ["non_usd_exposure", "fbar_filing"]
+    assert "filing_status" in no_status["missing_fields"]
+    assert "fatca_8938_other" in [c["rule"] for c in single["conditions"]]
+
+    policies = PolicySet({"rules": [{"id": "r", "severity": "condition", "message": "m",
+                                     "when": "age != 40 or citizenship not in ['US']"}]})
+    hits = policies.matrix([{}, {"age": 41}, {"citizenship": "CA"}, {"age": 40, "citizenship": "US"}])[1]
+    assert hits[0].tolist() == [False, True, True, False]
+
+
+def test_policy_errors_surface_at_load_time():
+    import pytest
+    from app.agents.tools.compliance_rules import PolicyError, PolicySet
+
+    def load(rule, params=None):
+        return PolicySet({"params": params or {"cap": 0.1},
+                          "rules": [{"id": "r", "severity": "condition", "message": "m", **rule}]})
+
+    assert load({"when": "max_position_weight > cap and not has_cost_basis"}).rules[0].features == \
+        ("has_cost_basis", "max_position_weight")
+    for rule, match in [({"when": "max_weight > cap"}, "unknown name 'max_weight'"),
+                        ({"when": "__import__('os')"}, "unsupported expression Call"),
+                        ({"when": "age >"}, "cannot parse"),
+                        ({"when": "filing_status in status_list"}, "literal list"),
+                        ({"when": "true", "severity": "warning"}, "severity"),
+                        ({"when": "true", "message": "{networth:,.0f}"}, "unknown \\['networth'\\]")]:
+        with pytest.raises(PolicyError, match=match):
+            load(rule)
+    with pytest.raises(PolicyError, match="shadow"):
+        load({"when": "true"}, params={"age": 70})
+
+
+def test_graph_and_agent_emit_policy_decisions():
+    import json
+    import pandas as pd
+    from app.agents import graph
+    from app.multi_agent_wealth_manager import ComplianceAgent, NormalizeAgent
+
+    with open("src/app/agents/mocks/client_input_alex.json") as f:
+        client_input = json.load(f)
+    client_input = {**client_input, "accounts": [
+        {"account_id": "eu", "currency": "EUR", "balance": 25_000},
+        {"account_id": "brokerage", "holdings": [
+            {"symbol": "AAPL", "asset_class": "Equity", "market_value": 60_000, "cost_basis": 20_000},
+            {"symbol": "BND", "asset_class": "Bond", "market_value": 40_000, "cost_basis": 39_000}]},
+    ]}
+    decision = graph.run_graph("case_compliance", client_input)["ComplianceDecision"]
+    assert decision["status"] == "ReworkNeeded" and decision["redlines"][0]["rule"] == "position_hard_cap"
+    assert [c["rule"] for c in decision["conditions"]] == ["non_usd_exposure", "fbar_filing"]
+
+    df = pd.read_csv("src/app/agents/mocks/client_input_alex_from_csv.csv")
+    result = ComplianceAgent(tables=NormalizeAgent(df=df).run()).run()
+    assert result["status"] == "ApprovalGranted" and result["decision"]["disclosures"]
+    assert result["notes"] == ["No cost-basis columns present; cannot compute realized/unrealized capital gains precisely"]
@@ -0,0 +1,145 @@
+def test_incremental_rerun_reuses_unchanged_steps(monkeypatch):
+    import json
+    from app.agents import graph
+    from app.agents.tools import comms_builder
+
+    with open("src/app/agents/mocks/client_input_alex.json") as f:
+        client_input = json.load(f)
+    calls = []
+    real = comms_builder.abuild_comms_package
+
+    async def counted(artifacts):
+        calls.append(1)
+        return await real(artifacts)
+    monkeypatch.setattr(comms_builder, "abuild_comms_package", counted)
+
+    first = graph.run_graph("case_incr", client_input)
+    assert first["__run__"]["reused"] == [] and len(first["__run__"]["recomputed"]) == len(graph.AGENTS)
+
+    again = graph.run_graph("case_incr", client_input)
+    assert again["__run__"]["recomputed"] == [] and again["__run__"]["version"] is None
+    assert again["CommsPackage"] == first["CommsPackage"] and len(calls) == 1
+
+    tweaked = graph.run_graph("case_incr", {**client_input, "preferences": {"esg": True}})
+    assert tweaked["__run__"]["recomputed"] == ["discovery", "comms"]
+    assert tweaked["__run__"]["reused"] == ["planning", "tax", "risk", "compliance"]
+    assert tweaked["ClientProfile"]["preferences"] == {"esg": True} and len(calls) == 2
+
+
+def test_dag_runs_independent_agents_concurrently_and_cancels_on_timeout():
+    import asyncio
+    import pytest
+    from app.agents.scheduler import AgentFailed, DagError, build_dag, run_dag
+
+    specs = {
+        "a": {"output_contract": "A", "inputs": []},
+        "b": {"output_contract": "B", "inputs": ["A"]},
+        "c": {"output_contract": "C", "inputs": ["A"]},
+        "d": {"output_contract": "D", "inputs": ["B", "C"], "timeout_seconds": 1},
+    }
+    delays = {"a": 0.05, "b": 0.2, "c": 0.2, "d": 0.05}
+    cancelled = []
+
+    async def agent(node, upstream):
+        try:
+            await asyncio.sleep(delays[node.name])
+        except asyncio.CancelledError:
+            cancelled.append(node.name)
+            raise
+        return node.name + "".join(upstream.values())
+
+    nodes = build_dag(specs)
+    outputs, report = asyncio.run(run_dag(nodes, agent))
+    assert outputs["D"] == "dbaca"
+    assert report["wall_seconds"] < 0.45 < report["sum_seconds"]
+    assert report["critical_path"][0] == "a" and report["critical_path"][-1] == "d"
+
+    delays.update(b=5.0, c=5.0)
+    nodes = build_dag({**specs, "b": {**specs["b"], "timeout_seconds": 0.1}})
+    with pytest.raises(AgentFailed, match="b: TimeoutError"):
+        asyncio.run(run_dag(nodes, agent))
+    assert "c" in cancelled  # still running when b timed out
+    with pytest.raises(DagError, match="cycle"):
+        build_dag({"x": {"output_contract": "X", "inputs": ["Y"]}, "y": {"output_contract": "Y", "inputs": ["X"]}})
+
+
+def test_abandoned_thread_sees_the_run_cancelled():
+    import asyncio
+    import threading
+    import time
+    import pytest
+    from app.agents.scheduler import AgentFailed, build_dag, run_dag
+
+    cancelled, finished, persisted = threading.Event(), threading.Event(), []
+
+    def slow():
+        time.sleep(0.3)
+        if not cancelled.is_set():
+            persisted.append("slow")
+        finished.set()
+
+    async def agent(node, upstream):
+        return await asyncio.to_thread(slow)
+
+    nodes = build_dag({"slow": {"output_contract": "S", "inputs": [], "timeout_seconds": 0.05}})
+    with pytest.raises(AgentFailed, match="slow: TimeoutError"):
+        asyncio.run(run_dag(nodes, agent, cancelled))
+    # the timeout abandoned the thread rather than stopping it; the flag keeps it from persisting
+    assert cancelled.is_set() and finished.wait(2) and persisted == []
+
+
+def test_failed_llm_call_is_not_stored_or_reused(monkeypatch):
+    import json
+    import pytest
+    from app.agents import graph
+    from app.agents.scheduler import AgentFailed
+    from app.core.llm_client import LLMClient, LLMError
+
+    with open("src/app/agents/mocks/client_input_alex.json") as f:
+        client_input = json.load(f)
+    client_input = {**client_input, "preferences": {"case": "llm_failure"}}
+    calls = []
+    real = LLMClient.acomplete
+
+    async def flaky(self, prompt):
+        calls.append(prompt)
+        if len(calls) == 1:
+            raise LLMError("openai call failed after 4 attempts: HTTP 503")
+        return await real(self, prompt)
+    monkeypatch.setattr(LLMClient, "acomplete", flaky)
+
+    with pytest.raises(AgentFailed, match="comms: LLMError"):
+        graph.run_graph("case_llm_failure", client_input)
+    result = graph.run_graph("case_llm_failure", client_input)
+    assert len(calls) == 2 and "comms" in result["__run__"]["recomputed"]
+    assert "LLM API error" not in result["CommsPackage"]["exec_summary"]
+
+
+def test_concurrent_runs_of_one_case_make_one_llm_call(monkeypatch):
+    import asyncio
+    import json
+    import threading
+    from app.agents import graph
+    from app.core.llm_client import LLMClient
+
+    with open("src/app/agents/mocks/client_input_alex.json") as f:
+        client_input = json.load(f)
+    client_input = {**client_input, "preferences": {"case": "concurrent_runs"}}
+    calls = []
+    real = LLMClient.acomplete
+
+    async def slow(self, prompt):
+        calls.append(prompt)
+        await asyncio.sleep(0.3)
+        return await real(self, prompt)
+    monkeypatch.setattr(LLMClient, "acomplete", slow)
+
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(graph.run_graph(f"case_concurrent_{i}", client_input)))
+               for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(results) == 4 and len(calls) == 1
+    assert len({r["CommsPackage"]["exec_summary"] for r in results}) == 1
@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+
+# Cold-import budgets (ms, cumulative -X importtime of everything the statement imports)
+BUDGET_MS = {
+    "from app.multi_agent_wealth_manager import run_pipeline": 500,
+    "import app.api.server": 1500,
+}
+HEAVY = ("pandas", "numpy", "matplotlib", "jinja2")
+
+
+def _importtime(statement):
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, ["src", os.environ.get("PYTHONPATH")]))}
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], env=env,
+                         capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        rows.append((name.rstrip(), int(cumulative)))
+    return rows
+
+
+def test_cold_imports_stay_lazy_and_within_budget():
+    startup = {name for name, _ in _importtime("pass")}
+    for statement, budget in BUDGET_MS.items():
+        rows = [(name, us) for name, us in _importtime(statement) if name not in startup]
+        loaded = {name.strip() for name, _ in rows}
+        assert not [m for m in HEAVY if m in loaded], f"{statement} imports {sorted(set(HEAVY) & loaded)}"
+        total_ms = sum(us for name, us in rows if not name.startswith(" ")) / 1000
+        assert total_ms < budget, f"{statement}: {total_ms:.0f} ms > {budget} ms"
+
+
+def test_lazy_module_loads_once_under_concurrent_first_access(tmp_path, monkeypatch):
+    import builtins
+    import threading
+    from app.core.lazy import lazy_import
+
+    # the module counts its executions and is slow to load, so unsynchronized readers would race it
+    monkeypatch.setattr(builtins, "wm_slow_loads", 0, raising=False)
+    (tmp_path / "wm_slow_module.py").write_text(
+        "import builtins\nimport time\nbuiltins.wm_slow_loads += 1\ntime.sleep(0.2)\nVALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "wm_slow_module", raising=False)
+    module = lazy_import("wm_slow_module")
+    seen, start = [], threading.Barrier(8)
+
+    def read():
+        start.wait()
+        seen.append(module.VALUE)
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert seen == [42] * 8 and builtins.wm_slow_loads == 1
+    assert type(module) is type(sys)
@@ -0,0 +1,68 @@
+import threading
+import time
+
+
+def _wait(queue, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.status(job_id)
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_job_queue_runs_and_bounds_pending():
+    import pytest
+    from app.api.jobs import JobQueue, QueueFull
+    release = threading.Event()
+
+    def runner(case_id, client_input):
+        release.wait(5)
+        if client_input.get("fail"):
+            raise ValueError("bad input")
+        return {"case": case_id}
+
+    queue = JobQueue(runner=runner, workers=2, max_pending=2)
+    ok = queue.submit("case_ok", {})
+    bad = queue.submit("case_bad", {"fail": True})
+    with pytest.raises(QueueFull):
+        queue.submit("case_over", {})
+    release.set()
+    assert _wait(queue, ok["job_id"])["status"] == "succeeded"
+    assert queue.get(ok["job_id"])["result"] == {"case": "case_ok"}
+    failed = _wait(queue, bad["job_id"])
+    assert failed["status"] == "failed" and "bad input" in failed["error"]
+    queue.shutdown()
+
+
+def test_run_case_returns_job_id(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.api import jobs
+    from app.api.server import app
+    monkeypatch.setattr(jobs, "run_flow", lambda case_id, client_input: {"ClientProfile": client_input})
+    jobs.shutdown_job_queue()
+    with TestClient(app) as client:
+        r = client.post("/cases/case_job/run", json={"identity": {}})
+        assert r.status_code == 202
+        job_id = r.json()["job_id"]
+        _wait(jobs.get_job_queue(), job_id)
+        status = client.get(f"/jobs/{job_id}").json()
+        assert status["status"] == "succeeded" and status["metrics"]["run_seconds"] >= 0
+        assert client.get(f"/jobs/{job_id}/result").json() == {"ClientProfile": {"identity": {}}}
+        assert client.get("/jobs/missing").status_code == 404
+        metrics = client.get("/metrics")
+        assert metrics.status_code == 200 and "wm_jobs_succeeded 1" in metrics.text
+
+
+def test_metrics_scrape_does_not_open_the_llm_cache(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.api.server import app
+    from app.core import llm_cache
+    monkeypatch.setattr(llm_cache, "_cache", None)
+    with TestClient(app) as client:
+        text = client.get("/metrics").text
+        assert "wm_jobs_pending" in text and "wm_llm_cache_entries" not in text
+        assert llm_cache._cache is None
+        monkeypatch.setattr(llm_cache, "_cache", llm_cache.ResponseCache(path=":memory:"))
+        assert "wm_llm_cache_entries 0" in client.get("/metrics").text
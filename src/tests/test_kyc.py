@@ -0,0 +1,69 @@
+def test_kyc_service_resolves_batches_in_one_query_and_caches(tmp_path):
+    from app.agents.tools.kyc import KYCService, KYCStore
+
+    store = KYCStore(str(tmp_path / "kyc.sqlite"))
+    store.upsert({f"c{i}": {"status": "Verified", "checked_at": "2025-08-01"} for i in range(5000)})
+    service = KYCService(store, ttl_seconds=60)
+
+    records = service.get_many(["u_1001", "u_2007", "u_1001", "nobody", None, float("nan")]
+                               + [f"c{i}" for i in range(3000)])
+    assert store.queries == 1 and len(records) == 3003
+    assert records["u_1001"]["status"] == "Verified" and records["u_2007"]["status"] == "Expired"
+    assert records["nobody"] == {"user_id": "nobody", "status": "Unknown", "checked_at": None}
+    assert service.get("nobody")["status"] == "Unknown" and service.get(None) is None
+    service.get_many(["u_1001", "c42"])
+    assert store.queries == 1 and service.stats()["hits"] == 3
+    service.ttl_seconds = 0
+    service.get_many(["u_1001"])
+    assert store.queries == 2
+    assert KYCStore(str(tmp_path / "kyc.sqlite")).get_many(["c4999"])["c4999"]["status"] == "Verified"
+
+
+
+def test_kyc_cache_evicts_least_recently_used(tmp_path):
+    from app.agents.tools.kyc import KYCService, KYCStore
+
+    store = KYCStore(str(tmp_path / "kyc.sqlite"))
+    service = KYCService(store, ttl_seconds=60, max_entries=2)
+    # a batch larger than the cache is still answered in full
+    assert set(service.get_many(["u_1001", "u_2007", "u_2002"])) == {"u_1001", "u_2007", "u_2002"}
+    assert service.stats()["entries"] == 2 and service.stats()["evictions"] == 1
+    service.get_many(["u_2007"])
+    service.get_many(["u_1001"])
+    assert store.queries == 2
+    # u_2002 was the least recently used, not u_2007
+    service.get_many(["u_2007"])
+    assert store.queries == 2
+
+def test_batch_run_and_discovery_use_kyc_status(tmp_path, monkeypatch):
+    import json
+    from app.agents import graph
+    from app.agents.tools import kyc
+    from app.multi_agent_wealth_manager import run_all_users
+
+    store = kyc.KYCStore(":memory:")
+    monkeypatch.setattr(kyc, "_service", kyc.KYCService(store))
+    summary = run_all_users("synthetic_training_data.csv", str(tmp_path), charts=False).set_index("user_id")
+    assert store.queries == 1
+    assert summary.loc["u_2007", "kyc_status"] == "Expired" and summary.loc["u_2007", "compliance_status"] == "ReworkNeeded"
+    assert summary.loc["u_2002", "kyc_status"] == "Verified"
+
+    with open("src/app/agents/mocks/client_input_alex_from_csv.json") as f:
+        client_input = json.load(f)
+    profile = graph.run_graph("case_kyc", client_input)["ClientProfile"]
+    assert profile["kyc"] == {"user_id": "u_1001", "status": "Verified", "checked_at": "2025-06-30"}
+    assert store.queries == 2
+
+def test_batch_run_resolves_kyc_once_per_block_without_a_user_scan(tmp_path, monkeypatch):
+    from app.agents.tools import kyc
+    from app import multi_agent_wealth_manager as wm
+
+    def no_user_scan(self):
+        raise AssertionError("the batch run must not re-read the file for its users")
+
+    store = kyc.KYCStore(":memory:")
+    monkeypatch.setattr(kyc, "_service", kyc.KYCService(store))
+    monkeypatch.setattr(wm.DataAgent, "users", no_user_scan)
+    summary = wm.run_all_users("synthetic_training_data.csv", str(tmp_path), charts=False, block_size=4)
+    assert store.queries == 3 and summary["error"].isna().all()
+    assert summary.set_index("user_id").loc["u_2007", "kyc_status"] == "Expired"
@@ -0,0 +1,65 @@
+import threading
+import time
+
+
+def test_cache_hits_ttl_and_lru(tmp_path):
+    from app.core.llm_cache import ResponseCache, cache_key
+    cache = ResponseCache(path=str(tmp_path / "llm.sqlite"), ttl_seconds=3600, max_entries=2)
+    calls = []
+    compute = lambda: calls.append(1) or f"answer{len(calls)}"
+    k1 = cache_key("stub", "m", "prompt one")
+    assert cache.get_or_compute(k1, compute) == "answer1"
+    assert cache.get_or_compute(k1, compute) == "answer1"
+    assert cache.get_or_compute(k1, compute, bypass=True) == "answer2"
+    assert cache_key("stub", "m", "prompt one") != cache_key("stub", "other", "prompt one")
+    for p in ("two", "three"):
+        cache.get_or_compute(cache_key("stub", "m", p), compute)
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 1
+    assert stats["hits"] == 1 and stats["misses"] == 3
+
+
+def test_concurrent_identical_requests_make_one_call():
+    from app.core.llm_cache import ResponseCache
+    cache = ResponseCache(path=":memory:")
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return "once"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", slow))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["once"] * 5
+    assert len(calls) == 1
+
+
+def test_concurrent_requests_from_separate_event_loops_make_one_call():
+    import asyncio
+    from app.core.llm_cache import ResponseCache
+    cache = ResponseCache(path=":memory:")
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.2)
+        return "once"
+
+    async def ask():
+        return await asyncio.gather(*(cache.aget_or_compute("k", slow) for _ in range(3)))
+
+    # one loop per thread, as in concurrent run_graph calls, plus a sync caller
+    results = []
+    threads = [threading.Thread(target=lambda: results.extend(asyncio.run(ask()))) for _ in range(4)]
+    threads.append(threading.Thread(target=lambda: results.append(cache.get_or_compute("k", lambda: "sync"))))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["once"] * 13
+    assert len(calls) == 1 and cache.stats()["inflight_dedupes"] == 12
@@ -0,0 +1,91 @@
+import asyncio
+
+import httpx
+
+
+def _client(handler, **config):
+    from app.core.llm_client import LLMClient
+    client = LLMClient({"provider": "openai", "base_url": "http://llm.test", "max_retries": 2, **config}, backoff_base=0)
+    transport = httpx.MockTransport(handler)
+    client._client = httpx.Client(transport=transport)
+    return client, transport
+
+
+def test_retries_on_429_then_succeeds():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(429)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+    client, _ = _client(handler)
+    assert client.complete("hi") == "ok"
+    assert len(calls) == 3
+    assert calls[0].url.path == "/v1/chat/completions"
+
+
+def test_gives_up_after_max_retries():
+    import pytest
+    from app.core.llm_client import LLMError
+    client, _ = _client(lambda request: httpx.Response(503))
+    with pytest.raises(LLMError):
+        client.complete("hi")
+
+
+def test_async_gemini_request_shape():
+    seen = {}
+
+    def handler(request):
+        seen["url"] = str(request.url)
+        seen["key"] = request.headers["x-goog-api-key"]
+        return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": "gem"}]}}]})
+
+    client, _ = _client(handler, provider="gemini", model="gemini-2.0-flash", api_key="k")
+
+    async def run():
+        return await asyncio.gather(*(client.acomplete(f"p{i}") for i in range(5)))
+
+    assert asyncio.run(run()) == ["gem"] * 5
+    assert seen["url"].endswith("/v1beta/models/gemini-2.0-flash:generateContent")
+    assert seen["key"] == "k"
+
+
+def test_async_calls_share_one_pool_and_cap_across_loops():
+    import threading
+    import time
+    lock, state = threading.Lock(), {"now": 0, "peak": 0}
+
+    def handler(request):
+        with lock:
+            state["now"] += 1
+            state["peak"] = max(state["peak"], state["now"])
+        time.sleep(0.02)
+        with lock:
+            state["now"] -= 1
+        return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+    client, _ = _client(handler, max_concurrency=2)
+    pool = client._sync_client()
+
+    async def run():
+        return await asyncio.gather(*(client.acomplete(f"p{i}") for i in range(3)))
+
+    # each thread runs its own event loop, as concurrent run_graph calls do
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(asyncio.run(run()))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [["ok"] * 3] * 4
+    assert state["peak"] == 2
+    assert client._sync_client() is pool and not pool.is_closed
+
+
+def test_stub_is_deterministic():
+    from app.core.llm_client import LLMClient
+    client = LLMClient({"provider": "stub"})
+    assert client.complete("same") == client.complete("same")
+    assert client.complete("same").startswith("1. Executive Summary")
@@ -0,0 +1,52 @@
+def test_price_service_batches_dedupes_and_expires(tmp_path):
+    from app.agents.tools.market_data import PriceService, SQLitePriceProvider
+
+    provider = SQLitePriceProvider(str(tmp_path / "prices.sqlite"))
+    provider.upsert({f"S{i}": (float(i), "2025-08-13") for i in range(1200)})
+    calls = []
+    fetch = provider.fetch
+    provider.fetch = lambda symbols: calls.append(list(symbols)) or fetch(symbols)
+    service = PriceService(provider, ttl_seconds=60)
+
+    snap = service.snapshot(["S1", "S1", "S1100", "NOPE", None] + [f"S{i}" for i in range(600)])
+    assert len(calls) == 1 and len(calls[0]) == len(set(calls[0])) == 602
+    assert len(snap) == 601 and snap.set_index("symbol").loc["S1100", "price"] == 1100.0
+    service.snapshot(["S1", "NOPE"])
+    assert len(calls) == 1
+    service.ttl_seconds = 0
+    service.snapshot(["S1"])
+    assert calls[-1] == ["S1"]
+
+
+
+def test_price_cache_evicts_least_recently_used(tmp_path):
+    from app.agents.tools.market_data import PriceService, SQLitePriceProvider
+
+    provider = SQLitePriceProvider(str(tmp_path / "prices.sqlite"))
+    provider.upsert({f"S{i}": (float(i), "2025-08-13") for i in range(5)})
+    calls = []
+    fetch = provider.fetch
+    provider.fetch = lambda symbols: calls.append(list(symbols)) or fetch(symbols)
+    service = PriceService(provider, ttl_seconds=60, max_entries=2)
+
+    assert len(service.snapshot(["S0", "S1", "S2"])) == 3
+    assert service.stats()["entries"] == 2 and service.stats()["evictions"] == 1
+    service.snapshot(["S1"])
+    service.snapshot(["S3"])
+    assert calls[-1] == ["S3"]
+    service.snapshot(["S1"])
+    assert len(calls) == 2
+    service.snapshot(["S2"])
+    assert calls[-1] == ["S2"]
+
+def test_revalue_is_a_vectorized_join():
+    import pandas as pd
+    from app.agents.tools.market_data import revalue
+
+    holdings = pd.DataFrame({"symbol": ["VTI", "OLD", "VTI", None], "quantity": [10.0, 5.0, None, None],
+                             "price": [200.0, 3.0, 200.0, None], "market_value": [2000.0, 15.0, 700.0, 50.0]})
+    snapshot = pd.DataFrame({"symbol": ["VTI"], "price": [250.0], "as_of": ["2025-08-13"]})
+    out = revalue(holdings, snapshot)
+    assert out["market_value"].tolist() == [2500.0, 15.0, 700.0, 50.0]
+    assert out["price_source"].tolist() == ["live", "export", "export", "export"]
+    assert out["price_as_of"].iloc[0] == "2025-08-13"
@@ -0,0 +1,133 @@
+def test_all_users_batch(tmp_path):
+    from app.multi_agent_wealth_manager import run_all_users
+    summary = run_all_users("synthetic_training_data.csv", str(tmp_path))
+    assert len(summary) == 10
+    assert summary["user_id"].is_unique
+    assert (tmp_path / "summary.csv").exists()
+    assert (tmp_path / "u_2001" / "wealth_report.md").exists()
+    # continuation rows (blank profile__user_id) belong to the client above them
+    jordan = summary.set_index("user_id").loc["u_2001"]
+    assert round(jordan["cash"], 2) == 129700.65
+
+def test_single_user_keeps_continuation_rows(tmp_path):
+    from app.multi_agent_wealth_manager import DataAgent
+    df = DataAgent("synthetic_training_data.csv").run("u_2001")
+    assert len(df) == 3
+
+def test_all_users_workers_isolates_failures(tmp_path):
+    from app.multi_agent_wealth_manager import run_all_users
+    # a file in place of one client's output directory makes that client fail
+    (tmp_path / "u_2003").write_text("not a directory")
+    summary = run_all_users("synthetic_training_data.csv", str(tmp_path), workers=2)
+    assert len(summary) == 10
+    errors = summary.set_index("user_id")["error"]
+    assert errors.notna().sum() == 1 and errors["u_2003"]
+    assert set(summary.attrs["files"]) == set(summary["user_id"])
+
+def test_normalizer_builds_typed_entity_tables():
+    from app.multi_agent_wealth_manager import DataAgent, NormalizeAgent
+    tables = NormalizeAgent(DataAgent("Agent1_fixed (1).csv").run("u_1001")).run()
+    holdings = tables.holdings
+    assert len(holdings) > 0 and holdings["symbol"].notna().all()
+    assert str(holdings["price"].dtype) == "float64"
+    assert holdings["asset_class"].dtype != "category"
+    assert str(tables.transactions["date"].dtype).startswith("datetime64")
+    assert tables.goals["real_return"].notna().any()
+    assert tables.profile["profile__user_id"] == "u_1001"
+
+def test_block_normalization_matches_each_client_alone():
+    import pandas as pd
+    from app.multi_agent_wealth_manager import DataAgent, NormalizeAgent, normalize_block
+    frames = [rows for _, rows in DataAgent("synthetic_training_data.csv").groups()]
+    for block, frame in zip(normalize_block(frames), frames):
+        alone = NormalizeAgent(frame).run()
+        assert block.profile == alone.profile and block.currencies == alone.currencies
+        for name in ("accounts", "holdings", "transactions", "goals"):
+            # a column the client leaves empty may take its block's dtype; the values must agree
+            pd.testing.assert_frame_equal(getattr(block, name), getattr(alone, name), check_dtype=False)
+
+def test_chunked_ingestion_matches_full_read():
+    from app.multi_agent_wealth_manager import DataAgent
+    full = {uid: len(rows) for uid, rows in DataAgent("synthetic_training_data.csv").groups()}
+    # chunksize 2 splits u_2001's continuation rows across a chunk boundary
+    streamed = {uid: len(rows) for uid, rows in DataAgent("synthetic_training_data.csv", chunksize=2).groups()}
+    assert streamed == full
+    df = DataAgent("synthetic_training_data.csv", chunksize=2).run(["u_2001", "u_2010"])
+    assert len(df) == full["u_2001"] + full["u_2010"]
+
+def test_chunked_read_matches_whole_file_read(tmp_path):
+    import pandas as pd
+    from app.multi_agent_wealth_manager import DataAgent, NormalizeAgent
+    whole = DataAgent("Agent1_fixed (1).csv").run()
+    chunked = DataAgent("Agent1_fixed (1).csv", chunksize=3).run()
+    pd.testing.assert_frame_equal(chunked, whole)
+    assert "529" in set(chunked["accounts__type"])
+    # cells stay strings in every chunk; the normalizer types them, whatever the chunking
+    path = tmp_path / "mixed.csv"
+    path.write_text("profile__user_id,profile__age,profile__flag,accounts__type,accounts__balance\n"
+                    "u1,35,True,529,10\nu1,,,529,20\nu2,41,False,A1,\n")
+    whole = DataAgent(str(path)).run()
+    for size in (1, 2):
+        pd.testing.assert_frame_equal(DataAgent(str(path), chunksize=size).run(), whole)
+    groups = dict(DataAgent(str(path), chunksize=1).groups())
+    tables = NormalizeAgent(groups["u1"]).run()
+    assert tables.profile["profile__age"] == 35.0 and tables.profile["profile__flag"] is True
+    assert tables.accounts["type"].tolist() == ["529", "529"]
+    assert tables.accounts["balance"].tolist() == [10.0, 20.0]
+
+def test_parquet_cache_matches_csv_and_rebuilds(tmp_path):
+    import shutil
+    import pytest
+    pytest.importorskip("pyarrow")
+    from app.multi_agent_wealth_manager import DataAgent, NormalizeAgent, ParquetCache
+    src = tmp_path / "book.csv"
+    shutil.copy("synthetic_training_data.csv", src)
+    cached = NormalizeAgent(DataAgent(str(src), cache=True).run("u_2001")).run()
+    plain = NormalizeAgent(DataAgent(str(src)).run("u_2001")).run()
+    assert cached.accounts["balance"].sum() == plain.accounts["balance"].sum()
+    assert len(cached.transactions) == len(plain.transactions)
+    cache = ParquetCache(str(src))
+    assert cache.is_fresh()
+    with open(src, "a", encoding="utf-8") as f:
+        f.write("\n")
+    assert not cache.is_fresh()
+    assert len(DataAgent(str(src), cache=True).users()) == 10
+
+def test_run_pipeline_in_memory(tmp_path):
+    from matplotlib.figure import Figure
+    from app.multi_agent_wealth_manager import DataAgent, run_pipeline
+    book = DataAgent("synthetic_training_data.csv").run()
+    result = run_pipeline("synthetic_training_data.csv", None, "u_2002", df=book, write_files=False)
+    assert "Sophia Martinez" in result["report_md"]
+    assert isinstance(result["plot_income_expense"], Figure)
+    assert not any(tmp_path.iterdir())
+
+def test_all_users_runs_each_engine_once_per_block(tmp_path, monkeypatch):
+    from app.agents.tools import cashflow, categorize, compliance_rules, tax_rules
+    from app.multi_agent_wealth_manager import run_all_users
+    calls = {"cashflow": 0, "categories": 0, "tax": 0, "compliance": 0}
+    def counted(name, fn):
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return fn(*args, **kwargs)
+        return wrapper
+    monkeypatch.setattr(cashflow, "compute_cashflow", counted("cashflow", cashflow.compute_cashflow))
+    monkeypatch.setattr(categorize, "category_spend", counted("categories", categorize.category_spend))
+    monkeypatch.setattr(tax_rules, "compute_tax", counted("tax", tax_rules.compute_tax))
+    monkeypatch.setattr(compliance_rules.PolicySet, "evaluate",
+                        counted("compliance", compliance_rules.PolicySet.evaluate))
+    summary = run_all_users("synthetic_training_data.csv", str(tmp_path / "block"), charts=False, block_size=4)
+    assert calls == {"cashflow": 3, "categories": 3, "tax": 3, "compliance": 3}
+    single = run_all_users("synthetic_training_data.csv", str(tmp_path / "single"), charts=False, block_size=1)
+    columns = [c for c in summary.columns if c not in ("report_md", "wall_seconds", "cpu_seconds")]
+    assert summary[columns].equals(single[columns])
+    # a block whose evaluation fails is evaluated client by client, so only the bad client fails
+    evaluate = compliance_rules.PolicySet.evaluate
+    def fail_for_u_2003(self, features):
+        if any(f["tax_income"] == 220000.0 for f in features):
+            raise ValueError("bad features")
+        return evaluate(self, features)
+    monkeypatch.setattr(compliance_rules.PolicySet, "evaluate", fail_for_u_2003)
+    errors = run_all_users("synthetic_training_data.csv", str(tmp_path / "fail"), charts=False,
+                           block_size=4).set_index("user_id")["error"]
+    assert errors.notna().sum() == 1 and errors["u_2003"] == "ValueError: bad features"
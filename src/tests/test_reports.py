@@ -0,0 +1,25 @@
+def test_report_formats_render_from_one_view():
+    import json
+    from app.multi_agent_wealth_manager import run_pipeline
+    from app.reports.rendering import get_environment, render_report, report_view
+    result = run_pipeline("synthetic_training_data.csv", None, "u_2002", write_files=False, charts=False,
+                          formats=("md", "html", "json"))
+    assert "Sophia Martinez" in result["report_md"] and "plot_allocation" not in result
+    assert "<h1>Executive summary</h1>" in result["report_html"]
+    data = json.loads(result["report_json"])
+    assert data["client"]["name"] == "Sophia Martinez" and data["metrics"]["net_worth"] > 0
+
+    view = report_view({"profile__name": "<b>Eve</b>"}, {"total_cash": 1234.5}, {}, {}, {}, {}, {})
+    assert view["f"]["cash"] == "1,234.50" and view["metrics"]["cash_runway_months"] == 0.0
+    out = render_report(view, ("md", "html"))
+    assert "<b>Eve</b>" in out["md"] and "&lt;b&gt;Eve&lt;/b&gt;" in out["html"]
+    # compiled once: the environment hands back the same template object
+    env = get_environment()
+    assert env.get_template("wealth_report.md.j2") is env.get_template("wealth_report.md.j2")
+
+
+def test_unknown_report_format_is_rejected():
+    import pytest
+    from app.reports.rendering import render_report
+    with pytest.raises(ValueError, match="pdf"):
+        render_report({}, ("pdf",))
@@ -0,0 +1,57 @@
+def test_stress_matrix_matches_per_client_sum():
+    import numpy as np
+    import pandas as pd
+    from app.agents.tools import risk
+
+    book = pd.DataFrame({
+        "user_id": ["a", "a", "a", "b", "b"],
+        "symbol": ["AAPL", "VTI", None, "BND", "AAPL"],
+        "asset_class": ["Equity/US", "Equity/US", "Cash", "Fixed Income", "Equity/US"],
+        "market_value": [30.0, 60.0, 10.0, 50.0, 50.0],
+    })
+    scenarios = {"eq": {"asset_class": {"equity": -0.2, "fixed income": 0.05}},
+                 "tech": {"asset_class": {"equity/us": -0.1}, "symbol": {"AAPL": -0.4}}}
+    result = risk.stress_test(book, scenarios, client_col="user_id")
+    expected = {"a": [-0.18, -0.3 * 0.4 - 0.6 * 0.1], "b": [0.5 * 0.05 - 0.5 * 0.2, -0.5 * 0.4]}
+    for client, row in expected.items():
+        assert np.allclose(result.loc[client].to_numpy(), row)
+
+    breaches = risk.concentrations(book, client_col="user_id", symbol_limit=0.4, class_limit=0.8)
+    assert set(map(tuple, breaches[["client", "name"]].to_numpy())) == {("a", "VTI"), ("b", "AAPL"), ("b", "BND"), ("a", "Equity/US")}
+
+
+def test_risk_report_fields_from_input():
+    from app.agents.tools import risk
+    from app.schemas.models import RiskReport
+
+    client_input = {"accounts": [{"holdings": [
+        {"symbol": "AAPL", "asset_class": "Equity/US", "quantity": 10, "price": 200.0},
+        {"symbol": "VTI", "asset_class": "Equity/US", "market_value": 6000.0},
+        {"symbol": "BND", "asset_class": "Fixed Income", "market_value": 12000.0},
+    ]}]}
+    fields = risk.risk_report_fields(risk.holdings_from_input(client_input))
+    report = RiskReport(**fields, rationale="", data_lineage={}, missing_fields=[])
+    assert abs(report.exposures["Fixed Income"] - 0.6) < 1e-9
+    assert report.liquidity_tiers["3-12mo"] == report.exposures["Fixed Income"]
+    assert {"scenario", "pnl_pct", "pnl"} <= set(report.stress_results[0])
+    assert any(m.get("symbol") == "VTI" for m in report.mitigations)
+
+
+def test_book_report_fields_match_each_client_alone(monkeypatch):
+    import pandas as pd
+    from app.agents.tools import risk
+
+    book = pd.DataFrame({
+        "user_id": ["a", "a", "a", "b", "b", "b", "c"],
+        "symbol": ["AAPL", "VTI", None, "BND", "AAPL", "VTI", "VTI"],
+        "asset_class": ["Equity/US", "Equity/US", "Cash", "Fixed Income", "Equity/US", "Equity/US", "Equity/US"],
+        "market_value": [30.0, 60.0, 10.0, 50.0, 40.0, 10.0, 0.0],
+    })
+    alone = {u: risk.risk_report_fields(rows) for u, rows in book.groupby("user_id")}
+    calls = []
+    matrix = risk.position_matrix
+    monkeypatch.setattr(risk, "position_matrix", lambda *a, **k: calls.append(1) or matrix(*a, **k))
+    fields = risk.risk_report_fields_many(book, "user_id")
+    assert len(calls) == 1 and set(fields) == {"a", "b"}
+    assert fields["a"] == alone["a"] and fields["b"] == alone["b"]
+    assert [m.get("symbol") or m["asset_class"] for m in fields["b"]["mitigations"]] == ["BND", "AAPL", "Fixed Income", "Equity/US"]
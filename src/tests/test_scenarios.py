@@ -0,0 +1,48 @@
+def test_monte_carlo_matches_deterministic_and_is_chunk_invariant():
+    from app.agents.tools.scenarios import simulate_goals
+
+    goals = [{"name": "retire", "target_amount": 1_500_000.0, "years": 25, "real_return": 0.04, "inflation": 0.02},
+             {"name": "college", "target_amount": 150_000.0, "years": 10, "real_return": 0.04, "inflation": 0.03}]
+    # zero volatility collapses every path onto the closed-form annuity value
+    flat = simulate_goals(goals, 100_000.0, 20_000.0, n_paths=10, volatility=0.0, seed=0)
+    fv = 100_000.0 * 1.04 ** 25 + 20_000.0 * (1.04 ** 25 - 1) / 0.04
+    assert abs(flat[0]["percentiles"]["p50"] - fv) < 1e-6 and flat[0]["success_probability"] == 0.0
+
+    full = simulate_goals(goals, 100_000.0, 20_000.0, n_paths=20_000, seed=7)
+    chunked = simulate_goals(goals, 100_000.0, 20_000.0, n_paths=20_000, seed=7, max_cells=5_000)
+    assert full == chunked
+    assert 0.0 < full[0]["success_probability"] < 1.0
+    assert full[1]["success_probability"] > full[0]["success_probability"]
+
+
+def test_get_scenarios_from_client_input():
+    from app.agents.tools.scenarios import get_scenarios
+
+    client_input = {
+        "as_of": "2025-08-13",
+        "profile": {"age": 40},
+        "accounts": [{"balance": 50_000}, {"holdings": [{"market_value": 150_000}]}],
+        "goals": [{"name": "Retirement", "target_amount": 2_000_000, "target_age": 65,
+                   "assumptions": {"real_return": 0.05, "inflation": 0.025}},
+                  {"name": "Emergency Fund", "target_amount": 36_000, "target_date": "2026-12-31",
+                   "assumptions__inflation": 0.03}],
+    }
+    rows = get_scenarios(client_input, annual_savings=30_000, n_paths=2_000, seed="case_1")
+    assert [r["scenario_name"] for r in rows] == ["Retirement", "Emergency Fund"]
+    assert rows[0]["years"] == 25 and rows[1]["years"] == 1
+    assert rows == get_scenarios(client_input, annual_savings=30_000, n_paths=2_000, seed="case_1")
+    assert get_scenarios({}) == []
+
+
+def test_target_age_goals_use_identity_age():
+    import json
+    from app.agents import graph
+    from app.agents.tools.scenarios import get_scenarios
+
+    with open("src/app/agents/mocks/client_input_alex_from_csv.json") as f:
+        client_input = json.load(f)
+    client_input["goals"] = [{"name": "Retirement", "target_amount": 2_000_000, "target_age": 65}]
+    rows = get_scenarios(client_input, annual_savings=30_000, n_paths=1_000, seed="case_1")
+    assert [(r["scenario_name"], r["years"]) for r in rows] == [("Retirement", 65 - client_input["identity"]["age"])]
+    plan = graph.run_graph("case_identity_age", client_input, force=True)["PlanSet"]
+    assert list(plan["probabilities"]) == ["Retirement"] and "goals" not in plan["missing_fields"]
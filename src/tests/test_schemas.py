@@ -31,3 +31,42 @@ def test_plan_set_schema():
     }
     ps = PlanSet(**data)
     assert ps.liquidity_runway_months == 0.0
+
+def test_validators_fast_strict_and_pass_through():
+    import pytest
+    from pydantic import ValidationError
+    from app.core.policies import validate_artifact
+    from app.schemas.models import ClientProfile, RiskReport
+    from app.schemas.validation import artifact, validate
+
+    data = {"exposures": {"Equity": "0.6"}, "concentrations": {}, "stress_results": [], "liquidity_tiers": {},
+            "mitigations": [], "rationale": "r", "data_lineage": {}, "missing_fields": []}
+    fast = validate(RiskReport, data, mode="fast")
+    assert fast == RiskReport(**data).model_dump() and fast.contract == "RiskReport"
+    with pytest.raises(ValidationError):
+        validate(RiskReport, data, mode="strict")
+    strict = validate("RiskReport", {**data, "exposures": {"Equity": 0.6}}, mode="strict")
+    assert strict == fast
+    # validated once: the same contract passes through untouched, another contract is checked
+    assert validate_artifact(fast, RiskReport) is fast
+    with pytest.raises(ValidationError):
+        validate_artifact(fast, ClientProfile)
+    with pytest.raises(ValidationError, match="missing_fields"):
+        artifact(RiskReport, **{**data, "missing_fields": None})
+    profile = artifact(ClientProfile, schema_version="1.0", as_of="2025-08-13", currency="USD", identity={},
+                       preferences={}, rationale="r", data_lineage={}, missing_fields=[])
+    assert profile["kyc"] == {} and profile == ClientProfile(**profile).model_dump()
+
+
+def test_json_schemas_match_models():
+    import json
+    import os
+    from app.schemas import models
+
+    folder = os.path.join(os.path.dirname(models.__file__), "jsonschemas")
+    for name in os.listdir(folder):
+        with open(os.path.join(folder, name)) as f:
+            schema = json.load(f)
+        fields = getattr(models, schema["title"]).model_fields
+        assert set(schema["properties"]) == set(fields), name
+        assert set(schema["required"]) <= set(fields), name
@@ -0,0 +1,62 @@
+def test_versioned_batched_store_with_retention(tmp_path):
+    from app.storage.store import SQLiteArtifactStore
+
+    path = str(tmp_path / "artifacts.sqlite")
+    store = SQLiteArtifactStore(path, cache_size=2, max_versions=2, retention_seconds=0, max_cases=2)
+    assert store.set_many("c1", {"PlanSet": {"v": 1}, "RiskReport": {"r": [1, 2]}}) == 1
+    assert store.set_many("c1", {"PlanSet": {"v": 2}}) == 2
+    assert store.get("c1", "PlanSet") == {"v": 2} and store.get("c1", "PlanSet", version=1) == {"v": 1}
+    assert store.to_dict("c1") == {"PlanSet": {"v": 2}, "RiskReport": {"r": [1, 2]}}
+    store.get("c1", "PlanSet")
+    assert store.stats()["cache_hits"] >= 1
+
+    store.set_many("c1", {"PlanSet": {"v": 3}})
+    assert store.versions("c1") == [2, 3]
+    store.set_many("c2", {"PlanSet": {}})
+    store.set_many("c3", {"PlanSet": {}})
+    assert store.to_dict("c1") == {} and store.stats()["cases"] == 2
+
+    reopened = SQLiteArtifactStore(path)
+    assert reopened.get("c3", "PlanSet") == {}
+
+
+def test_run_graph_persists_one_version_per_run():
+    import json
+    from app.agents.graph import run_graph
+    from app.storage.store import get_artifacts, get_store
+
+    with open("src/app/agents/mocks/client_input_alex.json") as f:
+        client_input = json.load(f)
+    artifacts = run_graph("case_store", client_input)
+    run_graph("case_store", client_input, force=True)
+    assert get_store().versions("case_store", "CommsPackage") == [1, 2]
+    stored = get_artifacts("case_store")
+    assert stored["PlanSet"] == artifacts["PlanSet"] and "__manifest__" not in stored
+
+
+def test_retention_evicts_cached_reads_of_other_cases(tmp_path):
+    import sqlite3
+    import time
+    from app.storage.store import SQLiteArtifactStore
+
+    path = str(tmp_path / "artifacts.sqlite")
+    store = SQLiteArtifactStore(path, retention_seconds=0, max_cases=1)
+    store.set_many("c1", {"PlanSet": {"v": 1}})
+    assert store.get("c1", "PlanSet") == {"v": 1}
+    store.set_many("c2", {"PlanSet": {"v": 2}})
+    assert store.to_dict("c1") == {} and store.get("c1", "PlanSet") is None
+    assert store.get("c2", "PlanSet") == {"v": 2}
+
+    aging = SQLiteArtifactStore(str(tmp_path / "aging.sqlite"), retention_seconds=0.05, max_cases=0)
+    aging.set_many("old", {"PlanSet": {"v": 1}})
+    assert aging.get("old", "PlanSet") == {"v": 1}
+    time.sleep(0.1)
+    aging.set_many("new", {"PlanSet": {"v": 2}})
+    assert aging.get("old", "PlanSet") is None
+
+    # max_cases prunes from the indexed cases table, not a scan of the artifacts
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT case_id FROM cases").fetchall() == [("c2",)]
+    plan = conn.execute("EXPLAIN QUERY PLAN SELECT case_id FROM cases ORDER BY last_written DESC"
+                        " LIMIT -1 OFFSET 1").fetchall()
+    assert "cases_written" in str(plan)
@@ -0,0 +1,28 @@
+def test_vectorized_matches_scalar_loop():
+    import numpy as np
+    from app.agents.tools.tax_rules import compute_tax, get_tax_brackets
+
+    table = get_tax_brackets('federal', 2025, 'married_filing_jointly')
+    incomes = np.array([0.0, 25_000.0, 120_000.0, 480_000.0, 2_000_000.0])
+    out = compute_tax(incomes, 'married_filing_jointly', 'CA', 2025)
+    bounds = [b[0] for b in table['brackets']] + [float('inf')]
+    for income, got in zip(incomes, out['federal_tax']):
+        taxable = max(0.0, income - table['standard_deduction'])
+        expected = sum(max(0.0, min(taxable, hi) - lo) * rate
+                       for (lo, rate), hi in zip(table['brackets'], bounds[1:]))
+        assert abs(got - expected) < 1e-6
+    assert out['state_tax'][0] == 0.0 and np.all(np.diff(out['state_tax']) > 0)
+
+
+def test_mixed_statuses_states_and_fallbacks():
+    import numpy as np
+    from app.agents.tools.tax_rules import compute_tax
+
+    incomes = np.full(3, 150_000.0)
+    mixed = compute_tax(incomes, ['mfj', 'single', 'single'], ['CA', 'NY', 'TX'], 2025, ltcg=[0.0, 0.0, 50_000.0])
+    assert mixed['federal_tax'][1] > mixed['federal_tax'][0]
+    # unknown state -> flat default schedule; 2025 state tables fall back to 2024
+    assert abs(mixed['state_tax'][2] - 0.06 * 200_000.0) < 1e-6
+    assert mixed['ltcg_tax'][2] > 0 and mixed['ltcg_tax'][0] == 0.0
+    single = compute_tax(150_000.0, 'single', 'NY', 2025)
+    assert np.isclose(single['state_tax'][0], mixed['state_tax'][1])
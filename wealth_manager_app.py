@@ -1,7 +1,10 @@
 import streamlit as st
 import pandas as pd
-import subprocess
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from app.multi_agent_wealth_manager import DataAgent, run_pipeline
 
 st.set_page_config(page_title="Wealth Manager Executive Summary", layout="wide")
 
@@ -10,13 +13,28 @@ st.title("Wealth Manager Executive Summary")
 # Path to your dataset (update as needed)
 data_path = st.sidebar.text_input("CSV file path", "synthetic_training_data.csv")
 
+def file_version(csv_path):
+    # Part of every cache key below, so editing the CSV invalidates cached books and reports
+    stat = os.stat(csv_path)
+    return (stat.st_size, stat.st_mtime_ns)
+
+# The parsed book is shared across sessions and reruns (read-only, never mutated)
+@st.cache_resource(show_spinner="Loading dataset...", max_entries=4)
+def load_book(csv_path, version):
+    return DataAgent(csv_path, cache=True).run()
+
+# One pipeline run per (file version, user); repeat views are served from memory
+@st.cache_data(show_spinner=False, max_entries=256)
+def analyze_user(csv_path, version, user_id):
+    book = load_book(csv_path, version)
+    return run_pipeline(csv_path, None, user_id, df=book, write_files=False)
+
 # Load dataset and extract user IDs and names
 def get_user_options(csv_path):
     try:
-        df = pd.read_csv(csv_path)
-        df.columns = [c.strip() for c in df.columns]
-        if 'profile__user_id' in df.columns and 'profile__name' in df.columns:
-            users = df[['profile__user_id', 'profile__name']].drop_duplicates()
+        book = load_book(csv_path, file_version(csv_path))
+        if 'profile__user_id' in book.columns and 'profile__name' in book.columns:
+            users = book[['profile__user_id', 'profile__name']].dropna(subset=['profile__user_id']).drop_duplicates()
             options = users.apply(lambda row: f"{row['profile__user_id']} - {row['profile__name']}", axis=1).tolist()
             return options, users
         else:
@@ -33,22 +51,20 @@ run_analysis = st.sidebar.button("Run Analysis")
 if selected_user and run_analysis:
     user_id = selected_user.split(" - ")[0]
     st.info(f"Selected User: {selected_user}")
-    # Build and run the command in the terminal
-    output_dir = "./output_streamlit"
-    os.makedirs(output_dir, exist_ok=True)
-    cmd = f"python src/app/multi_agent_wealth_manager.py --input {data_path} --output {output_dir} --user_id {user_id}"
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-    if result.returncode != 0:
-        st.error(f"Error running pipeline: {result.stderr}")
+    try:
+        with st.spinner("Running analysis..."):
+            result = analyze_user(data_path, file_version(data_path), user_id)
+    except Exception as e:
+        st.error(f"Error running pipeline: {e}")
     else:
         st.success("Analysis complete!")
-        # Read and display executive summary
-        report_path = os.path.join(output_dir, "wealth_report.md")
-        if os.path.exists(report_path):
-            with open(report_path, "r", encoding="utf-8") as f:
-                summary = f.read()
-            st.markdown(summary)
+        # Display executive summary and charts
+        if result.get("report_md"):
+            st.markdown(result["report_md"])
         else:
             st.warning("No executive summary found for this user.")
+        charts = [fig for fig in (result.get("plot_allocation"), result.get("plot_income_expense")) if fig is not None]
+        for col, fig in zip(st.columns(max(len(charts), 1)), charts):
+            col.pyplot(fig)
 else:
     st.info("Select a user and click 'Run Analysis' to view their executive summary.")